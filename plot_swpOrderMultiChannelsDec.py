@@ -1,13 +1,14 @@
 import matplotlib.pyplot as plt
-import numpy as np
+from sweep.results_store import open_store
 
 final_distance = 200
 distances = list(range(1, final_distance + 1, 10))
 
-# Load rates from the file
+# Load rates from the results store (filled from data/rates if it is empty)
+store = open_store("data/results")
 
-rates_Dec_l2r = np.loadtxt('data/rates/network(N=2RoutersMultiChannelsDec.json)(Swapping_order=left_to_right).txt')
-rates_Dec_r2l = np.loadtxt('data/rates/network(N=2RoutersMultiChannelsDec.json)(Swapping_order=right_to_left).txt')
+rates_Dec_l2r = store.query(unique=("distance",), dataset="rates", network="2RoutersMultiChannelsDec.json", swapping_order="left_to_right")["rate"]
+rates_Dec_r2l = store.query(unique=("distance",), dataset="rates", network="2RoutersMultiChannelsDec.json", swapping_order="right_to_left")["rate"]
 
 
 
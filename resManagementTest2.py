@@ -348,13 +348,17 @@ if __name__ == "__main__":
     for i, node in enumerate(node_list):
         node.set_seed(i)
 
-    # create all-to-all classical connections
+    # create the classical connections the protocols use: between routers
+    # (swapping also talks to the far ends) and between each BSM node and its
+    # two routers; no self-loops or BSM-BSM channels
     cc_delay = 1e9
-    for node1 in node_list:
-        for node2 in node_list:
-            cc = ClassicalChannel("cc_%s_%s" % (node1.name, node2.name), tl,
-                                  1e3, delay=cc_delay)
-            cc.set_ends(node1, node2.name)
+    cc_pairs = [(a, b) for a in [r1, r2, r3] for b in [r1, r2, r3] if a is not b]
+    cc_pairs += [(r1, m12), (r2, m12), (r2, m23), (r3, m23)]
+    cc_pairs += [(b, a) for a, b in cc_pairs[6:]]
+    for node1, node2 in cc_pairs:
+        cc = ClassicalChannel("cc_%s_%s" % (node1.name, node2.name), tl,
+                              1e3, delay=cc_delay)
+        cc.set_ends(node1, node2.name)
 
     # create quantum channels linking r1 and r2 to m1
     qc_atten = 0
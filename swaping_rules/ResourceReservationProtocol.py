@@ -1,30 +1,116 @@
 from enum import Enum, auto
-from typing import List, TYPE_CHECKING, Any, Dict
+from typing import List, TYPE_CHECKING, Any, Dict, Iterable
 
 if TYPE_CHECKING:
     from sequence.topology.node import QuantumRouter
     from sequence.resource_management.memory_manager import MemoryInfo, MemoryManager
     from sequence.entanglement_management.entanglement_protocol import EntanglementProtocol
+    from sequence.network_management.reservation import Reservation
 
 from sequence.resource_management.rule_manager import Rule, Arguments
 from sequence.entanglement_management.generation import EntanglementGenerationA
-from sequence.entanglement_management.purification import BBPSSW
+from sequence.entanglement_management.purification import BBPSSW, BBPSSWMessage, BBPSSWMsgType
 from sequence.entanglement_management.swapping import EntanglementSwappingA, EntanglementSwappingB
 from sequence.message import Message
 from sequence.protocol import StackProtocol
 from sequence.kernel.event import Event
 from sequence.kernel.process import Process
+from sequence.utils import log
 
-MAP = {0:1,
-       1:1,
-       2:2,
-       3:4}
 MAP = {0:4,
        1:4,
        2:2,
        3:1}
 
 
+class MemoryIndices:
+    """Memory indices of a rule, with constant-time membership
+
+    Built once per reservation from the timecards; slicing gives the indices
+    of one link, again as a `MemoryIndices`. Contiguous indices (the usual
+    case, the timecards are in memory order) are checked against a range,
+    others against a set.
+    """
+
+    __slots__ = ("_indices", "_members")
+
+    def __init__(self, indices: Iterable[int]):
+        self._indices = tuple(indices)
+        if self._indices and self._indices == tuple(range(self._indices[0], self._indices[-1] + 1)):
+            self._members = range(self._indices[0], self._indices[-1] + 1)
+        else:
+            self._members = frozenset(self._indices)
+
+    def __contains__(self, index: int) -> bool:
+        return index in self._members
+
+    @property
+    def members(self):
+        """The range or frozenset checked by `in`, for conditions that bind it"""
+        return self._members
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return MemoryIndices(self._indices[item])
+        return self._indices[item]
+
+    def __iter__(self):
+        return iter(self._indices)
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __repr__(self) -> str:
+        return "MemoryIndices(%r)" % (list(self._indices),)
+
+
+def _entangled_with(manager: "MemoryManager", remote_node: str) -> List["MemoryInfo"]:
+    """Memories of `manager` entangled with `remote_node`, in memory order
+
+    Uses the (state, remote node) index of `sweep.memory_index.IndexedMemoryManager`
+    when the topology installed it, a scan of the memories otherwise.
+    """
+    lookup = getattr(manager, "lookup", None)
+    if lookup is not None:
+        return lookup("ENTANGLED", remote_node)
+    return [info for info in manager
+            if info.state == "ENTANGLED" and info.remote_node == remote_node]
+
+
+PAIRING_POLICIES = ("exact", "nearest", "oldest")
+
+
+def _pairing(reservation: "Reservation") -> str:
+    """Purification pairing policy of a reservation ("exact" unless set)"""
+    policy = getattr(reservation, "purification_pairing", None) or "exact"
+    if policy not in PAIRING_POLICIES:
+        raise ValueError("unknown pairing policy %r (known: %s)" % (policy, ", ".join(PAIRING_POLICIES)))
+    return policy
+
+
+def _purification_partner(manager: "MemoryManager", memory_info: "MemoryInfo", memory_indices,
+                          below: float, policy: str) -> "MemoryInfo":
+    """Memory to purify `memory_info` with, None if there is none
+
+    Candidates are the other memories entangled with the same remote node,
+    among `memory_indices` and under the `below` fidelity. "exact" takes the
+    first one, in memory order, of equal fidelity (the original BBPSSW
+    pairing), "nearest" the one of closest fidelity and "oldest" the one
+    entangled first, ties in memory order. Uses the fidelity index of
+    `sweep.memory_index.IndexedMemoryManager` when the topology installed it.
+    """
+    find = getattr(manager, "purification_partner", None)
+    if find is not None:
+        return find(memory_info, memory_indices, below, policy)
+    candidates = [info for info in _entangled_with(manager, memory_info.remote_node)
+                  if info is not memory_info and info.fidelity < below and info.index in memory_indices]
+    if policy == "exact":
+        return next((info for info in candidates if info.fidelity == memory_info.fidelity), None)
+    if policy == "nearest":
+        return min(candidates, key=lambda info: (abs(info.fidelity - memory_info.fidelity), info.index), default=None)
+    return min(candidates, key=lambda info: (info.entangle_time, info.index), default=None)
+
+
 def eg_rule_condition(memory_info: "MemoryInfo",
                       manager: "MemoryManager",
                       args: Arguments) -> List["MemoryInfo"]:
@@ -94,16 +180,73 @@ def ep_rule_condition1(memory_info: "MemoryInfo", manager: "MemoryManager",
     if (memory_info.index in memory_indices
             and memory_info.state == "ENTANGLED"
             and memory_info.fidelity < reservation.fidelity):
-        for info in manager:
-            if (info != memory_info and info.index in memory_indices
-                    and info.state == "ENTANGLED"
-                    and info.remote_node == memory_info.remote_node
-                    and info.fidelity == memory_info.fidelity):
-                assert memory_info.remote_memo != info.remote_memo
-                return [memory_info, info]
+        info = _purification_partner(manager, memory_info, memory_indices, reservation.fidelity,
+                                     _pairing(reservation))
+        if info is not None:
+            assert memory_info.remote_memo != info.remote_memo
+            return [memory_info, info]
     return []
 
 
+class PairingBBPSSW(BBPSSW):
+    """BBPSSW on two memories of different fidelities
+
+    SeQUeNCe's BBPSSW requires equal fidelities, which only the "exact"
+    pairing policy guarantees. The kept memory gets the BBPSSW fidelity of
+    two Werner pairs of fidelities F1 and F2, equal to `BBPSSW.improved_fidelity`
+    when F1 == F2.
+    """
+
+    def start(self) -> None:
+        # `BBPSSW.start` without its equal fidelity assertion
+        log.logger.info(f"{self.own.name} protocol start with partner {self.remote_node_name}")
+
+        assert self.is_ready(), "other protocol is not set; please use set_others function to set it."
+        kept_memo_ent = self.kept_memo.entangled_memory["node_id"]
+        meas_memo_ent = self.meas_memo.entangled_memory["node_id"]
+        assert kept_memo_ent == meas_memo_ent, "mismatch of entangled memories {}, {} on node {}".format(
+            kept_memo_ent, meas_memo_ent, self.own.name)
+        assert min(self.kept_memo.fidelity, self.meas_memo.fidelity) > 0.5
+
+        meas_samp = self.own.get_generator().random()
+        self.meas_res = self.own.timeline.quantum_manager.run_circuit(
+            self.circuit, [self.kept_memo.qstate_key,
+                           self.meas_memo.qstate_key],
+            meas_samp)
+        self.meas_res = self.meas_res[self.meas_memo.qstate_key]
+        dst = self.kept_memo.entangled_memory["node_id"]
+
+        message = BBPSSWMessage(BBPSSWMsgType.PURIFICATION_RES,
+                                self.remote_protocol_name,
+                                meas_res=self.meas_res)
+        self.own.send_message(dst, message)
+
+    def received_message(self, src: str, msg: BBPSSWMessage) -> None:
+        log.logger.info(
+            self.own.name + " received result message, succeeded: {}".format(
+                self.meas_res == msg.meas_res))
+        assert src == self.remote_node_name
+
+        fidelity = self.meas_memo.fidelity
+        self.update_resource_manager(self.meas_memo, "RAW")
+        if self.meas_res == msg.meas_res:
+            self.kept_memo.fidelity = PairingBBPSSW.paired_fidelity(self.kept_memo.fidelity, fidelity)
+            self.update_resource_manager(self.kept_memo, state="ENTANGLED")
+        else:
+            self.update_resource_manager(self.kept_memo, state="RAW")
+
+    @staticmethod
+    def paired_fidelity(F1: float, F2: float) -> float:
+        """Fidelity of the kept pair after a successful purification of pairs of fidelities F1 and F2"""
+        e1, e2 = (1 - F1) / 3, (1 - F2) / 3
+        return (F1 * F2 + e1 * e2) / (F1 * F2 + F1 * e2 + F2 * e1 + 5 * e1 * e2)
+
+
+def _purification_protocol(args: Arguments) -> type:
+    """BBPSSW class of an EP rule: SeQUeNCe's unless pairs may have different fidelities"""
+    return BBPSSW if _pairing(args["reservation"]) == "exact" else PairingBBPSSW
+
+
 def ep_req_func1(protocols, args: Arguments) -> "BBPSSW":
     """Function used by `ep_rule_action1` for selecting purification protocols
     on the remote node
@@ -145,7 +288,7 @@ def ep_rule_action1(memories_info: List["MemoryInfo"], args: Arguments):
     """
     memories = [info.memory for info in memories_info]
     name = "EP.%s.%s" % (memories[0].name, memories[1].name)
-    protocol = BBPSSW(None, name, memories[0], memories[1])
+    protocol = _purification_protocol(args)(None, name, memories[0], memories[1])
     dsts = [memories_info[0].remote_node]
     req_funcs = [ep_req_func1]
     req_args = [{"remote0": memories_info[0].remote_memo,
@@ -174,7 +317,7 @@ def ep_rule_action2(memories_info: List["MemoryInfo"], args: Arguments):
     """
     memories = [info.memory for info in memories_info]
     name = "EP.%s" % memories[0].name
-    protocol = BBPSSW(None, name, memories[0], None)
+    protocol = _purification_protocol(args)(None, name, memories[0], None)
     return protocol, [None], [None], [None]
 
 
@@ -212,26 +355,19 @@ def es_rule_conditionA(memory_info: "MemoryInfo", manager: "MemoryManager", args
     left = args["left"]
     right = args["right"]
     fidelity = args["fidelity"]
-    if (memory_info.state == "ENTANGLED"
-            and memory_info.index in memory_indices
-            and memory_info.remote_node == left
-            and memory_info.fidelity >= fidelity):
-        for info in manager:
-            if (info.state == "ENTANGLED"
-                    and info.index in memory_indices
-                    and info.remote_node == right
-                    and info.fidelity >= fidelity):
-                return [memory_info, info]
-    elif (memory_info.state == "ENTANGLED"
-          and memory_info.index in memory_indices
-          and memory_info.remote_node == right
-          and memory_info.fidelity >= fidelity):
-        for info in manager:
-            if (info.state == "ENTANGLED"
-                    and info.index in memory_indices
-                    and info.remote_node == left
-                    and info.fidelity >= fidelity):
-                return [memory_info, info]
+    if (memory_info.state != "ENTANGLED"
+            or memory_info.index not in memory_indices
+            or memory_info.fidelity < fidelity):
+        return []
+    if memory_info.remote_node == left:
+        partner_node = right
+    elif memory_info.remote_node == right:
+        partner_node = left
+    else:
+        return []
+    for info in _entangled_with(manager, partner_node):
+        if info.index in memory_indices and info.fidelity >= fidelity:
+            return [memory_info, info]
     return []
 
 
@@ -279,6 +415,154 @@ def es_rule_conditionB2(memory_info: "MemoryInfo", manager: "MemoryManager", arg
     else:
         return []
 
+class RuleArgs:
+    """Condition or action arguments of a rule built by `create_rules`
+
+    Slotted, so a rule carries a few fixed fields instead of a dict; reads
+    with ``args["name"]`` still work for the generic rule functions.
+    """
+
+    __slots__ = ("memory_indices", "fidelity", "left", "right", "target_remote", "reservation",
+                 "mid", "path", "index", "name", "es_succ_prob", "es_degradation")
+
+    def __init__(self, **values: Any):
+        for name in self.__slots__:
+            setattr(self, name, values.pop(name, None))
+        if values:
+            raise TypeError("unknown rule arguments: %s" % ", ".join(values))
+
+    def __getitem__(self, name: str) -> Any:
+        return getattr(self, name)
+
+    def __repr__(self) -> str:
+        return "RuleArgs(%s)" % ", ".join("%s=%r" % (name, getattr(self, name))
+                                          for name in self.__slots__ if getattr(self, name) is not None)
+
+
+# Specialized versions of the condition functions above, built once per rule
+# with the arguments bound: same result for every memory, with the checks
+# reordered cheapest first (state, remote node and fidelity before the index
+# membership) and the membership tested on the bare range or set.
+
+def _eg_condition(args: RuleArgs):
+    members = args.memory_indices.members
+
+    def condition(memory_info, manager, _args):
+        if memory_info.state == "RAW" and memory_info.index in members:
+            return [memory_info]
+        return []
+    return condition
+
+
+def _ep_condition1(args: RuleArgs):
+    members = args.memory_indices.members
+    fidelity = args.reservation.fidelity
+    policy = _pairing(args.reservation)
+
+    def condition(memory_info, manager, _args):
+        if (memory_info.state == "ENTANGLED"
+                and memory_info.fidelity < fidelity
+                and memory_info.index in members):
+            info = _purification_partner(manager, memory_info, members, fidelity, policy)
+            if info is not None:
+                assert memory_info.remote_memo != info.remote_memo
+                return [memory_info, info]
+        return []
+    return condition
+
+
+def _ep_condition2(args: RuleArgs):
+    members = args.memory_indices.members
+    fidelity = args.fidelity
+
+    def condition(memory_info, manager, _args):
+        if (memory_info.state == "ENTANGLED"
+                and memory_info.fidelity < fidelity
+                and memory_info.index in members):
+            return [memory_info]
+        return []
+    return condition
+
+
+def _es_conditionB1(args: RuleArgs):
+    members = args.memory_indices.members
+    target_remote = args.target_remote
+    fidelity = args.fidelity
+
+    def condition(memory_info, manager, _args):
+        if (memory_info.state == "ENTANGLED"
+                and memory_info.remote_node != target_remote
+                and memory_info.fidelity >= fidelity
+                and memory_info.index in members):
+            return [memory_info]
+        return []
+    return condition
+
+
+def _es_conditionA(args: RuleArgs):
+    members = args.memory_indices.members
+    left = args.left
+    right = args.right
+    fidelity = args.fidelity
+
+    def condition(memory_info, manager, _args):
+        if memory_info.state != "ENTANGLED" or memory_info.fidelity < fidelity:
+            return []
+        remote_node = memory_info.remote_node
+        if remote_node == left:
+            partner_node = right
+        elif remote_node == right:
+            partner_node = left
+        else:
+            return []
+        if memory_info.index not in members:
+            return []
+        for info in _entangled_with(manager, partner_node):
+            if info.fidelity >= fidelity and info.index in members:
+                return [memory_info, info]
+        return []
+    return condition
+
+
+def _es_conditionB2(args: RuleArgs):
+    members = args.memory_indices.members
+    ends = (args.left, args.right)
+    fidelity = args.fidelity
+
+    def condition(memory_info, manager, _args):
+        if (memory_info.state == "ENTANGLED"
+                and memory_info.remote_node not in ends
+                and memory_info.fidelity >= fidelity
+                and memory_info.index in members):
+            return [memory_info]
+        return []
+    return condition
+
+
+_SPECIALIZED = {eg_rule_condition: _eg_condition,
+                ep_rule_condition1: _ep_condition1,
+                ep_rule_condition2: _ep_condition2,
+                es_rule_conditionB1: _es_conditionB1,
+                es_rule_conditionA: _es_conditionA,
+                es_rule_conditionB2: _es_conditionB2}
+
+
+def _rule(priority: int, action, condition, action_args: Arguments, condition_args: Arguments) -> Rule:
+    """Build a rule with slotted arguments and its condition specialized
+
+    The rule also declares the memories it watches (`memory_indices`), for
+    `sweep.rule_index`: every condition here requires one of them.
+    """
+    action_args = RuleArgs(**action_args)
+    condition_args = RuleArgs(**condition_args)
+    specialize = _SPECIALIZED.get(condition)
+    if specialize is not None:
+        condition = specialize(condition_args)
+    rule = Rule(priority, action, condition, action_args, condition_args)
+    rule.memory_indices = condition_args.memory_indices
+    return rule
+
+
 def create_rules(self, path: List[str], reservation: "Reservation") -> List["Rule"]:
     """Method to create rules for a successful request.
 
@@ -291,12 +575,11 @@ def create_rules(self, path: List[str], reservation: "Reservation") -> List["Rul
     Returns:
         List[Rule]: list of rules created by the method.
     """
-    #print(reservation.link_capacity)
-    #print(reservation.swapping_order)
     rules = []
     memory_indices = []
     for card in self.timecards:
         memory_indices.append(card.memory_index)
+    memory_indices = MemoryIndices(memory_indices)
 
     # create rules for entanglement generation
     index = path.index(self.own.name)
@@ -304,9 +587,8 @@ def create_rules(self, path: List[str], reservation: "Reservation") -> List["Rul
         condition_args = {"memory_indices": memory_indices[:reservation.link_capacity[index-1]]}
         action_args = {"mid": self.own.map_to_middle_node[path[index - 1]],
                         "path": path, "index": index}
-        rule = Rule(10, eg_rule_action1, eg_rule_condition, action_args, condition_args)
+        rule = _rule(10, eg_rule_action1, eg_rule_condition, action_args, condition_args)
         rules.append(rule)
-        #print("condition args: <--",condition_args)
     if index < len(path) - 1:
         if index == 0:
             condition_args = {"memory_indices": memory_indices[:reservation.link_capacity[index]]}
@@ -317,7 +599,7 @@ def create_rules(self, path: List[str], reservation: "Reservation") -> List["Rul
         action_args = {"mid": self.own.map_to_middle_node[path[index + 1]],
                         "path": path, "index": index, "name": self.own.name,
                         "reservation": reservation}
-        rule = Rule(10, eg_rule_action2, eg_rule_condition, action_args, condition_args)
+        rule = _rule(10, eg_rule_action2, eg_rule_condition, action_args, condition_args)
         rules.append(rule)
 
     # create rules for entanglement purification
@@ -325,8 +607,8 @@ def create_rules(self, path: List[str], reservation: "Reservation") -> List["Rul
         condition_args = {"memory_indices":
                                 memory_indices[:reservation.link_capacity[index-1]],
                             "reservation": reservation}
-        action_args = {}
-        rule = Rule(10, ep_rule_action1, ep_rule_condition1, action_args, condition_args)
+        action_args = {"reservation": reservation}
+        rule = _rule(10, ep_rule_action1, ep_rule_condition1, action_args, condition_args)
         rules.append(rule)
 
     if index < len(path) - 1:
@@ -337,8 +619,8 @@ def create_rules(self, path: List[str], reservation: "Reservation") -> List["Rul
             condition_args = {"memory_indices": memory_indices[reservation.link_capacity[index-1]:reservation.link_capacity[index-1]+reservation.link_capacity[index]],
                                 "fidelity": reservation.fidelity}
 
-        action_args = {}
-        rule = Rule(10, ep_rule_action2, ep_rule_condition2, action_args, condition_args)
+        action_args = {"reservation": reservation}
+        rule = _rule(10, ep_rule_action2, ep_rule_condition2, action_args, condition_args)
         rules.append(rule)
 
     # create rules for entanglement swapping
@@ -347,7 +629,7 @@ def create_rules(self, path: List[str], reservation: "Reservation") -> List["Rul
                             "target_remote": path[-1],
                             "fidelity": reservation.fidelity}
         action_args = {}
-        rule = Rule(10, es_rule_actionB, es_rule_conditionB1, action_args, condition_args)
+        rule = _rule(10, es_rule_actionB, es_rule_conditionB1, action_args, condition_args)
         rules.append(rule)
 
     elif index == len(path) - 1:
@@ -355,7 +637,7 @@ def create_rules(self, path: List[str], reservation: "Reservation") -> List["Rul
         condition_args = {"memory_indices": memory_indices,
                             "target_remote": path[0],
                             "fidelity": reservation.fidelity}
-        rule = Rule(10, es_rule_actionB, es_rule_conditionB1, action_args, condition_args)
+        rule = _rule(10, es_rule_actionB, es_rule_conditionB1, action_args, condition_args)
         rules.append(rule)
 
     else:
@@ -388,11 +670,11 @@ def create_rules(self, path: List[str], reservation: "Reservation") -> List["Rul
                             "fidelity": reservation.fidelity}
         action_args = {"es_succ_prob": self.es_succ_prob,
                         "es_degradation": self.es_degradation}
-        rule = Rule(10, es_rule_actionA, es_rule_conditionA, action_args, condition_args)
+        rule = _rule(10, es_rule_actionA, es_rule_conditionA, action_args, condition_args)
         rules.append(rule)
 
         action_args = {}
-        rule = Rule(10, es_rule_actionB, es_rule_conditionB2, action_args, condition_args)
+        rule = _rule(10, es_rule_actionB, es_rule_conditionB2, action_args, condition_args)
         rules.append(rule)
 
     for rule in rules:
@@ -420,17 +702,16 @@ def create_rules_es_right_to_left(self, path: List[str], reservation: "Reservati
         memory_indices.append(card.memory_index)
         """if reservation in card.reservations:
             memory_indices.append(card.memory_index)"""
+    memory_indices = MemoryIndices(memory_indices)
 
     # create rules for entanglement generation
     index = path.index(self.own.name)
-    #print(memory_indices)
     if index > 0:
         condition_args = {"memory_indices": memory_indices[:MAP[index]]}
         action_args = {"mid": self.own.map_to_middle_node[path[index - 1]],
                         "path": path, "index": index}
-        rule = Rule(10, eg_rule_action1, eg_rule_condition, action_args, condition_args)
+        rule = _rule(10, eg_rule_action1, eg_rule_condition, action_args, condition_args)
         rules.append(rule)
-        #print("condition args: <--",condition_args)
     if index < len(path) - 1:
         if index == 0:
             condition_args = {"memory_indices": memory_indices[:MAP[index]]}
@@ -441,16 +722,15 @@ def create_rules_es_right_to_left(self, path: List[str], reservation: "Reservati
         action_args = {"mid": self.own.map_to_middle_node[path[index + 1]],
                         "path": path, "index": index, "name": self.own.name,
                         "reservation": reservation}
-        rule = Rule(10, eg_rule_action2, eg_rule_condition, action_args, condition_args)
+        rule = _rule(10, eg_rule_action2, eg_rule_condition, action_args, condition_args)
         rules.append(rule)
-        #print("condition args -->: ",condition_args)
     # create rules for entanglement purification
     if index > 0:
         condition_args = {"memory_indices":
                                 memory_indices[:MAP[index]],
                             "reservation": reservation}
-        action_args = {}
-        rule = Rule(10, ep_rule_action1, ep_rule_condition1, action_args, condition_args)
+        action_args = {"reservation": reservation}
+        rule = _rule(10, ep_rule_action1, ep_rule_condition1, action_args, condition_args)
         rules.append(rule)
 
     if index < len(path) - 1:
@@ -461,8 +741,8 @@ def create_rules_es_right_to_left(self, path: List[str], reservation: "Reservati
             condition_args = {"memory_indices": memory_indices[MAP[index]:],
                                 "fidelity": reservation.fidelity}
 
-        action_args = {}
-        rule = Rule(10, ep_rule_action2, ep_rule_condition2, action_args, condition_args)
+        action_args = {"reservation": reservation}
+        rule = _rule(10, ep_rule_action2, ep_rule_condition2, action_args, condition_args)
         rules.append(rule)
 
     # create rules for entanglement swapping
@@ -471,7 +751,7 @@ def create_rules_es_right_to_left(self, path: List[str], reservation: "Reservati
                             "target_remote": path[-1],
                             "fidelity": reservation.fidelity}
         action_args = {}
-        rule = Rule(10, es_rule_actionB, es_rule_conditionB1, action_args, condition_args)
+        rule = _rule(10, es_rule_actionB, es_rule_conditionB1, action_args, condition_args)
         rules.append(rule)
 
     elif index == len(path) - 1:
@@ -479,7 +759,7 @@ def create_rules_es_right_to_left(self, path: List[str], reservation: "Reservati
         condition_args = {"memory_indices": memory_indices,
                             "target_remote": path[0],
                             "fidelity": reservation.fidelity}
-        rule = Rule(10, es_rule_actionB, es_rule_conditionB1, action_args, condition_args)
+        rule = _rule(10, es_rule_actionB, es_rule_conditionB1, action_args, condition_args)
         rules.append(rule)
 
     else:
@@ -499,11 +779,11 @@ def create_rules_es_right_to_left(self, path: List[str], reservation: "Reservati
                             "fidelity": reservation.fidelity}
         action_args = {"es_succ_prob": self.es_succ_prob,
                         "es_degradation": self.es_degradation}
-        rule = Rule(10, es_rule_actionA, es_rule_conditionA, action_args, condition_args)
+        rule = _rule(10, es_rule_actionA, es_rule_conditionA, action_args, condition_args)
         rules.append(rule)
 
         action_args = {}
-        rule = Rule(10, es_rule_actionB, es_rule_conditionB2, action_args, condition_args)
+        rule = _rule(10, es_rule_actionB, es_rule_conditionB2, action_args, condition_args)
         rules.append(rule)
 
     for rule in rules:
@@ -529,6 +809,7 @@ def create_rules_es_right_to_left1(self, path: List[str], reservation: "Reservat
     for card in self.timecards:
         if reservation in card.reservations:
             memory_indices.append(card.memory_index)
+    memory_indices = MemoryIndices(memory_indices)
 
     # create rules for entanglement generation
     index = path.index(self.own.name)
@@ -536,7 +817,7 @@ def create_rules_es_right_to_left1(self, path: List[str], reservation: "Reservat
         condition_args = {"memory_indices": memory_indices[:reservation.memory_size]}
         action_args = {"mid": self.own.map_to_middle_node[path[index - 1]],
                         "path": path, "index": index}
-        rule = Rule(10, eg_rule_action1, eg_rule_condition, action_args, condition_args)
+        rule = _rule(10, eg_rule_action1, eg_rule_condition, action_args, condition_args)
         rules.append(rule)
 
     if index < len(path) - 1:
@@ -549,7 +830,7 @@ def create_rules_es_right_to_left1(self, path: List[str], reservation: "Reservat
         action_args = {"mid": self.own.map_to_middle_node[path[index + 1]],
                         "path": path, "index": index, "name": self.own.name,
                         "reservation": reservation}
-        rule = Rule(10, eg_rule_action2, eg_rule_condition, action_args, condition_args)
+        rule = _rule(10, eg_rule_action2, eg_rule_condition, action_args, condition_args)
         rules.append(rule)
 
     # create rules for entanglement purification
@@ -557,8 +838,8 @@ def create_rules_es_right_to_left1(self, path: List[str], reservation: "Reservat
         condition_args = {"memory_indices":
                                 memory_indices[:reservation.memory_size],
                             "reservation": reservation}
-        action_args = {}
-        rule = Rule(10, ep_rule_action1, ep_rule_condition1, action_args, condition_args)
+        action_args = {"reservation": reservation}
+        rule = _rule(10, ep_rule_action1, ep_rule_condition1, action_args, condition_args)
         rules.append(rule)
 
     if index < len(path) - 1:
@@ -569,8 +850,8 @@ def create_rules_es_right_to_left1(self, path: List[str], reservation: "Reservat
             condition_args = {"memory_indices": memory_indices[reservation.memory_size:],
                                 "fidelity": reservation.fidelity}
 
-        action_args = {}
-        rule = Rule(10, ep_rule_action2, ep_rule_condition2, action_args, condition_args)
+        action_args = {"reservation": reservation}
+        rule = _rule(10, ep_rule_action2, ep_rule_condition2, action_args, condition_args)
         rules.append(rule)
 
     # create rules for entanglement swapping
@@ -579,7 +860,7 @@ def create_rules_es_right_to_left1(self, path: List[str], reservation: "Reservat
                             "target_remote": path[-1],
                             "fidelity": reservation.fidelity}
         action_args = {}
-        rule = Rule(10, es_rule_actionB, es_rule_conditionB1, action_args, condition_args)
+        rule = _rule(10, es_rule_actionB, es_rule_conditionB1, action_args, condition_args)
         rules.append(rule)
 
     elif index == len(path) - 1:
@@ -587,7 +868,7 @@ def create_rules_es_right_to_left1(self, path: List[str], reservation: "Reservat
         condition_args = {"memory_indices": memory_indices,
                             "target_remote": path[0],
                             "fidelity": reservation.fidelity}
-        rule = Rule(10, es_rule_actionB, es_rule_conditionB1, action_args, condition_args)
+        rule = _rule(10, es_rule_actionB, es_rule_conditionB1, action_args, condition_args)
         rules.append(rule)
 
     else:
@@ -607,11 +888,11 @@ def create_rules_es_right_to_left1(self, path: List[str], reservation: "Reservat
                             "fidelity": reservation.fidelity}
         action_args = {"es_succ_prob": self.es_succ_prob,
                         "es_degradation": self.es_degradation}
-        rule = Rule(10, es_rule_actionA, es_rule_conditionA, action_args, condition_args)
+        rule = _rule(10, es_rule_actionA, es_rule_conditionA, action_args, condition_args)
         rules.append(rule)
 
         action_args = {}
-        rule = Rule(10, es_rule_actionB, es_rule_conditionB2, action_args, condition_args)
+        rule = _rule(10, es_rule_actionB, es_rule_conditionB2, action_args, condition_args)
         rules.append(rule)
 
     for rule in rules:
@@ -637,17 +918,16 @@ def create_rules_es_left_to_right(self, path: List[str], reservation: "Reservati
         memory_indices.append(card.memory_index)
         """if reservation in card.reservations:
             memory_indices.append(card.memory_index)"""
+    memory_indices = MemoryIndices(memory_indices)
 
     # create rules for entanglement generation
     index = path.index(self.own.name)
-    #print(memory_indices)
     if index > 0:
         condition_args = {"memory_indices": memory_indices[:MAP[index]]}
         action_args = {"mid": self.own.map_to_middle_node[path[index - 1]],
                         "path": path, "index": index}
-        rule = Rule(10, eg_rule_action1, eg_rule_condition, action_args, condition_args)
+        rule = _rule(10, eg_rule_action1, eg_rule_condition, action_args, condition_args)
         rules.append(rule)
-        #print("condition args: <--",condition_args)
     if index < len(path) - 1:
         if index == 0:
             condition_args = {"memory_indices": memory_indices[:MAP[index]]}
@@ -658,16 +938,15 @@ def create_rules_es_left_to_right(self, path: List[str], reservation: "Reservati
         action_args = {"mid": self.own.map_to_middle_node[path[index + 1]],
                         "path": path, "index": index, "name": self.own.name,
                         "reservation": reservation}
-        rule = Rule(10, eg_rule_action2, eg_rule_condition, action_args, condition_args)
+        rule = _rule(10, eg_rule_action2, eg_rule_condition, action_args, condition_args)
         rules.append(rule)
-        #print("condition args -->: ",condition_args)
     # create rules for entanglement purification
     if index > 0:
         condition_args = {"memory_indices":
                                 memory_indices[:MAP[index]],
                             "reservation": reservation}
-        action_args = {}
-        rule = Rule(10, ep_rule_action1, ep_rule_condition1, action_args, condition_args)
+        action_args = {"reservation": reservation}
+        rule = _rule(10, ep_rule_action1, ep_rule_condition1, action_args, condition_args)
         rules.append(rule)
 
     if index < len(path) - 1:
@@ -678,8 +957,8 @@ def create_rules_es_left_to_right(self, path: List[str], reservation: "Reservati
             condition_args = {"memory_indices": memory_indices[MAP[index]:],
                                 "fidelity": reservation.fidelity}
 
-        action_args = {}
-        rule = Rule(10, ep_rule_action2, ep_rule_condition2, action_args, condition_args)
+        action_args = {"reservation": reservation}
+        rule = _rule(10, ep_rule_action2, ep_rule_condition2, action_args, condition_args)
         rules.append(rule)
 
     # create rules for entanglement swapping
@@ -688,7 +967,7 @@ def create_rules_es_left_to_right(self, path: List[str], reservation: "Reservati
                             "target_remote": path[-1],
                             "fidelity": reservation.fidelity}
         action_args = {}
-        rule = Rule(10, es_rule_actionB, es_rule_conditionB1, action_args, condition_args)
+        rule = _rule(10, es_rule_actionB, es_rule_conditionB1, action_args, condition_args)
         rules.append(rule)
 
     elif index == len(path) - 1:
@@ -696,7 +975,7 @@ def create_rules_es_left_to_right(self, path: List[str], reservation: "Reservati
         condition_args = {"memory_indices": memory_indices,
                             "target_remote": path[0],
                             "fidelity": reservation.fidelity}
-        rule = Rule(10, es_rule_actionB, es_rule_conditionB1, action_args, condition_args)
+        rule = _rule(10, es_rule_actionB, es_rule_conditionB1, action_args, condition_args)
         rules.append(rule)
 
     else:
@@ -716,11 +995,11 @@ def create_rules_es_left_to_right(self, path: List[str], reservation: "Reservati
                             "fidelity": reservation.fidelity}
         action_args = {"es_succ_prob": self.es_succ_prob,
                         "es_degradation": self.es_degradation}
-        rule = Rule(10, es_rule_actionA, es_rule_conditionA, action_args, condition_args)
+        rule = _rule(10, es_rule_actionA, es_rule_conditionA, action_args, condition_args)
         rules.append(rule)
 
         action_args = {}
-        rule = Rule(10, es_rule_actionB, es_rule_conditionB2, action_args, condition_args)
+        rule = _rule(10, es_rule_actionB, es_rule_conditionB2, action_args, condition_args)
         rules.append(rule)
 
     for rule in rules:
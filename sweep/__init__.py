@@ -0,0 +1,11 @@
+"""Helpers for running ``simulate()`` parameter sweeps.
+
+The package API is `sweep.simulation.Simulation` (apps, parameters and the
+``simulate`` variants) and `sweep.experiment.run_experiment`; ``python -m sweep``
+is the command line front end. Importing the package itself stays cheap:
+SeQUeNCe is only loaded by the modules that run simulations.
+"""
+
+from .cache import ResultCache
+from .checkpoint import SweepCheckpoint
+from .executor import run_sweep
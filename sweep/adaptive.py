@@ -0,0 +1,87 @@
+import os
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from .executor import run_sweep
+
+if TYPE_CHECKING:
+    from .checkpoint import SweepCheckpoint
+    from .cost_model import CostModel
+    from .distributed import Coordinator
+
+
+def _relative_change(a: float, b: float) -> float:
+    scale = max(abs(a), abs(b))
+    return abs(a - b) / scale if scale > 0 else 0.0
+
+
+def adaptive_sweep(func: Callable, make_point: Callable[[float], Tuple], start: float, stop: float,
+                   coarse_step: float, min_step: float, tolerance: float = 0.5, floor: float = 0.0,
+                   workers: Optional[int] = None, checkpoint: "SweepCheckpoint" = None,
+                   cost_model: "CostModel" = None, warm_start: bool = False,
+                   coordinator: "Coordinator" = None) -> List[Tuple[float, float]]:
+    """Sweep distance adaptively instead of on a fixed grid.
+
+    1. Coarse pass: distances ``start, start + coarse_step, ...`` are run outward
+       in batches of `workers` points. Once a rate is at or below `floor` (e.g. 0)
+       no further distances are scheduled; the rest of the curve is flat.
+    2. Refinement: wherever two neighbouring rates differ by more than
+       `tolerance` (relative to the larger one) and the gap is wider than
+       `min_step`, the midpoint is added. All midpoints of a round run in
+       parallel, and rounds repeat until the curve is resolved.
+
+    Midpoints are snapped to the ``start + k * min_step`` grid, so results stay
+    comparable (and checkpoint/cache keys reusable) across sweeps.
+
+    Args:
+        func (Callable): run function, e.g. `simulate`, returning a rate.
+        make_point (Callable[[float], Tuple]): maps a distance to the argument
+            tuple of `func`; only called in this process.
+        start (float): first distance.
+        stop (float): last distance of the coarse grid.
+        coarse_step (float): spacing of the coarse grid.
+        min_step (float): finest spacing the refinement may reach.
+        tolerance (float): relative rate change between neighbours that triggers refinement.
+        floor (float): rate at or below which the coarse pass stops going further out.
+        workers (int): maximum number of worker processes (see `run_sweep`).
+        checkpoint (SweepCheckpoint): optional checkpoint of the runs.
+        cost_model (CostModel): optional cost model to schedule the runs (see `run_sweep`).
+        warm_start (bool): fork the runs from this process (see `run_sweep`).
+        coordinator (Coordinator): serve the runs to remote workers (see `run_sweep`).
+
+    Returns:
+        List[Tuple[float, float]]: ``(distance, rate)`` pairs sorted by distance.
+    """
+    rates: Dict[float, float] = {}
+
+    def run(distances: List[float]) -> None:
+        results = run_sweep(func, [make_point(d) for d in distances], workers=workers, checkpoint=checkpoint,
+                            cost_model=cost_model, warm_start=warm_start, coordinator=coordinator)
+        rates.update(zip(distances, results))
+
+    # coarse pass with early cutoff
+    coarse = []
+    d = start
+    while d <= stop:
+        coarse.append(d)
+        d += coarse_step
+    batch = workers or os.cpu_count() or 1
+    for i in range(0, len(coarse), batch):
+        run(coarse[i:i + batch])
+        if min(rates[d] for d in coarse[i:i + batch]) <= floor:
+            break
+
+    # refinement where the curve changes faster than the tolerance
+    while True:
+        known = sorted(rates)
+        midpoints = []
+        for left, right in zip(known, known[1:]):
+            if right - left <= min_step or _relative_change(rates[left], rates[right]) <= tolerance:
+                continue
+            mid = start + round(((left + right) / 2 - start) / min_step) * min_step
+            if left < mid < right and mid not in rates:
+                midpoints.append(mid)
+        if not midpoints:
+            break
+        run(midpoints)
+
+    return sorted(rates.items())
@@ -0,0 +1,173 @@
+from typing import TYPE_CHECKING, Dict, List
+
+from sequence.kernel.event import Event
+from sequence.kernel.process import Process
+
+if TYPE_CHECKING:
+    from sequence.network_management.reservation import Reservation
+    from sequence.resource_management.memory_manager import MemoryInfo
+    from sequence.topology.node import QuantumRouter
+
+
+def print_node_info(node: "QuantumRouter") -> None:
+    """Print the state of every memory of `node`."""
+    print(node.name, " Memories")
+    print("Index:\tEntangled Node:\tFidelity:\tEntanglement Time:")
+    for i, info in enumerate(node.resource_manager.memory_manager):
+        print("{:6}\t{:15}\t{:9}\t{}".format(str(i), str(info.remote_node),
+                                             str(info.fidelity),
+                                             str(info.entangle_time * 1e-12)))
+
+
+class RequestApp:
+    """Application on the initiating node: requests end-to-end entanglement and counts it.
+
+    `start` reserves `memory_size` memories towards `other` for the window
+    ``[now + 1 s, now + 1.5 s]``. Every memory that gets entangled with `other`
+    is counted and released back to the resource manager, so the throughput is
+    the number of entangled pairs per second of reservation window.
+
+    Attributes:
+        node (QuantumRouter): node the app runs on.
+        other (str): name of the remote node.
+        memory_size (int): memories to reserve.
+        target_fidelity (float): fidelity requested for the reservation.
+        eg_counter (int): entangled pairs received from `other`.
+        reserve_res (bool): result of the reservation request.
+        memory_counter (int): qualified pairs of the responder side of a reservation.
+        path (List[str]): path of the approved reservation initiated by this node.
+        memo_to_reserve (Dict[int, Reservation]): memory index to its active reservation.
+        start_time (int): start of the reservation window (ps), set by `start`.
+        end_time (int): end of the reservation window (ps), set by `start`.
+    """
+
+    def __init__(self, node: "QuantumRouter", other: str, memory_size=1, target_fidelity=0.9):
+        self.node = node
+        self.node.set_app(self)
+        self.other = other
+        self.memory_size = memory_size
+        self.target_fidelity = target_fidelity
+        self.eg_counter = 0
+        self.reserve_res: bool = None
+        self.memory_counter: int = 0
+        self.path: List[str] = []
+        self.memo_to_reserve: Dict[int, "Reservation"] = {}
+
+    def start(self):
+        now = self.node.timeline.now()
+        self.start_time = now + 1e12
+        self.end_time = now + 1.5e12
+        nm = self.node.network_manager
+        nm.request(self.other, start_time=self.start_time, end_time=self.end_time,
+                   memory_size=self.memory_size,
+                   target_fidelity=self.target_fidelity)
+
+    def get_reserve_res(self, reservation: "Reservation", result: bool) -> None:
+        """Method to receive reservation result from network manager.
+
+        Args:
+            reservation (Reservation): reservation that has been completed.
+            result (bool): result of the request (approved/rejected).
+
+        Side Effects:
+            May schedule a start/retry event based on reservation result.
+        """
+        self.reserve_res = result
+        if result:
+            self.schedule_reservation(reservation)
+
+    def add_memo_reserve_map(self, index: int, reservation: "Reservation") -> None:
+        self.memo_to_reserve[index] = reservation
+
+    def remove_memo_reserve_map(self, index: int) -> None:
+        self.memo_to_reserve.pop(index)
+
+    def get_memory(self, info: "MemoryInfo") -> None:
+        """Method to receive entangled memories.
+
+        Will check if the received memory is qualified.
+        If it's a qualified memory, the application sets memory to RAW state
+        and release back to resource manager.
+        The counter of entanglement memories, 'memory_counter', is added.
+        Otherwise, the application does not modify the state of memory and
+        release back to the resource manager.
+
+        Args:
+            info (MemoryInfo): info on the qualified entangled memory.
+        """
+        if info.state == "ENTANGLED" and info.remote_node == self.other:
+            self.node.resource_manager.update(None, info.memory, "RAW")
+            self.eg_counter += 1
+
+        if info.state != "ENTANGLED":
+            return
+
+        if info.index in self.memo_to_reserve:
+            reservation = self.memo_to_reserve[info.index]
+            if info.remote_node == reservation.initiator and info.fidelity >= reservation.fidelity:
+                self.node.resource_manager.update(None, info.memory, "RAW")
+            elif info.remote_node == reservation.responder and info.fidelity >= reservation.fidelity:
+                self.memory_counter += 1
+                self.node.resource_manager.update(None, info.memory, "RAW")
+
+    def get_other_reservation(self, reservation: "Reservation") -> None:
+        """Method to add the approved reservation that is requested by other
+        nodes
+
+        Args:
+            reservation (Reservation): reservation that uses the node of application as the responder
+
+        Side Effects:
+            Will add calls to `add_memo_reserve_map` and `remove_memo_reserve_map` methods.
+        """
+        self.schedule_reservation(reservation)
+
+    def schedule_reservation(self, reservation: "Reservation") -> None:
+        if reservation.initiator == self.node.name:
+            self.path = reservation.path
+        for card in self.node.network_manager.protocol_stack[1].timecards:
+            if reservation in card.reservations:
+                process = Process(self, "add_memo_reserve_map", [card.memory_index, reservation])
+                event = Event(reservation.start_time, process)
+                self.node.timeline.schedule(event)
+                process = Process(self, "remove_memo_reserve_map", [card.memory_index])
+                event = Event(reservation.end_time, process)
+                self.node.timeline.schedule(event)
+
+    def get_throughput(self) -> float:
+        return self.eg_counter / (self.end_time - self.start_time) * 1e12
+
+
+class ResetApp:
+    """Application on the responding node: releases the memories entangled with the initiator.
+
+    Attributes:
+        node (QuantumRouter): node the app runs on.
+        other_node_name (str): name of the initiating node.
+        target_fidelity (float): minimum fidelity of a released memory.
+    """
+
+    def __init__(self, node, other_node_name, target_fidelity=0.9):
+        self.node = node
+        self.node.set_app(self)
+        self.other_node_name = other_node_name
+        self.target_fidelity = target_fidelity
+
+    def get_other_reservation(self, reservation):
+        """called when receiving the request from the initiating node.
+
+        For this application, we do not need to do anything.
+        """
+
+        pass
+
+    def get_memory(self, info):
+        """Similar to the get_memory method of the main application.
+
+        We check if the memory info meets the request first,
+        by noting the remote entangled memory and entanglement fidelity.
+        We then free the memory for future use.
+        """
+        if (info.state == "ENTANGLED" and info.remote_node == self.other_node_name
+                and info.fidelity > self.target_fidelity):
+            self.node.resource_manager.update(None, info.memory, "RAW")
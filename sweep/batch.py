@@ -0,0 +1,213 @@
+import copy
+import re
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sequence.kernel.eventlist import EventList
+from sequence.topology.node import Node
+from sequence.topology.router_net_topo import RouterNetTopo
+from sequence.topology.topology import Topology as Topo
+
+from .topology import ConfigRouterNetTopo
+
+if TYPE_CHECKING:
+    from sequence.kernel.event import Event
+
+# scenario index in an entity name: "s3.r1", "s3.r1.MemoryArray[0]", "BSM.s3.r1.s3.r2.auto", "QC.s3.r1..."
+_SCENARIO_NAME = re.compile(r"(?:^|\.)s(\d+)\.")
+
+
+def scenario_prefix(index: int) -> str:
+    """Name prefix of the nodes of scenario `index` in a batched network."""
+    return "s%d." % index
+
+
+def _prefixed(config: dict, prefix: str) -> dict:
+    config = copy.deepcopy(config)
+    for node in config[Topo.ALL_NODE]:
+        node[Topo.NAME] = prefix + node[Topo.NAME]
+        if node.get(Topo.TEMPLATE) is not None:
+            node[Topo.TEMPLATE] = prefix + node[Topo.TEMPLATE]
+    for connection in config.get(Topo.ALL_QC_CONNECT, []) + config.get(Topo.ALL_CC_CONNECT, []):
+        connection[Topo.CONNECT_NODE_1] = prefix + connection[Topo.CONNECT_NODE_1]
+        connection[Topo.CONNECT_NODE_2] = prefix + connection[Topo.CONNECT_NODE_2]
+        if connection.get(Topo.TEMPLATE) is not None:
+            connection[Topo.TEMPLATE] = prefix + connection[Topo.TEMPLATE]
+    for channel in config.get(Topo.ALL_Q_CHANNEL, []) + config.get(Topo.ALL_C_CHANNEL, []):
+        channel[Topo.SRC] = prefix + channel[Topo.SRC]
+        channel[Topo.DST] = prefix + channel[Topo.DST]
+        if Topo.NAME in channel:
+            channel[Topo.NAME] = prefix + channel[Topo.NAME]
+    config[Topo.ALL_TEMPLATES] = {prefix + name: template
+                                  for name, template in config.get(Topo.ALL_TEMPLATES, {}).items()}
+    return config
+
+
+def merge_configs(configs: Sequence[dict]) -> dict:
+    """Combine several network configs into one config of disjoint sub-networks.
+
+    Every name of scenario ``i`` (nodes, channels, templates) gets the prefix
+    ``scenario_prefix(i)``; seeds, distances and other values are kept as they
+    are, so each sub-network behaves exactly like its own config.
+
+    Args:
+        configs (Sequence[dict]): per-scenario configs, e.g. from `apply_overrides`.
+
+    Returns:
+        dict: the combined config (the stop time is the largest of all scenarios).
+    """
+    merged = {Topo.ALL_NODE: [], Topo.ALL_QC_CONNECT: [], Topo.ALL_CC_CONNECT: [],
+              Topo.ALL_Q_CHANNEL: [], Topo.ALL_C_CHANNEL: [], Topo.ALL_TEMPLATES: {},
+              RouterNetTopo.IS_PARALLEL: False}
+    for i, config in enumerate(configs):
+        if config.get(RouterNetTopo.IS_PARALLEL, False):
+            raise ValueError("parallel configs can't be batched")
+        config = _prefixed(config, scenario_prefix(i))
+        for section in (Topo.ALL_NODE, Topo.ALL_QC_CONNECT, Topo.ALL_CC_CONNECT,
+                        Topo.ALL_Q_CHANNEL, Topo.ALL_C_CHANNEL):
+            merged[section] += config.get(section, [])
+        merged[Topo.ALL_TEMPLATES].update(config[Topo.ALL_TEMPLATES])
+        if Topo.STOP_TIME in config:
+            merged[Topo.STOP_TIME] = max(merged.get(Topo.STOP_TIME, 0), config[Topo.STOP_TIME])
+    return merged
+
+
+class ScenarioEvents:
+    """Event list of a batched timeline: one heap per scenario.
+
+    Events with the same time and priority run in heap order, which depends
+    on everything else in the heap, so scenarios sharing one heap would
+    change each other's tie order (and rates). Here every scenario keeps its
+    own `EventList`, and sees exactly the pushes and pops of a run of its
+    own; `pop` takes the earliest head over all scenarios.
+
+    An event goes to the scenario of the event being executed, or, outside
+    of the event loop (init, app start), to the scenario selected with
+    `select`.
+
+    Attributes:
+        lists (List[EventList]): one event list per scenario.
+        current (int): scenario receiving the events pushed now.
+    """
+
+    def __init__(self, count: int):
+        self.lists = [EventList() for _ in range(count)]
+        self.current = 0
+
+    def __len__(self):
+        return sum(len(events) for events in self.lists)
+
+    def __iter__(self) -> Iterator["Event"]:
+        for events in self.lists:
+            yield from events
+
+    def select(self, index: int) -> None:
+        """Send the events pushed from now on to scenario `index`."""
+        self.current = index
+
+    def push(self, event: "Event") -> None:
+        self.lists[self.current].push(event)
+
+    def _first(self) -> Optional[int]:
+        first = None
+        for i, events in enumerate(self.lists):
+            if len(events) and (first is None or events.top() < self.lists[first].top()):
+                first = i
+        return first
+
+    def pop(self) -> "Event":
+        self.current = self._first()
+        return self.lists[self.current].pop()
+
+    def top(self) -> "Event":
+        return self.lists[self._first()].top()
+
+    def isempty(self) -> bool:
+        return len(self) == 0
+
+    def remove(self, event: "Event") -> None:
+        event.set_invalid()
+
+    def update_event_time(self, event: "Event", time: int) -> None:
+        for events in self.lists:
+            if any(e is event for e in events):
+                events.update_event_time(event, time)
+                return
+
+
+def init_batch(topology: RouterNetTopo) -> None:
+    """Replace ``timeline.init()`` for a topology from `build_batch`.
+
+    Entities are initialized in the same order, with the events each one
+    schedules sent to the event list of its own scenario.
+    """
+    timeline = topology.get_timeline()
+    for name, entity in timeline.entities.items():
+        timeline.events.select(int(_SCENARIO_NAME.search(name).group(1)))
+        entity.init()
+
+
+class Scenario:
+    """View of one sub-network of a batched topology.
+
+    Provides the part of the `RouterNetTopo` interface used to set up a run
+    (`get_timeline`, `get_nodes_by_type`), restricted to the nodes of this
+    scenario, so `set_parameters`, `RunContext.install` and the apps can be
+    applied to it as to a topology of its own.
+
+    Attributes:
+        topology (RouterNetTopo): the batched topology.
+        index (int): scenario index.
+        prefix (str): name prefix of the scenario nodes.
+        results (Dict[str, Any]): per-scenario result collector, filled by the caller.
+    """
+
+    def __init__(self, topology: RouterNetTopo, index: int):
+        self.topology = topology
+        self.index = index
+        self.prefix = scenario_prefix(index)
+        self.results: Dict[str, Any] = {}
+
+    def get_timeline(self):
+        return self.topology.get_timeline()
+
+    def select(self) -> None:
+        """Send the events scheduled from now on (e.g. by starting an app) to this scenario."""
+        self.topology.get_timeline().events.select(self.index)
+
+    def _owns(self, name: str) -> bool:
+        # generated BSM nodes are named after their routers ("BSM.<router>.<router>.auto")
+        routers = self.topology.bsm_to_router_map.get(name)
+        if routers:
+            return routers[0].startswith(self.prefix)
+        return name.startswith(self.prefix)
+
+    def get_nodes_by_type(self, type: str) -> List[Node]:
+        return [node for node in self.topology.get_nodes_by_type(type) if self._owns(node.name)]
+
+    def name(self, local_name: str) -> str:
+        """Full name in the batched network of the node called `local_name` in the scenario config."""
+        return self.prefix + local_name
+
+
+def build_batch(configs: Sequence[dict]) -> Tuple[RouterNetTopo, List[Scenario]]:
+    """Build K independent scenarios as disjoint sub-networks of one timeline.
+
+    For small networks the fixed cost of a run (timeline setup, imports,
+    process startup) dominates; batching K scenarios pays it once. The
+    scenarios only share the timeline clock: each keeps its own seeds, its
+    own event list (`ScenarioEvents`) and, once set up through its
+    `Scenario` view, its own parameters, rule strategy and apps, so it gives
+    the same result as a run of its own. Initialize the timeline with
+    `init_batch` and start each scenario's apps after `Scenario.select`.
+
+    Args:
+        configs (Sequence[dict]): per-scenario network configs.
+
+    Returns:
+        Tuple[RouterNetTopo, List[Scenario]]: the batched topology and one view per scenario.
+    """
+    topology = ConfigRouterNetTopo(merge_configs(configs))
+    timeline = topology.get_timeline()
+    assert len(timeline.events) == 0, "events scheduled while building the batch"
+    timeline.events = ScenarioEvents(len(configs))
+    return topology, [Scenario(topology, i) for i in range(len(configs))]
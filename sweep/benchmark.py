@@ -0,0 +1,154 @@
+"""Scaling benchmark of `Simulation` runs on linear chains of growing length.
+
+Every chain length runs once, in a child forked for it, on a chain generated
+by `sweep.generate.chain_config`, and reports:
+
+- ``wall_per_sim_s``: wall time per simulated second of the event loop,
+- ``events_per_s``: executed events per wall second (kernel throughput),
+- ``events``: events per run, which shows how the protocols scale,
+- ``setup_s``: build, `set_parameters` and app setup,
+- ``peak_rss_mb``: peak resident memory of the child.
+
+::
+
+    python -m sweep bench --sizes 2,4,8,16,32,64 --profile decreasing --capacity 1
+    python -m sweep bench --sizes 8,16 --profile-dir data/profiles   # cProfile stats per size
+
+With ``--profile-dir`` each run is also profiled, to see whether the time
+goes to the rule conditions or to the kernel as the chain grows.
+"""
+
+import os
+import resource
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from .context import RunContext
+from .generate import chain_config, chain_routers, link_capacities
+from .simulation import Simulation
+from .strategies import names, resolve
+from .warm import fork_map
+from .watchdog import Watchdog, _memory_usage
+
+DEFAULT_SIZES = (2, 4, 8, 16, 32, 64)
+
+
+def _peak_rss() -> int:
+    # bytes; ru_maxrss is in kB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def run_point(simulation: Simulation, size: int, profile: Union[str, Sequence[int]] = "constant",
+              capacity: int = 1, hop_distance: float = 1000, strategy: Any = None,
+              profile_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Run one chain of `size` routers in this process and measure it.
+
+    Args:
+        simulation (Simulation): run settings (stop time, budget, parameters).
+        size (int): routers in the chain, end nodes included.
+        profile (str | Sequence[int]): link capacities (see `link_capacities`).
+        capacity (int): capacity of the smallest link of a named profile.
+        hop_distance (float): length of every link (m).
+        strategy (str | Callable): swapping strategy (see `sweep.strategies`);
+            ``"custom"`` gets the link capacities and a left-to-right node order.
+        profile_dir (str): if given, the run is profiled into ``chain<size>.prof`` there.
+
+    Returns:
+        Dict[str, Any]: one benchmark row.
+    """
+    capacities = link_capacities(size - 1, profile, capacity)
+    config = chain_config(size, capacities, distance=hop_distance, stop_time=simulation.stop_time)
+    context = RunContext(create_rules=resolve(strategy), link_capacity=capacities,
+                         swapping_order=chain_routers(size)[1:-1],
+                         purification_pairing=simulation.purification_pairing)
+    rss = _memory_usage()
+
+    tick = perf_counter()
+    _, app = simulation.start_run(config, context)
+    setup = perf_counter() - tick
+    tl = app.node.timeline
+    watchdog = Watchdog(tl, **simulation.run_budget)
+    if profile_dir is not None:
+        import cProfile
+
+        os.makedirs(profile_dir, exist_ok=True)
+        profiler = cProfile.Profile()
+        profiler.runcall(watchdog.run)
+        profiler.dump_stats(os.path.join(profile_dir, "chain%d.prof" % size))
+    else:
+        watchdog.run()
+    rate, complete = simulation.measure(app, watchdog, hop_distance * (size - 1))
+
+    simulated = (tl.stop_time if complete else tl.now()) * 1e-12
+    return {"dataset": "benchmark",
+            "routers": size,
+            "profile": profile if isinstance(profile, str) else "custom",
+            "memories": sum(node["memo_size"] for node in config["nodes"]),
+            "strategy": names([strategy])[0],
+            "events": watchdog.events,
+            "setup_s": setup,
+            "run_s": watchdog.seconds,
+            "simulated_s": simulated,
+            "wall_per_sim_s": watchdog.seconds / simulated if simulated > 0 else float("nan"),
+            "events_per_s": watchdog.events / watchdog.seconds if watchdog.seconds > 0 else float("nan"),
+            "peak_rss_mb": _peak_rss() / (1 << 20),
+            "start_rss_mb": rss / (1 << 20),
+            "rate": rate,
+            "complete": complete}
+
+
+class _Point:
+    # picklable `run_point` of one benchmark, for `fork_map`
+    def __init__(self, simulation: Simulation, options: Dict[str, Any]):
+        self.simulation = simulation
+        self.options = options
+
+    def __call__(self, task):
+        try:
+            return run_point(self.simulation, task[0], **self.options)
+        except Exception as error:
+            # e.g. rules written for a fixed chain length: report it and go on with the next size
+            return {"dataset": "benchmark", "routers": task[0], "strategy": names([self.options["strategy"]])[0],
+                    "error": "%s: %s" % (type(error).__name__, error)}
+
+
+def run_benchmark(sizes: Sequence[int] = DEFAULT_SIZES, profile: Union[str, Sequence[int]] = "constant",
+                  capacity: int = 1, hop_distance: float = 1000, strategy: Any = None,
+                  simulation: Optional[Simulation] = None, profile_dir: Optional[str] = None,
+                  store=None, report=None) -> List[Dict[str, Any]]:
+    """Run the chain benchmark for every size, one forked child at a time.
+
+    Each size runs in a fresh child of this process, so its peak memory is
+    its own and a run that blows up does not take the others with it.
+    POSIX only.
+
+    Args:
+        sizes (Sequence[int]): chain lengths (routers, end nodes included).
+        profile (str | Sequence[int]): link capacity profile, a named one
+            applies to every size.
+        capacity (int): capacity of the smallest link of the profile.
+        hop_distance (float): length of every link (m).
+        strategy (str | Callable): swapping strategy (None: the SeQUeNCe rules).
+        simulation (Simulation): run settings (None: the defaults, quiet); set
+            a `run_budget` to bound the longest chains.
+        profile_dir (str): also write cProfile stats per size there.
+        store (ResultsStore): if given, the rows are appended to it.
+        report (Callable[[Dict[str, Any]], None]): called with every row as it completes.
+
+    Returns:
+        List[Dict[str, Any]]: one row per size, see `run_point`; a size whose
+        run raised gets a row with its `error` instead of the measurements.
+    """
+    if simulation is None:
+        simulation = Simulation(verbose=False)
+    point = _Point(simulation, dict(profile=profile, capacity=capacity, hop_distance=hop_distance,
+                                    strategy=strategy, profile_dir=profile_dir))
+    rows = []
+    for row in fork_map(point, [(size,) for size in sizes], workers=1):
+        if report is not None:
+            report(row)
+        rows.append(row)
+    if store is not None:
+        store.append(rows)
+    return rows
@@ -0,0 +1,102 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sequence.kernel.event import Event
+from sequence.kernel.process import Process
+
+from .warm import fork_map
+
+
+def swap_rules(timeline, create_rules: Optional[Callable] = None) -> int:
+    """Regenerate the rules of approved reservations with another `create_rules`.
+
+    Rules are created when a reservation is approved, long before they are
+    loaded at the reservation start time. This finds every rule whose
+    ``load`` event is still pending, creates the rules again for its node and
+    reservation, and puts the new rules into the pending ``load`` and
+    ``expire`` events of the old ones, in the order the old rules were
+    scheduled (`load_order`, set by `RunContext`). The events keep their
+    time, priority and place in the event heap, so ties with other events
+    are broken as in a run that created the new rules in the first place,
+    and the branch gives the same result as that run. Call it between
+    approval and the reservation start.
+
+    If the new strategy creates more rules than the old one, the extra ones
+    get new events; if fewer, the extra old events are removed. Their ties
+    can then differ from a full run.
+
+    Args:
+        timeline (Timeline): timeline paused before the reservation start.
+        create_rules (Callable): unbound `create_rules` implementation, called
+            as ``create_rules(rsvp, path, reservation)``. If None, the node's
+            own ``rsvp.create_rules`` is used, e.g. after installing a new
+            `RunContext` on the topology.
+
+    Returns:
+        int: number of (node, reservation) rule sets regenerated.
+    """
+    groups: Dict[Tuple[int, int], list] = {}
+    expire_events: Dict[int, Event] = {}
+    for event in timeline.events:
+        process = event.process
+        if event.is_invalid() or process.activation not in ("load", "expire"):
+            continue
+        rule = process.act_params[0]
+        if process.activation == "expire":
+            expire_events[id(rule)] = event
+            continue
+        key = (id(process.owner), id(rule.reservation))
+        groups.setdefault(key, [process.owner, rule.reservation, []])[2].append(event)
+
+    for resource_manager, reservation, load_events in groups.values():
+        rsvp = resource_manager.owner.network_manager.protocol_stack[1]
+        if create_rules is None:
+            rules = rsvp.create_rules(reservation.path, reservation)
+        else:
+            rules = create_rules(rsvp, reservation.path, reservation)
+        load_events.sort(key=lambda event: getattr(event.process.act_params[0], "load_order", 0))
+
+        for i, event in enumerate(load_events):
+            expire = expire_events.get(id(event.process.act_params[0]))
+            if i >= len(rules):
+                timeline.remove_event(event)
+                if expire is not None:
+                    timeline.remove_event(expire)
+                continue
+            rules[i].load_order = i
+            event.process = Process(resource_manager, "load", [rules[i]])
+            if expire is not None:
+                expire.process = Process(resource_manager, "expire", [rules[i]])
+        for i, rule in enumerate(rules[len(load_events):], len(load_events)):
+            rule.load_order = i
+            process = Process(resource_manager, "load", [rule])
+            timeline.schedule(Event(reservation.start_time, process))
+            process = Process(resource_manager, "expire", [rule])
+            timeline.schedule(Event(reservation.end_time, process, 0))
+    return len(groups)
+
+
+def run_branches(branch: Callable[[Any], Any], options: Sequence[Any], workers: int = 1) -> List[Any]:
+    """Continue the current simulation once per option, each in a forked child.
+
+    The state of this process (timeline, nodes, apps) is the snapshot: every
+    child starts from it, calls ``branch(option)`` and sends back its result,
+    while the snapshot itself is left untouched. Comparing N options costs
+    the setup up to the snapshot once, plus N branches. POSIX only.
+
+    Args:
+        branch (Callable[[Any], Any]): runs one branch from the snapshot, e.g.
+            installs a swapping order with `swap_rules` and runs the timeline on.
+        options (Sequence[Any]): one option per branch.
+        workers (int): branches run at the same time.
+
+    Returns:
+        List[Any]: branch results in the order of `options`.
+    """
+    def run(task: Tuple[int, Any]) -> Tuple[int, Any]:
+        index, option = task
+        return index, branch(option)
+
+    results = [None] * len(options)
+    for index, result in fork_map(run, list(enumerate(options)), workers):
+        results[index] = result
+    return results
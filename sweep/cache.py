@@ -0,0 +1,182 @@
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import sys
+from functools import lru_cache
+from typing import Any, Callable, Dict
+
+# bump when the meaning of a cached result changes in a way the sources below don't show
+CACHE_FORMAT = 1
+
+# modules whose code produces the rate of a run, besides the rule module
+MEASUREMENT_MODULES = ("sweep.apps", "sweep.simulation", "sweep.watchdog", "sweep.topology", "sweep.context",
+                       "sweep.convergence", "sweep.branching", "sweep.batch", "sweep.warm", "sweep.snapshots",
+                       "sweep.memory_index", "sweep.rule_index")
+
+
+def _module_source_hash(module_name: str) -> str:
+    module = sys.modules.get(module_name)
+    try:
+        source = inspect.getsource(module)
+    except (TypeError, OSError):
+        return ""
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _code_id() -> Dict[str, str]:
+    # once per process: the sources don't change under a running sweep
+    import sequence
+
+    code = {"format": str(CACHE_FORMAT), "sequence": sequence.__version__}
+    for name in MEASUREMENT_MODULES:
+        importlib.import_module(name)
+        code[name] = _module_source_hash(name)
+    return code
+
+
+def _rules_id(rules: Callable) -> Dict[str, str]:
+    return {"name": "%s:%s" % (rules.__module__, rules.__qualname__),
+            "module": rules.__module__,
+            "source": _module_source_hash(rules.__module__)}
+
+
+class ResultCache:
+    """Content-addressed, size-bounded on-disk cache of simulation results.
+
+    A result is stored under the SHA-256 of everything that determines it: the
+    network config after per-run overrides (which includes the node seeds), the
+    `set_parameters` values, the rule function and the source of the module it
+    lives in, the source of the apps, measurement and topology code
+    (`MEASUREMENT_MODULES`), the SeQUeNCe version and `CACHE_FORMAT`, plus any
+    extra run settings. Editing the rule module or the measurement code
+    therefore changes the key of every run that uses it; `invalidate` drops
+    the stale entries explicitly.
+
+    Each entry is a small JSON file; reading an entry refreshes its mtime, and
+    once more than `max_entries` are stored the least recently used ones are
+    evicted.
+
+    Attributes:
+        directory (str): directory holding the entries.
+        max_entries (int): maximum number of stored results.
+    """
+
+    def __init__(self, directory: str = "data/cache", max_entries: int = 10000):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._count = None
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, config: dict, parameters: Dict[str, Any], rules: Callable, **extra) -> str:
+        """Compute the cache key of a run.
+
+        Args:
+            config (dict): network config with the per-run overrides applied.
+            parameters (Dict[str, Any]): values applied by `set_parameters`.
+            rules (Callable): `create_rules` strategy installed for the run.
+            **extra: any other setting of the run (e.g. `stop_time`).
+
+        Returns:
+            str: hex digest identifying the run.
+        """
+        content = {"config": config, "parameters": parameters,
+                   "rules": _rules_id(rules), "code": _code_id(), "extra": extra}
+        blob = json.dumps(content, sort_keys=True, default=repr)
+        return hashlib.sha256(blob.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the stored result for `key`, or `default` on a miss."""
+        path = self._path(key)
+        try:
+            with open(path) as file:
+                entry = json.load(file)
+            os.utime(path)
+        except (OSError, json.JSONDecodeError):
+            return default
+        return entry["result"]
+
+    def put(self, key: str, result: Any, rules: Callable = None) -> None:
+        """Store `result` under `key`, evicting old entries if the cache is full.
+
+        Args:
+            key (str): key returned by `key`.
+            result (Any): JSON-serializable result.
+            rules (Callable): rule function of the run, recorded for `invalidate`.
+        """
+        entry = {"result": result}
+        if rules is not None:
+            entry["rules"] = _rules_id(rules)
+        path = self._path(key)
+        tmp_path = "%s.%d.tmp" % (path, os.getpid())
+        with open(tmp_path, "w") as file:
+            json.dump(entry, file)
+        # atomic, so concurrent workers never see a half-written entry
+        os.replace(tmp_path, path)
+
+        if self._count is None:
+            self._count = len(self._entries())
+        else:
+            self._count += 1
+        if self._count > self.max_entries:
+            self._evict()
+
+    def _entries(self):
+        return [name for name in os.listdir(self.directory) if name.endswith(".json")]
+
+    def _evict(self) -> None:
+        entries = []
+        for name in self._entries():
+            path = os.path.join(self.directory, name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        entries.sort()
+        # evict down to 90% so a full cache doesn't rescan on every put
+        excess = len(entries) - int(self.max_entries * 0.9)
+        for _, path in entries[:max(excess, 0)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._count = len(entries) - max(excess, 0)
+
+    def invalidate(self, rules_module: str = None, stale_only: bool = True) -> int:
+        """Remove cached results, e.g. after editing the rule module.
+
+        Args:
+            rules_module (str): module name of the rule functions (e.g.
+                ``"swaping_rules.ResourceReservationProtocol"``); None removes every entry.
+            stale_only (bool): only remove entries computed from a different
+                version of the module source than the one currently imported.
+
+        Returns:
+            int: number of removed entries.
+        """
+        current = _module_source_hash(rules_module) if rules_module is not None else None
+        removed = 0
+        for name in self._entries():
+            path = os.path.join(self.directory, name)
+            if rules_module is not None:
+                try:
+                    with open(path) as file:
+                        rules = json.load(file).get("rules")
+                except (OSError, json.JSONDecodeError):
+                    continue
+                if rules is None or rules["module"] != rules_module:
+                    continue
+                if stale_only and rules["source"] == current:
+                    continue
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        self._count = None
+        return removed
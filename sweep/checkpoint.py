@@ -0,0 +1,103 @@
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+
+def _encode(value: Any) -> Any:
+    """Turn a grid point argument into something JSON can hold.
+
+    Rule functions such as `create_rules_es_left_to_right` are recorded by
+    their qualified name, so the same point has the same key in every process.
+    """
+    if callable(value):
+        return "%s:%s" % (value.__module__, value.__qualname__)
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _encode(v) for k, v in value.items()}
+    return value
+
+
+def point_key(point: Tuple) -> str:
+    """Stable string key of a grid point (tuple of `simulate` arguments)."""
+    return json.dumps(_encode(point), sort_keys=True)
+
+
+class SweepCheckpoint:
+    """Append-only record of finished sweep grid points.
+
+    Every finished point is written as one JSON line ``{"key": ..., "result": ...}``
+    and flushed to disk right away, so killing a sweep loses at most the points
+    that were still running. Restarting with ``resume=True`` skips every point
+    already in the file.
+
+    The point keys only hold the grid arguments, so the settings shared by
+    every point (parameters, stop time, budget, e.g. `Simulation.run_settings`)
+    are written in a first ``{"settings": ...}`` line; resuming a file written
+    with other settings raises instead of returning results that no longer
+    match them.
+
+    Attributes:
+        path (str): JSON-lines file holding the records.
+        resume (bool): keep existing records (True) or start the sweep over (False).
+        settings (Dict[str, Any]): settings shared by every point of the sweep.
+    """
+
+    def __init__(self, path: str, resume: bool = True, settings: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.resume = resume
+        self.settings = _encode(settings or {})
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not resume and os.path.exists(path):
+            os.remove(path)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            recorded = self._recorded_settings()
+            if recorded != self.settings:
+                raise ValueError("checkpoint %s was written with other settings (%s, now %s); "
+                                 "remove it or do not resume" % (path, recorded, self.settings))
+            with open(path, "rb+") as file:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    # torn last line of a killed sweep: the next record starts on a line of its own
+                    file.write(b"\n")
+        else:
+            with open(path, "w") as file:
+                file.write(json.dumps({"settings": self.settings}) + "\n")
+
+    def _recorded_settings(self) -> Any:
+        # settings of the first line; none ({}) for files written before they were recorded
+        with open(self.path) as file:
+            try:
+                record = json.loads(file.readline())
+            except json.JSONDecodeError:
+                return {}
+        return record.get("settings", {})
+
+    def load(self) -> Dict[str, Any]:
+        """Read the finished points.
+
+        Returns:
+            Dict[str, Any]: mapping of point key to its recorded result.
+        """
+        done = {}
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path) as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # torn last line of a killed sweep, that point will be rerun
+                    continue
+                if "key" in record:
+                    done[record["key"]] = record["result"]
+        return done
+
+    def record(self, key: str, result: Any) -> None:
+        """Append one finished point and flush it to disk."""
+        with open(self.path, "a") as file:
+            file.write(json.dumps({"key": key, "result": result}) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
@@ -0,0 +1,375 @@
+"""Command line interface of the sweep package (``python -m sweep``).
+
+::
+
+    python -m sweep run networks/2RoutersMultiChannels.json -d 1k:200k:10k \\
+        -s left_to_right -s right_to_left --mode branch
+    python -m sweep run networks/2Routers.json -d 1000,11000 --param memo_efficiency=[1,0.8,0.6,0.4] \\
+        --label memo_eff=decreasing --dry-run
+    python -m sweep query network=2RoutersMultiChannels.json swapping_order=left_to_right --unique distance
+    python -m sweep spec experiments/memory_lhs.json --dry-run
+    python -m sweep worker coordinator-host:5555 --processes 8   # on every worker host
+    python -m sweep bench --sizes 2,4,8,16,32,64 --profile decreasing
+    python -m sweep strategies
+
+Only the standard library is imported at startup: SeQUeNCe, the rule modules,
+numpy and matplotlib are loaded by the commands that need them, so ``--help``,
+dry runs and listing strategies return immediately.
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+def _value(text: str) -> Any:
+    # JSON if it parses (numbers, lists, null), the plain string otherwise
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _assignments(items: Sequence[str]) -> Dict[str, Any]:
+    values = {}
+    for item in items:
+        name, sep, text = item.partition("=")
+        if not sep or not name:
+            raise argparse.ArgumentTypeError("expected name=value, got %r" % item)
+        values[name] = _value(text)
+    return values
+
+
+def _print_rows(rows: List[Dict[str, Any]], as_json: bool, columns: Optional[Sequence[str]] = None) -> None:
+    from .experiment import rows_table
+
+    if as_json:
+        json.dump(rows, sys.stdout, indent=1, default=float)
+        print()
+    elif rows:
+        print(rows_table(rows, columns))
+
+
+def _strategy_list(args: argparse.Namespace) -> List[str]:
+    from .strategies import STRATEGIES
+
+    strategies = []
+    for item in args.strategy or ["left_to_right", "right_to_left"]:
+        strategies.extend(name for name in item.split(",") if name)
+    for name in strategies:
+        if name not in STRATEGIES and ":" not in name:
+            raise ValueError("unknown swapping strategy %r (known: %s)" % (name, ", ".join(STRATEGIES)))
+    return strategies
+
+
+def _run(args: argparse.Namespace) -> int:
+    from .experiment import parse_distances, plan, run_experiment
+
+    try:
+        distances = parse_distances(args.distances)
+        strategies = _strategy_list(args)
+        parameters = _assignments(args.param)
+        labels = _assignments(args.label)
+    except (ValueError, argparse.ArgumentTypeError) as error:
+        print("error:", error, file=sys.stderr)
+        return 2
+    if args.dry_run:
+        calls = plan(args.network, distances, strategies, mode=args.mode, replicas=args.replicas,
+                     batch_size=args.batch_size)
+        if args.json:
+            json.dump([{"method": method, "arguments": arguments} for method, arguments in calls],
+                      sys.stdout, indent=1)
+            print()
+        else:
+            for method, arguments in calls:
+                print("%s%r" % (method, arguments))
+            print("%d runs, parameters %s" % (len(calls), parameters or "default"), file=sys.stderr)
+        return 0
+
+    from .simulation import Simulation
+
+    budget = {"max_events": args.max_events, "max_seconds": args.max_seconds,
+              "max_memory": args.max_memory << 20 if args.max_memory else None}
+    simulation = Simulation(parameters=parameters, stop_time=args.stop_time, cache=_cache(args), run_budget=budget,
+                            convergence_target=args.convergence_target,
+                            link_capacity=_value(args.link_capacity) if args.link_capacity else None,
+                            node_order=args.node_order.split(",") if args.node_order else None,
+                            start_node=args.start_node, end_node=args.end_node, verbose=not args.json,
+                            snapshots=_snapshots(args))
+    execution = _execution(args, simulation)
+    try:
+        rows = run_experiment(args.network, distances, strategies, mode=args.mode, simulation=simulation,
+                              replicas=args.replicas, batch_size=args.batch_size, dataset=args.dataset,
+                              labels=labels, **execution)
+    finally:
+        _close(execution)
+    _print_rows(rows, args.json)
+    return 0
+
+
+def _spec(args: argparse.Namespace) -> int:
+    from .spec import ExperimentSpec, run_spec
+
+    try:
+        spec = ExperimentSpec.load(args.spec)
+        points = spec.points()
+    except ValueError as error:
+        print("error:", error, file=sys.stderr)
+        return 2
+    if args.dry_run:
+        _print_rows([spec.row(point) for point in points], args.json)
+        size = spec.grid_size()
+        print("%d runs (%s sampling%s)" % (len(points), spec.method,
+                                           ", full grid: %d" % size if size is not None else ""), file=sys.stderr)
+        return 0
+
+    from .simulation import DEFAULT_PARAMETERS, Simulation
+
+    fixed_parameters = {name: value for name, value in spec.fixed.items() if name in DEFAULT_PARAMETERS}
+    simulation = Simulation(fixed_parameters, cache=_cache(args), verbose=not args.json, snapshots=_snapshots(args),
+                            **spec.settings)
+    execution = _execution(args, simulation)
+    try:
+        rows = run_spec(spec, simulation=simulation, **execution)
+    finally:
+        _close(execution)
+    _print_rows(rows, args.json)
+    return 0
+
+
+def _cache(args: argparse.Namespace):
+    if not args.cache:
+        return None
+    from .cache import ResultCache
+
+    return ResultCache(args.cache)
+
+
+def _snapshots(args: argparse.Namespace):
+    if not args.topology_cache:
+        return None
+    from .snapshots import TopologySnapshots
+
+    return TopologySnapshots(args.topology_cache)
+
+
+def _execution(args: argparse.Namespace, simulation) -> Dict[str, Any]:
+    # how the runs of a sweep are scheduled, checkpointed and stored
+    from .checkpoint import SweepCheckpoint
+
+    cost_model = None
+    if args.cost_model:
+        from .cost_model import CostModel
+
+        cost_model = CostModel(simulation.point_features, args.cost_model)
+    store = None
+    if args.store:
+        from .results_store import ResultsStore
+
+        store = ResultsStore(args.store)
+    checkpoint = (SweepCheckpoint(args.checkpoint, resume=args.resume, settings=simulation.run_settings())
+                  if args.checkpoint else None)
+    coordinator = None
+    if args.coordinator:
+        from .distributed import Coordinator, authkey_from, parse_address
+
+        coordinator = Coordinator(parse_address(args.coordinator), authkey_from(args.authkey)).start()
+    return dict(workers=args.workers, checkpoint=checkpoint, cost_model=cost_model,
+                warm_start=args.warm_start, store=store, coordinator=coordinator)
+
+
+def _close(execution: Dict[str, Any]) -> None:
+    if execution["coordinator"] is not None:
+        execution["coordinator"].close()
+
+
+def _worker(args: argparse.Namespace) -> int:
+    from .distributed import authkey_from, parse_address, run_workers
+
+    try:
+        address, authkey = parse_address(args.address), authkey_from(args.authkey)
+    except ValueError as error:
+        print("error:", error, file=sys.stderr)
+        return 2
+    run_workers(address, authkey, processes=args.processes, retry=args.retry)
+    return 0
+
+
+def _query(args: argparse.Namespace) -> int:
+    from .results_store import ResultsStore
+
+    table = ResultsStore(args.store).query(unique=args.unique.split(",") if args.unique else None,
+                                           sort_by=args.sort_by, **_assignments(args.filter))
+    names = list(table)
+    count = len(table[names[0]]) if names else 0
+    rows = [{name: table[name][i].item() for name in names} for i in range(count)]
+    columns = args.columns.split(",") if args.columns else [name for name in names if name != "created"]
+    _print_rows([{name: row.get(name) for name in columns} for row in rows], args.json, columns)
+    if args.plot:
+        _plot(rows, args.plot, args.group_by)
+    return 0
+
+
+def _plot(rows: List[Dict[str, Any]], filename: str, group_by: str) -> None:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    curves: Dict[Any, List[Tuple[float, float]]] = {}
+    for row in rows:
+        curves.setdefault(row.get(group_by), []).append((row["distance"] / 1000, row["rate"]))
+    fig, ax = plt.subplots()
+    for label, points in curves.items():
+        points.sort()
+        ax.plot([x for x, _ in points], [y for _, y in points], marker="o", label=str(label))
+    ax.set_xlabel("Distance (km)")
+    ax.set_ylabel("Entanglement rate (pairs/s)")
+    ax.legend(title=group_by)
+    fig.savefig(filename)
+    plt.close(fig)
+
+
+def _bench(args: argparse.Namespace) -> int:
+    try:
+        sizes = [int(size) for size in args.sizes.split(",") if size]
+        profile = _value(args.profile)
+        strategy = _strategy_list(args)[0] if args.strategy else None
+    except ValueError as error:
+        print("error:", error, file=sys.stderr)
+        return 2
+    from .benchmark import run_benchmark
+    from .simulation import Simulation
+
+    budget = {"max_seconds": args.max_seconds}
+    simulation = Simulation(stop_time=args.stop_time, run_budget=budget, verbose=False)
+    store = None
+    if args.store:
+        from .results_store import ResultsStore
+
+        store = ResultsStore(args.store)
+    columns = ["routers", "memories", "events", "setup_s", "run_s", "wall_per_sim_s", "events_per_s",
+               "peak_rss_mb", "rate", "complete", "error"]
+
+    def report(row):
+        if not args.json:
+            print("  ".join("%s=%s" % (name, "%.4g" % row[name] if isinstance(row[name], float) else row[name])
+                            for name in columns if name in row), file=sys.stderr)
+
+    rows = run_benchmark(sizes, profile=profile, capacity=args.capacity, hop_distance=args.hop_distance,
+                         strategy=strategy, simulation=simulation, profile_dir=args.profile_dir, store=store,
+                         report=report)
+    if args.json:
+        _print_rows(rows, True)
+    else:
+        _print_rows([{name: row.get(name, "") for name in columns} for row in rows], False, columns)
+    return 0
+
+
+def _list_strategies(args: argparse.Namespace) -> int:
+    from .strategies import STRATEGIES
+
+    for name, target in STRATEGIES.items():
+        print("%-16s %s" % (name, target or "SeQUeNCe default"))
+    return 0
+
+
+def _add_execution_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--warm-start", action="store_true", help="build the topology once and fork a child per run")
+    parser.add_argument("--cache", default="", metavar="DIR", help="result cache directory (default: no cache)")
+    parser.add_argument("--topology-cache", default="", metavar="DIR",
+                        help="load the built topologies from snapshots in DIR (default: build every run)")
+    parser.add_argument("--cost-model", help="runtime records file used to schedule the longest runs first")
+    parser.add_argument("--checkpoint", help="checkpoint file of the finished runs")
+    parser.add_argument("--no-resume", dest="resume", action="store_false", help="start the checkpoint over")
+    parser.add_argument("--store", default="data/results", help="results store directory, '' to disable (default: %(default)s)")
+    parser.add_argument("--coordinator", metavar="HOST:PORT",
+                        help="serve the runs to remote workers listening on this address (see sweep.distributed)")
+    parser.add_argument("--authkey", help="shared secret of the coordinator and its workers (default: $SWEEP_AUTHKEY)")
+    parser.add_argument("--dry-run", action="store_true", help="list the runs without running them")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m sweep",
+                                     description="Run and query entanglement swapping-order sweeps.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run a sweep of distance x swapping strategy on one network")
+    run.add_argument("network", help="network config JSON, e.g. networks/2RoutersMultiChannels.json")
+    run.add_argument("-d", "--distances", default="1k:200k:10k",
+                     help="start:stop:step or comma separated distances in m, 'k' = km (default: %(default)s)")
+    run.add_argument("-s", "--strategy", action="append", metavar="NAME",
+                     help="swapping strategy name or module:function, repeatable or comma separated "
+                          "(default: left_to_right,right_to_left)")
+    run.add_argument("--mode", choices=("grid", "branch", "batch", "replicas", "adaptive"), default="grid")
+    run.add_argument("--param", action="append", default=[], metavar="NAME=VALUE",
+                     help="simulation parameter, e.g. memo_expire=0.001 or memo_efficiency=[1,0.8,0.6,0.4]")
+    run.add_argument("--label", action="append", default=[], metavar="NAME=VALUE",
+                     help="extra column stored with every result row")
+    run.add_argument("--stop-time", type=float, default=2e12, help="timeline stop time in ps (default: %(default)g)")
+    run.add_argument("--link-capacity", help="memories reserved per link, e.g. [1,2,4] (strategy 'custom')")
+    run.add_argument("--node-order", help="comma separated swapping order of the routers (strategy 'custom')")
+    run.add_argument("--start-node", default="Nodei")
+    run.add_argument("--end-node", default="Nodej")
+    run.add_argument("--replicas", type=int, default=3, help="runs per point in replicas mode (default: %(default)s)")
+    run.add_argument("--batch-size", type=int, default=4, help="scenarios per timeline in batch mode (default: %(default)s)")
+    run.add_argument("--max-events", type=int, help="event budget of one run")
+    run.add_argument("--max-seconds", type=float, help="wall time budget of one run (default: none)")
+    run.add_argument("--max-memory", type=int, help="memory budget in MB (default: none)")
+    run.add_argument("--convergence-target", type=float, help="stop a run once the rate CI is within this fraction")
+    run.add_argument("--dataset", default="rates", help="value of the dataset column (default: %(default)s)")
+    _add_execution_options(run)
+    run.set_defaults(handler=_run)
+
+    spec = commands.add_parser("spec", help="run a declarative experiment file (see sweep.spec)")
+    spec.add_argument("spec", help="experiment JSON, e.g. experiments/coherence_time.json")
+    _add_execution_options(spec)
+    spec.set_defaults(handler=_spec)
+
+    query = commands.add_parser("query", help="print rows of the results store")
+    query.add_argument("filter", nargs="*", metavar="NAME=VALUE", help="equality filters, e.g. swapping_order=left_to_right")
+    query.add_argument("--store", default="data/results", help="results store directory (default: %(default)s)")
+    query.add_argument("--unique", help="comma separated columns: keep the latest row per combination")
+    query.add_argument("--sort-by", default="distance")
+    query.add_argument("--columns", help="comma separated columns to print")
+    query.add_argument("--json", action="store_true", help="print the rows as JSON")
+    query.add_argument("--plot", metavar="FILE", help="save a rate vs distance plot")
+    query.add_argument("--group-by", default="swapping_order", help="column giving the curves of --plot")
+    query.set_defaults(handler=_query)
+
+    worker = commands.add_parser("worker", help="run the points served by a coordinator")
+    worker.add_argument("address", metavar="HOST:PORT", help="address of the coordinator")
+    worker.add_argument("--processes", type=int, default=1, help="workers on this host (default: %(default)s)")
+    worker.add_argument("--authkey", help="shared secret of the coordinator and its workers (default: $SWEEP_AUTHKEY)")
+    worker.add_argument("--retry", type=float, default=60.0,
+                        help="seconds to wait for the coordinator to come up (default: %(default)s)")
+    worker.set_defaults(handler=_worker)
+
+    bench = commands.add_parser("bench", help="time runs on generated chains of growing length (see sweep.benchmark)")
+    bench.add_argument("--sizes", default="2,4,8,16,32,64",
+                       help="comma separated chain lengths, end nodes included (default: %(default)s)")
+    bench.add_argument("--profile", default="constant",
+                       help="memory profile: constant, increasing, decreasing or link capacities like [4,2,1] "
+                            "(default: %(default)s)")
+    bench.add_argument("--capacity", type=int, default=1, help="memories of the smallest link (default: %(default)s)")
+    bench.add_argument("--hop-distance", type=float, default=1000, help="length of every link in m (default: %(default)g)")
+    bench.add_argument("-s", "--strategy", action="append", metavar="NAME",
+                       help="swapping strategy (default: the SeQUeNCe rules; 'custom' follows the profile)")
+    bench.add_argument("--stop-time", type=float, default=2e12, help="timeline stop time in ps (default: %(default)g)")
+    bench.add_argument("--max-seconds", type=float, default=1800, help="wall time budget of one run (default: %(default)s)")
+    bench.add_argument("--profile-dir", help="write cProfile stats of every run to this directory")
+    bench.add_argument("--store", default="", help="results store directory to append the rows to (default: none)")
+    bench.add_argument("--json", action="store_true", help="print the rows as JSON")
+    bench.set_defaults(handler=_bench)
+
+    listing = commands.add_parser("strategies", help="list the registered swapping strategies")
+    listing.set_defaults(handler=_list_strategies)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
@@ -0,0 +1,85 @@
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+from sequence.network_management.reservation import ResourceReservationProtocol
+from sequence.topology.router_net_topo import RouterNetTopo
+
+if TYPE_CHECKING:
+    from sequence.network_management.reservation import Reservation
+
+
+class _ContextRules:
+    """`create_rules` bound to one reservation protocol instance and one run context.
+
+    A plain object rather than a closure, so a topology with a context
+    installed can still be pickled.
+    """
+
+    def __init__(self, context: "RunContext", rsvp: ResourceReservationProtocol):
+        self.context = context
+        self.rsvp = rsvp
+
+    def __call__(self, path: List[str], reservation: "Reservation"):
+        self.context.annotate(reservation)
+        rules = self.context.rules_function()(self.rsvp, path, reservation)
+        # the order the rules are scheduled in, for `swap_rules` to put new rules in their place
+        for i, rule in enumerate(rules):
+            rule.load_order = i
+        return rules
+
+
+class RunContext:
+    """Rule strategy and reservation settings of one simulation run.
+
+    Replaces assigning ``ResourceReservationProtocol.create_rules``,
+    ``Reservation.link_capacity`` and ``Reservation.swapping_order`` at class
+    level, which leaks into every other run of the process. `install` sets an
+    instance-level `create_rules` on the reservation protocol of every router
+    of one topology; it copies `link_capacity`, `swapping_order` and
+    `purification_pairing` onto each
+    reservation before the rules are created, where the rule functions read
+    them. Differently configured topologies can then live and run in one process.
+
+    Attributes:
+        create_rules (Callable): unbound rule strategy, e.g.
+            `create_rules_es_left_to_right` (None: the protocol's default).
+        link_capacity (List[int]): memories reserved per link, read by `create_rules`.
+        swapping_order (List[str]): order in which routers swap, read by `create_rules`.
+        purification_pairing (str): how purification pairs entangled memories,
+            ``"exact"``, ``"nearest"`` or ``"oldest"`` (see ``PAIRING_POLICIES``
+            in ``swaping_rules.ResourceReservationProtocol``; None: exact).
+    """
+
+    def __init__(self, create_rules: Optional[Callable] = None, link_capacity: Optional[List[int]] = None,
+                 swapping_order: Optional[List[str]] = None, purification_pairing: Optional[str] = None):
+        self.create_rules = create_rules
+        self.link_capacity = link_capacity
+        self.swapping_order = swapping_order
+        self.purification_pairing = purification_pairing
+
+    def rules_function(self) -> Callable:
+        """The rule strategy of this run (the class default if none was given)."""
+        if self.create_rules is not None:
+            return self.create_rules
+        return ResourceReservationProtocol.create_rules
+
+    def annotate(self, reservation: "Reservation") -> None:
+        """Attach the reservation settings of this run to `reservation`."""
+        if self.link_capacity is not None:
+            reservation.link_capacity = self.link_capacity
+        if self.swapping_order is not None:
+            reservation.swapping_order = self.swapping_order
+        if self.purification_pairing is not None:
+            reservation.purification_pairing = self.purification_pairing
+
+    def install(self, topology: RouterNetTopo) -> "RunContext":
+        """Use this context for every reservation created in `topology` from now on.
+
+        Installing another context on the same topology replaces this one.
+
+        Returns:
+            RunContext: self, for chaining.
+        """
+        for router in topology.get_nodes_by_type(RouterNetTopo.QUANTUM_ROUTER):
+            rsvp = router.network_manager.protocol_stack[1]
+            rsvp.create_rules = _ContextRules(self, rsvp)
+        return self
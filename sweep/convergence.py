@@ -0,0 +1,77 @@
+import math
+from typing import List
+
+from sequence.kernel.event import Event
+from sequence.kernel.process import Process
+
+
+class ConvergenceMonitor:
+    """Opt-in stopping rule for the throughput measured by a `RequestApp`.
+
+    Every `check_period` ps of the measurement window the monitor records how
+    many entanglements the app counted (`eg_counter`) during that period and
+    treats the periods as batches. Once at least `min_batches` are in and the
+    Student-t confidence interval of the batch mean is narrower than `target`
+    relative to the mean, the timeline is stopped and `app.end_time` is moved
+    to the current time, so `app.get_throughput()` reports the rate over the
+    window that was actually simulated.
+
+    Attributes:
+        app (RequestApp): application whose `eg_counter` is monitored.
+        target (float): relative CI half width at which the run stops.
+        check_period (float): length of one batch (ps).
+        min_batches (int): minimum number of batches before stopping.
+        confidence (float): confidence level of the interval.
+        batches (List[int]): entanglements counted per batch.
+        converged (bool): whether the run was stopped early.
+    """
+
+    def __init__(self, app, target: float = 0.05, check_period: float = 1e10,
+                 min_batches: int = 10, confidence: float = 0.95):
+        self.app = app
+        self.target = target
+        self.check_period = check_period
+        self.min_batches = min_batches
+        self.confidence = confidence
+        self.batches: List[int] = []
+        self.converged = False
+        self._last_count = 0
+
+    def start(self) -> None:
+        """Schedule the first check; call after `app.start()` set the window."""
+        self._last_count = 0
+        self._schedule(self.app.start_time + self.check_period)
+
+    def _schedule(self, time: float) -> None:
+        if time > self.app.end_time:
+            return
+        process = Process(self, "check", [])
+        event = Event(time, process)
+        self.app.node.timeline.schedule(event)
+
+    def relative_half_width(self) -> float:
+        """Relative CI half width of the batch mean (inf until it can be computed)."""
+        from scipy.stats import t
+
+        n = len(self.batches)
+        if n < 2:
+            return math.inf
+        mean = sum(self.batches) / n
+        if mean == 0:
+            return math.inf
+        var = sum((b - mean) ** 2 for b in self.batches) / (n - 1)
+        half_width = t.ppf(0.5 + self.confidence / 2, n - 1) * math.sqrt(var / n)
+        return half_width / mean
+
+    def check(self) -> None:
+        count = self.app.eg_counter
+        self.batches.append(count - self._last_count)
+        self._last_count = count
+
+        timeline = self.app.node.timeline
+        if len(self.batches) >= self.min_batches and self.relative_half_width() < self.target:
+            self.converged = True
+            self.app.end_time = timeline.now()
+            timeline.stop()
+            return
+        self._schedule(timeline.now() + self.check_period)
@@ -0,0 +1,124 @@
+import json
+import math
+import os
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from sequence.topology.router_net_topo import RouterNetTopo
+from sequence.topology.topology import Topology as Topo
+
+
+def config_features(config: dict, distance: float, stop_time: float,
+                    link_capacity: Sequence[int] = None) -> Dict[str, float]:
+    """Runtime-relevant features of one run.
+
+    Args:
+        config (dict): network config of the run.
+        distance (float): end-to-end distance (m).
+        stop_time (float): timeline stop time (ps).
+        link_capacity (Sequence[int]): per-link memory capacity of the reservation, if any.
+
+    Returns:
+        Dict[str, float]: path length, memory sizes, link capacity, distance and stop time.
+    """
+    memo_sizes = [node.get(RouterNetTopo.MEMO_ARRAY_SIZE, 0) for node in config[Topo.ALL_NODE]
+                  if node[Topo.TYPE] == RouterNetTopo.QUANTUM_ROUTER]
+    return {"path_length": len(memo_sizes),
+            "memo_total": sum(memo_sizes),
+            "memo_max": max(memo_sizes, default=0),
+            "link_capacity": sum(link_capacity) if link_capacity else 0,
+            "distance": distance,
+            "stop_time": stop_time}
+
+
+class CostModel:
+    """Predicts the wall time of a sweep point from its config features.
+
+    Every simulated run is recorded as ``{"features": ..., "seconds": ...}`` in a
+    JSON-lines file shared by all sweeps. Predictions come from a least-squares
+    fit of ``log(seconds)`` on ``log1p`` of the features, refitted whenever new
+    runs were recorded. Until there are enough records to fit, every point is
+    predicted to cost the same, so the grid order is kept.
+
+    `run_sweep` uses it to dispatch the most expensive points first, so a long
+    straggler starts early instead of holding up the end of the sweep.
+
+    Attributes:
+        features (Callable[[Tuple], Dict[str, float]]): maps a grid point to its features.
+        path (str): JSON-lines file of recorded runs.
+    """
+
+    def __init__(self, features: Callable[[Tuple], Dict[str, float]], path: str = "data/cost_model.jsonl"):
+        self.features = features
+        self.path = path
+        self._names: List[str] = []
+        self._coef = None
+        self._fitted_stamp = None
+
+    def _stamp(self) -> Optional[Tuple[int, int]]:
+        # size and mtime of the records file: the records are only re-read when it changed
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _records(self) -> List[dict]:
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path) as file:
+            for line in file:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return records
+
+    def record(self, point: Tuple, seconds: float) -> None:
+        """Record the wall time of a finished point."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a") as file:
+            file.write(json.dumps({"features": self.features(point), "seconds": seconds}) + "\n")
+
+    def fit(self) -> bool:
+        """Fit the model to the recorded runs, unless the records file is unchanged since the last fit.
+
+        Returns:
+            bool: whether there were enough records to fit.
+        """
+        stamp = self._stamp()
+        if stamp is not None and stamp == self._fitted_stamp:
+            return self._coef is not None
+        self._fitted_stamp = stamp
+        records = self._records()
+        names = sorted(set.intersection(*(set(r["features"]) for r in records))) if records else []
+        if len(records) <= len(names):
+            self._coef = None
+            return False
+        x = np.array([[1.0] + [math.log1p(max(r["features"][name], 0)) for name in names] for r in records])
+        y = np.log([max(r["seconds"], 1e-6) for r in records])
+        self._coef, _, _, _ = np.linalg.lstsq(x, y, rcond=None)
+        self._names = names
+        return True
+
+    def predict(self, point: Tuple) -> float:
+        """Predicted wall time of `point` in seconds (0 while the model is untrained)."""
+        if not self.fit():
+            return 0.0
+        return self._predict(point)
+
+    def _predict(self, point: Tuple) -> float:
+        features = self.features(point)
+        x = np.array([1.0] + [math.log1p(max(features.get(name, 0), 0)) for name in self._names])
+        return float(np.exp(x @ self._coef))
+
+    def order(self, points: Sequence[Tuple]) -> List[int]:
+        """Indices of `points`, longest predicted first (stable for equal predictions)."""
+        if not self.fit():
+            return list(range(len(points)))
+        predictions = [self._predict(point) for point in points]
+        return sorted(range(len(points)), key=lambda i: -predictions[i])
@@ -0,0 +1,313 @@
+"""Distribute sweep points over TCP to workers on other hosts.
+
+A `Coordinator` listens on a TCP port and serves the points of `run_sweep`
+from a local queue; workers (``python -m sweep worker HOST:PORT``) connect,
+pull one point at a time, run it and send the result back. Every point
+handed out is leased to its connection: if the worker disconnects or stops
+sending heartbeats, the point goes back to the queue and another worker
+runs it. Results are deterministic per point (seeds come from the config),
+so a distributed sweep gives the same numbers as a local one.
+
+Connections use `multiprocessing.connection` (length-prefixed pickles with
+HMAC challenge authentication), so there is nothing to install, but every
+worker and the coordinator must share the `authkey` and the same code: the
+run function is sent by reference and must be importable on the workers
+(a function of an importable module, or a method of a `Simulation`).
+Pickles are only exchanged after authentication; still, only open the port
+to trusted hosts.
+
+Testing on one machine::
+
+    export SWEEP_AUTHKEY=secret
+    python -m sweep worker 127.0.0.1:5555 --processes 2 &
+    python -m sweep run networks/2Routers.json --coordinator 127.0.0.1:5555
+"""
+
+import logging
+import os
+import pickle
+import queue
+import threading
+import time
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+log = logging.getLogger(__name__)
+
+# environment variable read by the CLI when no --authkey is given
+AUTHKEY_VARIABLE = "SWEEP_AUTHKEY"
+
+
+def parse_address(text: str) -> Tuple[str, int]:
+    """``"host:port"`` (or ``":port"`` for all interfaces) as a socket address."""
+    host, sep, port = text.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError("address must look like host:port, got %r" % text)
+    return host or "0.0.0.0", int(port)
+
+
+class Coordinator:
+    """Serves tasks to remote workers and collects their results.
+
+    Attributes:
+        address (Tuple[str, int]): address the coordinator listens on.
+        authkey (bytes): shared secret of the coordinator and its workers.
+        lease_timeout (float): seconds without a heartbeat after which a
+            worker is considered dead and its task re-queued.
+        max_attempts (int): times a task may be handed out before the sweep
+            fails (a point that keeps killing its worker).
+        poll_interval (float): how long an idle worker waits before asking again.
+    """
+
+    def __init__(self, address: Tuple[str, int], authkey: bytes, lease_timeout: float = 60.0,
+                 max_attempts: int = 3, poll_interval: float = 0.5):
+        self.address = address
+        self.authkey = authkey
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self._pending: "queue.Queue[int]" = queue.Queue()
+        self._results: "queue.Queue[Tuple]" = queue.Queue()
+        self._tasks: Dict[int, Tuple] = {}
+        self._next_index = 0
+        self._attempts: Dict[int, int] = {}
+        self._done: Set[int] = set()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._listener: Optional[Listener] = None
+        self._connections: Set[Connection] = set()
+
+    def start(self) -> "Coordinator":
+        """Start listening (done by `map` if needed)."""
+        if self._listener is None:
+            self._listener = Listener(self.address, authkey=self.authkey)
+            self.address = self._listener.address
+            threading.Thread(target=self._accept, daemon=True).start()
+            log.info("coordinator listening on %s:%d", *self.address)
+        return self
+
+    def close(self) -> None:
+        """Tell the workers to stop and close the listener."""
+        self._closed.set()
+        if self._listener is not None:
+            self._listener.close()
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            connection.close()
+
+    def __enter__(self) -> "Coordinator":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _accept(self) -> None:
+        while not self._closed.is_set():
+            try:
+                connection = self._listener.accept()
+            except OSError:
+                # listener closed, or a client failed authentication
+                if self._closed.is_set():
+                    return
+                continue
+            with self._lock:
+                self._connections.add(connection)
+            threading.Thread(target=self._serve, args=(connection,), daemon=True).start()
+
+    def _lease(self) -> Optional[Tuple[int, Callable, Tuple]]:
+        while True:
+            try:
+                index = self._pending.get_nowait()
+            except queue.Empty:
+                return None
+            with self._lock:
+                if index in self._done:
+                    continue
+                self._attempts[index] = self._attempts.get(index, 0) + 1
+                if self._attempts[index] > self.max_attempts:
+                    self._done.add(index)
+                    self._results.put((index, False, RuntimeError(
+                        "point %d lost its worker %d times" % (index, self.max_attempts)), 0.0))
+                    continue
+                return (index,) + self._tasks[index]
+
+    def _serve(self, connection: Connection) -> None:
+        leased = None
+        peer = "worker"
+        try:
+            connection.send(("hello", self.lease_timeout / 3))
+            while True:
+                if not connection.poll(self.lease_timeout):
+                    log.warning("%s missed its heartbeats", peer)
+                    break
+                message = connection.recv()
+                kind = message[0]
+                if kind == "heartbeat":
+                    continue
+                if kind == "hello":
+                    peer = message[1]
+                elif kind == "result":
+                    _, index, ok, result, seconds = message
+                    leased = None
+                    with self._lock:
+                        fresh = index not in self._done
+                        self._done.add(index)
+                    if fresh:
+                        self._results.put((index, ok, result, seconds))
+                if kind in ("hello", "result", "get"):
+                    if self._closed.is_set():
+                        connection.send(("done",))
+                        break
+                    task = self._lease()
+                    if task is None:
+                        connection.send(("wait", self.poll_interval))
+                        continue
+                    leased = task[0]
+                    try:
+                        connection.send(("task",) + task)
+                    except (pickle.PicklingError, AttributeError, TypeError) as error:
+                        # e.g. a lambda or a function of __main__: no worker could run it
+                        with self._lock:
+                            self._done.add(leased)
+                        self._results.put((leased, False, error, 0.0))
+                        leased = None
+                        connection.send(("wait", 0))
+        except (EOFError, OSError) as error:
+            if not self._closed.is_set():
+                log.warning("%s disconnected: %s", peer, error)
+        finally:
+            if leased is not None:
+                with self._lock:
+                    lost = leased not in self._done
+                if lost:
+                    log.warning("re-queueing point %d of %s", leased, peer)
+                    self._pending.put(leased)
+            with self._lock:
+                self._connections.discard(connection)
+            connection.close()
+
+    def map(self, func: Callable[[Tuple], Any], tasks: Iterable[Tuple]) -> Iterator[Any]:
+        """Run ``func(task)`` on the workers for every task.
+
+        Results are yielded in completion order, an exception raised by
+        ``func`` on a worker is re-raised here. Blocks until workers connect.
+        """
+        self.start()
+        indices = []
+        with self._lock:
+            for task in tasks:
+                # indices are never reused: later maps must not match old `_done` entries
+                index = self._next_index
+                self._next_index += 1
+                self._tasks[index] = (func, task)
+                indices.append(index)
+        for index in indices:
+            self._pending.put(index)
+        for _ in indices:
+            index, ok, result, _ = self._results.get()
+            with self._lock:
+                del self._tasks[index]
+            if not ok:
+                raise result
+            yield result
+
+
+def _send(connection: Connection, lock: threading.Lock, message: Tuple) -> None:
+    with lock:
+        connection.send(message)
+
+
+def _heartbeat(connection: Connection, lock: threading.Lock, interval: float, stop: threading.Event) -> None:
+    while not stop.wait(interval):
+        try:
+            _send(connection, lock, ("heartbeat",))
+        except OSError:
+            return
+
+
+def work(address: Tuple[str, int], authkey: bytes, name: Optional[str] = None) -> int:
+    """Pull tasks from a coordinator and run them until it says done.
+
+    Args:
+        address (Tuple[str, int]): coordinator address.
+        authkey (bytes): shared secret.
+        name (str): name of this worker in the coordinator log.
+
+    Returns:
+        int: number of tasks run.
+    """
+    name = name or "%s:%d" % (os.uname().nodename, os.getpid())
+    connection = Client(address, authkey=authkey)
+    lock = threading.Lock()
+    stop = threading.Event()
+    count = 0
+    try:
+        _, interval = connection.recv()
+        threading.Thread(target=_heartbeat, args=(connection, lock, interval, stop), daemon=True).start()
+        _send(connection, lock, ("hello", name))
+        while True:
+            message = connection.recv()
+            kind = message[0]
+            if kind == "done":
+                break
+            if kind == "wait":
+                time.sleep(message[1])
+                _send(connection, lock, ("get",))
+                continue
+            _, index, func, task = message
+            tick = time.perf_counter()
+            try:
+                reply = ("result", index, True, func(task), time.perf_counter() - tick)
+            except Exception as error:
+                reply = ("result", index, False, error, time.perf_counter() - tick)
+            _send(connection, lock, reply)
+            count += 1
+    except (EOFError, OSError):
+        pass  # coordinator gone
+    finally:
+        stop.set()
+        connection.close()
+    return count
+
+
+def run_workers(address: Tuple[str, int], authkey: bytes, processes: int = 1,
+                retry: float = 0.0) -> None:
+    """Run `processes` workers on this host, each in its own process.
+
+    Args:
+        address (Tuple[str, int]): coordinator address.
+        authkey (bytes): shared secret.
+        processes (int): number of workers (e.g. the number of cores).
+        retry (float): seconds to keep trying to reach a coordinator that
+            is not (yet) listening.
+    """
+    import multiprocessing
+
+    def connect_and_work():
+        deadline = time.monotonic() + retry
+        while True:
+            try:
+                return work(address, authkey)
+            except ConnectionRefusedError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(1.0)
+
+    if processes <= 1:
+        connect_and_work()
+        return
+    context = multiprocessing.get_context("fork")
+    children = [context.Process(target=connect_and_work) for _ in range(processes)]
+    for child in children:
+        child.start()
+    for child in children:
+        child.join()
+
+
+def authkey_from(value: Optional[str] = None) -> bytes:
+    """The shared secret given as `value`, or else in ``$SWEEP_AUTHKEY``."""
+    value = value or os.environ.get(AUTHKEY_VARIABLE)
+    if not value:
+        raise ValueError("an authkey is needed (--authkey or $%s)" % AUTHKEY_VARIABLE)
+    return value.encode()
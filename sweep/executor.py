@@ -0,0 +1,121 @@
+import multiprocessing
+import os
+import time
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Sequence, Tuple
+
+from .checkpoint import point_key
+
+if TYPE_CHECKING:
+    from .checkpoint import SweepCheckpoint
+    from .cost_model import CostModel
+    from .distributed import Coordinator
+
+
+def is_complete(result: Any) -> bool:
+    """Whether a run result is final, i.e. none of its rates was cut short by a budget.
+
+    Results other than a `Rate` (or a list of them) count as complete.
+    """
+    if isinstance(result, (list, tuple)):
+        return all(is_complete(item) for item in result)
+    return getattr(result, "complete", True)
+
+
+def _simulated(result: Any) -> bool:
+    # False if every rate of the result came from the result cache
+    if isinstance(result, (list, tuple)):
+        return any(_simulated(item) for item in result)
+    return not getattr(result, "cached", False)
+
+
+def _run_point(task: Tuple[int, Callable, Tuple]) -> Tuple[int, Any, float]:
+    index, func, args = task
+    tick = time.perf_counter()
+    result = func(*args)
+    return index, result, time.perf_counter() - tick
+
+
+def run_sweep(func: Callable, points: Sequence[Tuple], workers: Optional[int] = None,
+              checkpoint: "SweepCheckpoint" = None, cost_model: "CostModel" = None,
+              warm_start: bool = False, coordinator: "Coordinator" = None) -> List[Any]:
+    """Run ``func(*point)`` for every grid point on a pool of worker processes.
+
+    Each grid point is a tuple of positional arguments, e.g.
+    ``(network_config, distance, swapping_order)`` for ``simulate``.
+    Results are collected back in grid order, so the returned list lines up
+    with ``points`` exactly as the serial for-loop would.
+
+    Every ``simulate()`` call builds its own timeline from the seeds in the
+    network config, so a point gives the same number whichever worker runs it.
+
+    Args:
+        func (Callable): function to run, must be importable (picklable) by the workers.
+        points (Sequence[Tuple]): argument tuples, one per grid point.
+        workers (int): maximum number of worker processes (default: number of cores).
+            With ``workers <= 1`` the points are run serially in this process.
+        checkpoint (SweepCheckpoint): if given, every finished point is persisted
+            as soon as it completes and points already recorded are not rerun.
+            Points stopped by their budget (see `is_complete`) are not
+            persisted, a resumed sweep runs them again.
+        cost_model (CostModel): if given, points are dispatched longest predicted
+            runtime first, and the wall time of every simulated (not cached)
+            point is recorded to train it.
+        warm_start (bool): fork a child of this process per point instead of
+            using a pool, so the children start with everything the parent has
+            already imported and built (see `sweep.warm`). POSIX only.
+        coordinator (Coordinator): if given, the points are served to remote
+            workers instead of run here (see `sweep.distributed`); `workers`
+            and `warm_start` are then ignored.
+
+    Returns:
+        List[Any]: ``func`` results in the order of ``points``.
+    """
+    points = [tuple(args) for args in points]
+    results = [None] * len(points)
+    todo = list(range(len(points)))
+
+    if checkpoint is not None:
+        keys = [point_key(args) for args in points]
+        done = checkpoint.load()
+        todo = []
+        for i, key in enumerate(keys):
+            if key in done:
+                results[i] = done[key]
+            else:
+                todo.append(i)
+
+    def finished(index: int, result: Any, seconds: float) -> None:
+        results[index] = result
+        if checkpoint is not None and is_complete(result):
+            checkpoint.record(keys[index], result)
+        # a cache hit takes milliseconds whatever the point, it would teach the model nothing
+        if cost_model is not None and _simulated(result):
+            cost_model.record(points[index], seconds)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(todo))
+    if workers <= 1 and not warm_start and coordinator is None:
+        for i in todo:
+            finished(*_run_point((i, func, points[i])))
+        return results
+
+    if cost_model is not None:
+        # longest job first, so no straggler is left running alone at the end
+        todo = [todo[j] for j in cost_model.order([points[i] for i in todo])]
+    tasks = [(i, func, points[i]) for i in todo]
+    if coordinator is not None:
+        for i, result, seconds in coordinator.map(_run_point, tasks):
+            finished(i, result, seconds)
+        return results
+    if warm_start:
+        from .warm import fork_map
+
+        for i, result, seconds in fork_map(_run_point, tasks, workers):
+            finished(i, result, seconds)
+        return results
+    with multiprocessing.Pool(processes=workers) as pool:
+        # chunksize=1: a single point can run for minutes, don't batch them
+        for i, result, seconds in pool.imap_unordered(_run_point, tasks, chunksize=1):
+            finished(i, result, seconds)
+    return results
@@ -0,0 +1,237 @@
+"""Library entry point: run a swapping-order sweep and get its results as rows.
+
+::
+
+    from sweep.experiment import run_experiment
+
+    rows = run_experiment("networks/2RoutersMultiChannels.json", range(1000, 200001, 10000),
+                          ["left_to_right", "right_to_left"], mode="branch")
+
+Planning a sweep (`plan`) needs neither SeQUeNCe nor the rule modules; they
+are imported when the first run starts.
+"""
+
+import os
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from . import strategies as _strategies
+from .executor import is_complete, run_sweep
+
+if TYPE_CHECKING:
+    from .checkpoint import SweepCheckpoint
+    from .cost_model import CostModel
+    from .distributed import Coordinator
+    from .results_store import ResultsStore
+    from .simulation import Simulation
+
+MODES = ("grid", "branch", "batch", "replicas", "adaptive")
+
+Strategy = Union[str, Callable, None]
+Strategies = Union[Sequence[Strategy], Dict[str, Strategy]]
+
+
+def _labelled(strategies: Strategies) -> Tuple[List[str], List[Strategy]]:
+    # a dict gives its own labels, a list is labelled by registered name
+    if isinstance(strategies, dict):
+        return list(strategies), list(strategies.values())
+    return _strategies.names(strategies), list(strategies)
+
+
+def plan(network_config: str, distances: Sequence[float], strategies: Strategies, mode: str = "grid",
+         replicas: int = 1, batch_size: int = 1) -> List[Tuple[str, Tuple]]:
+    """The runs a sweep will make, without running (or importing) anything.
+
+    Args:
+        network_config (str): path of the network JSON.
+        distances (Sequence[float]): end-to-end distances (m).
+        strategies (Sequence[str | Callable] | Dict[str, str | Callable]): swapping
+            strategies, see `sweep.strategies`; a dict maps the label stored in
+            the `swapping_order` column to the strategy.
+        mode (str): one of `MODES` (see `run_experiment`).
+        replicas (int): runs per point in ``"replicas"`` mode.
+        batch_size (int): scenarios per timeline in ``"batch"`` mode.
+
+    Returns:
+        List[Tuple[str, Tuple]]: ``(method, arguments)`` of every `Simulation`
+        call, with strategies given by label. The ``"adaptive"`` mode only
+        lists its coarse pass, the refinement depends on the results.
+    """
+    if mode not in MODES:
+        raise ValueError("unknown mode %r (known: %s)" % (mode, ", ".join(MODES)))
+    labels, _ = _labelled(strategies)
+    distances = list(distances)
+    if mode == "branch":
+        return [("simulate_orders", (network_config, L, labels)) for L in distances]
+    grid = [(label, L) for label in labels for L in distances]
+    if mode == "batch":
+        scenarios = [(L, label, 0) for label, L in grid]
+        return [("simulate_batch", (network_config, scenarios[i:i + batch_size]))
+                for i in range(0, len(scenarios), batch_size)]
+    if mode == "replicas":
+        from .replicas import SEED_STRIDE
+
+        return [("simulate", (network_config, L, label, r * SEED_STRIDE))
+                for label, L in grid for r in range(replicas)]
+    return [("simulate", (network_config, L, label)) for label, L in grid]
+
+
+def run_experiment(network_config: str, distances: Sequence[float], strategies: Strategies,
+                   mode: str = "grid", simulation: Optional["Simulation"] = None, workers: Optional[int] = None,
+                   replicas: int = 1, batch_size: int = 1, checkpoint: "SweepCheckpoint" = None,
+                   cost_model: "CostModel" = None, warm_start: bool = False, store: "ResultsStore" = None,
+                   dataset: str = "rates", labels: Optional[Dict[str, Any]] = None,
+                   adaptive: Optional[Dict[str, Any]] = None,
+                   coordinator: "Coordinator" = None) -> List[Dict[str, Any]]:
+    """Sweep distance x swapping strategy on one network.
+
+    Modes:
+        ``"grid"``: one `Simulation.simulate` run per (strategy, distance).
+        ``"branch"``: one setup per distance, branched into the strategies
+        (`Simulation.simulate_orders`, POSIX only).
+        ``"batch"``: `batch_size` grid points as copies of the network under
+        one timeline (`Simulation.simulate_batch`, for small networks).
+        ``"replicas"``: `replicas` independently seeded runs per grid point,
+        reported as mean and confidence interval.
+        ``"adaptive"``: a refined distance grid per strategy (`adaptive_sweep`)
+        between the first and last of `distances`.
+
+    Args:
+        network_config (str): path of the network JSON.
+        distances (Sequence[float]): end-to-end distances (m).
+        strategies (Sequence[str | Callable] | Dict[str, str | Callable]): swapping
+            strategies, see `sweep.strategies`; a dict maps the label stored in
+            the `swapping_order` column to the strategy.
+        mode (str): one of `MODES`.
+        simulation (Simulation): run settings (None: the defaults). Reuse one
+            instance to keep its prebuilt topologies across sweeps.
+        workers (int): worker processes (see `run_sweep`).
+        replicas (int): runs per point in ``"replicas"`` mode.
+        batch_size (int): scenarios per timeline in ``"batch"`` mode.
+        checkpoint (SweepCheckpoint): optional checkpoint of the runs.
+        cost_model (CostModel): optional cost model to schedule the runs.
+        warm_start (bool): build the topology once here and fork a child per run.
+        store (ResultsStore): if given, the rows are appended to it.
+        dataset (str): value of the `dataset` column.
+        labels (Dict[str, Any]): extra columns of every row (e.g. ``{"memo_eff": "decreasing"}``).
+        adaptive (Dict[str, Any]): `adaptive_sweep` arguments overriding the
+            defaults (coarse step = grid step, min step = a quarter of it).
+        coordinator (Coordinator): serve the runs to remote workers instead
+            (see `sweep.distributed`).
+
+    Returns:
+        List[Dict[str, Any]]: one row per (strategy, distance) with the columns
+        `dataset`, `network`, `swapping_order`, `distance`, `rate`, `complete`
+        (False if a run was stopped by its budget and the rate is partial; plus
+        `rate_ci` and `replicas` in ``"replicas"`` mode) and the `labels`.
+    """
+    if mode not in MODES:
+        raise ValueError("unknown mode %r (known: %s)" % (mode, ", ".join(MODES)))
+    from .simulation import Simulation
+    from .topology import load_config
+
+    if simulation is None:
+        simulation = Simulation()
+    names, strategies = _labelled(strategies)
+    functions = [_strategies.resolve(strategy) for strategy in strategies]
+    distances = list(distances)
+    settings = dict(workers=workers, checkpoint=checkpoint, cost_model=cost_model, warm_start=warm_start,
+                    coordinator=coordinator)
+    if warm_start:
+        simulation.templates.prepare(load_config(network_config))
+
+    base = {"dataset": dataset, "network": os.path.basename(network_config)}
+    base.update(labels or {})
+    grid = [(name, function, L) for name, function in zip(names, functions) for L in distances]
+    rows: List[Dict[str, Any]] = []
+    if mode == "grid":
+        results = run_sweep(simulation.simulate, [(network_config, L, function) for _, function, L in grid],
+                            **settings)
+        rows = [dict(base, swapping_order=name, distance=L, rate=rate, complete=is_complete(rate))
+                for (name, _, L), rate in zip(grid, results)]
+    elif mode == "branch":
+        results = run_sweep(simulation.simulate_orders, [(network_config, L, functions) for L in distances],
+                            **settings)
+        rows = [dict(base, swapping_order=name, distance=L, rate=rates[i], complete=is_complete(rates[i]))
+                for i, name in enumerate(names) for L, rates in zip(distances, results)]
+    elif mode == "batch":
+        scenarios = [(L, function, 0) for _, function, L in grid]
+        batches = [(network_config, scenarios[i:i + batch_size]) for i in range(0, len(scenarios), batch_size)]
+        results = run_sweep(simulation.simulate_batch, batches, **settings)
+        rates = [rate for batch in results for rate in batch]
+        rows = [dict(base, swapping_order=name, distance=L, rate=rate, complete=is_complete(rate))
+                for (name, _, L), rate in zip(grid, rates)]
+    elif mode == "replicas":
+        from .replicas import run_replicas
+
+        stats = run_replicas(simulation.simulate, [(network_config, L, function) for _, function, L in grid],
+                             replicas, **settings)
+        rows = [dict(base, swapping_order=name, distance=L, rate=point.mean, rate_ci=point.half_width,
+                     replicas=replicas, complete=is_complete(point.samples))
+                for (name, _, L), point in zip(grid, stats)]
+    elif mode == "adaptive":
+        from .adaptive import adaptive_sweep
+
+        step = distances[1] - distances[0] if len(distances) > 1 else distances[0]
+        options = dict(start=distances[0], stop=distances[-1], coarse_step=step, min_step=step / 4,
+                       tolerance=0.5, floor=0)
+        options.update(adaptive or {})
+        for name, function in zip(names, functions):
+            points = adaptive_sweep(simulation.simulate, _PointMaker(network_config, function), **options,
+                                    **settings)
+            rows += [dict(base, swapping_order=name, distance=L, rate=rate, complete=is_complete(rate))
+                     for L, rate in points]
+
+    if store is not None:
+        store.append(rows)
+    return rows
+
+
+class _PointMaker:
+    # distance -> `simulate` arguments of one strategy, for `adaptive_sweep`
+    def __init__(self, network_config: str, function: Optional[Callable]):
+        self.network_config = network_config
+        self.function = function
+
+    def __call__(self, distance: float) -> Tuple:
+        return self.network_config, distance, self.function
+
+
+def parse_distances(text: str) -> List[float]:
+    """Distances from ``"1000,5000,9000"`` or a range ``"start:stop:step"`` (stop included).
+
+    Values may be written with a ``k`` suffix for kilometres (``"1k:200k:10k"``).
+    """
+    def value(token: str) -> float:
+        token = token.strip()
+        if token.lower().endswith("k"):
+            return float(token[:-1]) * 1000
+        return float(token)
+
+    if ":" in text:
+        parts = [value(token) for token in text.split(":")]
+        if len(parts) != 3 or parts[2] <= 0:
+            raise ValueError("distance range must be start:stop:step with step > 0, got %r" % text)
+        start, stop, step = parts
+        count = int((stop - start) // step) + 1
+        return [_number(start + i * step) for i in range(count)]
+    return [_number(value(token)) for token in text.split(",") if token.strip()]
+
+
+def _number(x: float) -> Union[int, float]:
+    # keep integer distances integer, as in the scripts' range() grids (and their checkpoint keys)
+    return int(x) if float(x).is_integer() else x
+
+
+def rows_table(rows: Iterable[Dict[str, Any]], columns: Optional[Sequence[str]] = None) -> str:
+    """Format result rows as an aligned text table."""
+    rows = list(rows)
+    if columns is None:
+        columns = []
+        for row in rows:
+            columns.extend(name for name in row if name not in columns)
+    cells = [[str(name) for name in columns]]
+    cells += [["%g" % row[name] if isinstance(row.get(name), float) else str(row.get(name, ""))
+               for name in columns] for row in rows]
+    widths = [max(len(line[i]) for line in cells) for i in range(len(columns))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip()
+                     for line in cells)
@@ -0,0 +1,184 @@
+"""Generate network configs with classical connections between neighbours only.
+
+The hand-written networks declare all-to-all ``cconnections`` (N(N-1)/2
+entries, each built into two `ClassicalChannel` objects). The protocols only
+need the direct ones between routers sharing a quantum connection: a
+reservation travels hop by hop, and entanglement generation talks to the
+neighbour and the BSM node in between. Swapping, purification and the
+resource managers message whichever router a memory is entangled with;
+`ConfigRouterNetTopo` forwards those messages over the neighbour channels
+(see `sweep.topology.ClassicalRoutes`), with the delay of the whole path.
+
+In the all-to-all files every pair of routers is one hop apart, so rates of a
+sparse network are not comparable with its all-to-all version.
+
+`chain_config` generates linear chains of any length with a memory profile
+(constant, increasing or decreasing link capacities, like the ``Dec``
+variants)::
+
+    from sweep.generate import chain_config, write_config
+
+    # 64 routers, 2 memories per link
+    write_config(chain_config(64, "constant", capacity=2), "networks/chain64.json")
+"""
+
+import copy
+import json
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from sequence.topology.router_net_topo import RouterNetTopo
+from sequence.topology.topology import Topology as Topo
+
+Link = Tuple[str, str]
+
+
+def neighbour_cconnections(qconnections: Iterable[dict], distance: Optional[float] = None) -> List[dict]:
+    """One classical connection per pair of routers sharing a quantum connection.
+
+    Args:
+        qconnections (Iterable[dict]): ``qconnections`` entries of a config.
+        distance (float): distance of the classical connections (None: the
+            distance of the quantum connection).
+
+    Returns:
+        List[dict]: ``cconnections`` entries, in the order of the quantum connections.
+    """
+    cconnections = []
+    seen = set()
+    for qc in qconnections:
+        pair = frozenset((qc[Topo.CONNECT_NODE_1], qc[Topo.CONNECT_NODE_2]))
+        if pair in seen:
+            continue
+        seen.add(pair)
+        cconnections.append({Topo.CONNECT_NODE_1: qc[Topo.CONNECT_NODE_1],
+                             Topo.CONNECT_NODE_2: qc[Topo.CONNECT_NODE_2],
+                             Topo.DISTANCE: qc[Topo.DISTANCE] if distance is None else distance})
+    return cconnections
+
+
+def sparse_config(config: dict) -> dict:
+    """Copy of `config` with its classical connections reduced to the neighbour ones.
+
+    Declared connections between neighbours keep their distance and delay,
+    missing ones get the distance of their quantum connection.
+    """
+    config = copy.deepcopy(config)
+    declared = {frozenset((cc[Topo.CONNECT_NODE_1], cc[Topo.CONNECT_NODE_2])): cc
+                for cc in config.get(Topo.ALL_CC_CONNECT, [])}
+    config[Topo.ALL_CC_CONNECT] = [
+        declared.get(frozenset((cc[Topo.CONNECT_NODE_1], cc[Topo.CONNECT_NODE_2])), cc)
+        for cc in neighbour_cconnections(config.get(Topo.ALL_QC_CONNECT, []))]
+    return config
+
+
+def network_config(routers: Sequence[str], links: Iterable[Link], distance: float = 1000,
+                   memo_size: Union[int, Dict[str, int]] = 50, attenuation: float = 0,
+                   seeds: Optional[Dict[str, int]] = None, stop_time: float = 2e12) -> dict:
+    """Config of a network of quantum routers with neighbour-only classical connections.
+
+    Args:
+        routers (Sequence[str]): router names.
+        links (Iterable[Tuple[str, str]]): pairs of routers connected by a
+            ``meet_in_the_middle`` quantum connection (and a classical one).
+        distance (float): length of every link (m); `apply_overrides` can
+            respread an end-to-end distance over them later.
+        memo_size (int | Dict[str, int]): memories per router, or per router name.
+        attenuation (float): attenuation of every quantum connection.
+        seeds (Dict[str, int]): seed per router name (default: their index).
+        stop_time (float): timeline stop time (ps).
+
+    Returns:
+        dict: the config, as `load_config` would read it from JSON.
+    """
+    names = set(routers)
+    nodes = []
+    for i, name in enumerate(routers):
+        nodes.append({Topo.NAME: name,
+                      Topo.TYPE: RouterNetTopo.QUANTUM_ROUTER,
+                      Topo.SEED: seeds[name] if seeds is not None else i,
+                      RouterNetTopo.MEMO_ARRAY_SIZE: memo_size[name] if isinstance(memo_size, dict) else memo_size})
+    qconnections = []
+    for node1, node2 in links:
+        if node1 not in names or node2 not in names:
+            raise ValueError("link %s-%s between unknown routers" % (node1, node2))
+        qconnections.append({Topo.CONNECT_NODE_1: node1,
+                             Topo.CONNECT_NODE_2: node2,
+                             Topo.DISTANCE: distance,
+                             Topo.ATTENUATION: attenuation,
+                             Topo.TYPE: RouterNetTopo.MEET_IN_THE_MID})
+    return {Topo.ALL_NODE: nodes,
+            Topo.ALL_QC_CONNECT: qconnections,
+            RouterNetTopo.IS_PARALLEL: False,
+            Topo.STOP_TIME: stop_time,
+            Topo.ALL_CC_CONNECT: neighbour_cconnections(qconnections)}
+
+
+PROFILES = ("constant", "increasing", "decreasing")
+
+
+def link_capacities(links: int, profile: Union[str, Sequence[int]] = "constant", capacity: int = 1) -> List[int]:
+    """Memories per link along a chain, from left to right.
+
+    Args:
+        links (int): number of links.
+        profile (str | Sequence[int]): ``"constant"`` (`capacity` per link),
+            ``"increasing"`` (``capacity * (i + 1)`` on link i) or
+            ``"decreasing"`` (the increasing profile reversed); or the
+            capacities themselves.
+        capacity (int): capacity of the first (smallest) link of the profile.
+
+    Returns:
+        List[int]: one capacity per link.
+    """
+    if not isinstance(profile, str):
+        if len(profile) != links:
+            raise ValueError("%d link capacities for %d links" % (len(profile), links))
+        return list(profile)
+    if profile == "constant":
+        return [capacity] * links
+    if profile == "increasing":
+        return [capacity * (i + 1) for i in range(links)]
+    if profile == "decreasing":
+        return [capacity * (links - i) for i in range(links)]
+    raise ValueError("unknown memory profile %r (known: %s)" % (profile, ", ".join(PROFILES)))
+
+
+def chain_routers(size: int) -> List[str]:
+    """Router names of a chain of `size` routers: ``Nodei, r1, ..., Nodej``, as in the shipped networks."""
+    if size < 2:
+        raise ValueError("a chain needs at least 2 routers, got %d" % size)
+    return ["Nodei"] + ["r%d" % i for i in range(1, size - 1)] + ["Nodej"]
+
+
+def chain_config(size: int, profile: Union[str, Sequence[int]] = "constant", capacity: int = 1,
+                 distance: float = 1000, **options) -> dict:
+    """Config of a linear chain of `size` routers.
+
+    Every router gets the memories of the links it ends, as in the shipped
+    files: ``2RoutersMultiChannelsDec`` is ``chain_config(4, [4, 2, 1])``
+    (memo sizes 4, 6, 3, 1) and ``2RoutersMultiChannels`` is
+    ``chain_config(4, [1, 2, 4])``. The classical connections are the
+    neighbour ones (see `network_config`).
+
+    Args:
+        size (int): number of routers, end nodes included (>= 2).
+        profile (str | Sequence[int]): link capacities, see `link_capacities`.
+        capacity (int): capacity of the smallest link of a named profile.
+        distance (float): length of every link (m).
+        **options: other `network_config` arguments (attenuation, seeds, stop_time).
+
+    Returns:
+        dict: the config.
+    """
+    routers = chain_routers(size)
+    capacities = link_capacities(size - 1, profile, capacity)
+    memo_size = {name: (capacities[i - 1] if i > 0 else 0) + (capacities[i] if i < size - 1 else 0)
+                 for i, name in enumerate(routers)}
+    return network_config(routers, zip(routers, routers[1:]), distance=distance, memo_size=memo_size, **options)
+
+
+def write_config(config: dict, path: str) -> None:
+    """Write a generated config as a network JSON, in the layout of the files under ``networks/``."""
+    with open(path, "w") as file:
+        json.dump(config, file, indent=2)
+        file.write("\n")
@@ -0,0 +1,192 @@
+"""Memory manager that indexes its memories by state and remote node.
+
+The swapping and purification rule conditions look for a partner memory:
+ENTANGLED with a given remote node, among the reserved indices, above a
+fidelity. With the plain `MemoryManager` that is a scan of every memory of
+the node for every memory update, quadratic in the memories per burst of
+updates. `IndexedMemoryManager` keeps, for each ``(state, remote_node)``, the
+memories in that state in memory-array order, updated as the memory infos
+change state, so `lookup` hands a condition only the candidates. The rules
+in ``swaping_rules`` use `lookup` when the manager has it and scan otherwise,
+so plain SeQUeNCe topologies keep working. `sweep.rule_index.install_indexes`
+installs it on the routers.
+
+For purification the entangled memories are also indexed by remote node and
+fidelity bucket (`FIDELITY_BUCKET` wide), and by remote node in the order they
+were entangled; `purification_partner` pairs a memory under one of the
+policies of ``swaping_rules`` (``exact``, ``nearest``, ``oldest``).
+"""
+
+from bisect import bisect_left, insort
+from typing import TYPE_CHECKING, Container, Dict, List, Optional, Tuple
+
+from sequence.resource_management.memory_manager import MemoryInfo, MemoryManager
+
+if TYPE_CHECKING:
+    from sequence.components.memory import Memory, MemoryArray
+
+Key = Tuple[str, Optional[str]]
+
+# width of the fidelity buckets of the purification index
+FIDELITY_BUCKET = 1e-3
+
+
+def _bucket(fidelity: float) -> int:
+    return int(fidelity / FIDELITY_BUCKET)
+
+
+class IndexedMemoryInfo(MemoryInfo):
+    """`MemoryInfo` that keeps its manager's index up to date on every state change."""
+
+    def __init__(self, manager: "IndexedMemoryManager", memory: "Memory", index: int, state="RAW"):
+        super().__init__(memory, index, state)
+        self.manager = manager
+
+    def __lt__(self, other: "IndexedMemoryInfo") -> bool:
+        # bucket order: memory-array order, as a scan of the manager would see them
+        return self.index < other.index
+
+    def to_raw(self) -> None:
+        key, fidelity = (self.state, self.remote_node), self.fidelity
+        super().to_raw()
+        self.manager._move(self, key, fidelity)
+
+    def to_occupied(self) -> None:
+        key, fidelity = (self.state, self.remote_node), self.fidelity
+        super().to_occupied()
+        self.manager._move(self, key, fidelity)
+
+    def to_entangled(self) -> None:
+        key, fidelity = (self.state, self.remote_node), self.fidelity
+        super().to_entangled()
+        self.manager._move(self, key, fidelity)
+
+
+class IndexedMemoryManager(MemoryManager):
+    """`MemoryManager` with an index of its memories by ``(state, remote_node)``.
+
+    Attributes:
+        memory_map (List[IndexedMemoryInfo]): memory infos, in memory-array order.
+    """
+
+    def __init__(self, memory_array: "MemoryArray"):
+        super().__init__(memory_array)
+        self.memory_map = [IndexedMemoryInfo(self, memory, index) for index, memory in enumerate(memory_array)]
+        # by name rather than id(): the topology snapshots pickle the managers
+        self._by_memory: Dict[str, IndexedMemoryInfo] = {info.memory.name: info for info in self.memory_map}
+        self._buckets: Dict[Key, List[IndexedMemoryInfo]] = {}
+        for info in self.memory_map:
+            self._buckets.setdefault((info.state, info.remote_node), []).append(info)
+        # entangled memories only: by (remote node, fidelity bucket) in memory-array
+        # order, the non-empty buckets of each remote node, and by remote node in
+        # entanglement order (a dict as an ordered set)
+        self._by_fidelity: Dict[Tuple[str, int], List[IndexedMemoryInfo]] = {}
+        self._fidelity_buckets: Dict[str, List[int]] = {}
+        self._entangled_order: Dict[str, Dict[IndexedMemoryInfo, None]] = {}
+
+    def _move(self, info: IndexedMemoryInfo, old_key: Key, old_fidelity: float) -> None:
+        new_key = (info.state, info.remote_node)
+        if new_key != old_key:
+            bucket = self._buckets[old_key]
+            del bucket[bisect_left(bucket, info)]
+            insort(self._buckets.setdefault(new_key, []), info)
+        # re-entangling (e.g. after purification) changes fidelity and age in place
+        if old_key[0] == "ENTANGLED":
+            self._unpair(info, old_key[1], old_fidelity)
+        if new_key[0] == "ENTANGLED":
+            self._pairable(info)
+
+    def _pairable(self, info: IndexedMemoryInfo) -> None:
+        remote_node, bucket = info.remote_node, _bucket(info.fidelity)
+        memories = self._by_fidelity.get((remote_node, bucket))
+        if memories is None:
+            memories = self._by_fidelity[(remote_node, bucket)] = []
+            insort(self._fidelity_buckets.setdefault(remote_node, []), bucket)
+        insort(memories, info)
+        self._entangled_order.setdefault(remote_node, {})[info] = None
+
+    def _unpair(self, info: IndexedMemoryInfo, remote_node: str, fidelity: float) -> None:
+        bucket = _bucket(fidelity)
+        memories = self._by_fidelity[(remote_node, bucket)]
+        del memories[bisect_left(memories, info)]
+        if not memories:
+            del self._by_fidelity[(remote_node, bucket)]
+            buckets = self._fidelity_buckets[remote_node]
+            del buckets[bisect_left(buckets, bucket)]
+        del self._entangled_order[remote_node][info]
+
+    def lookup(self, state: str, remote_node: Optional[str] = None) -> List[MemoryInfo]:
+        """Memories in `state` with `remote_node`, in memory-array order.
+
+        The list is the live index: read it, don't modify it, and don't keep
+        it across memory updates.
+        """
+        return self._buckets.get((state, remote_node), [])
+
+    def purification_partner(self, memory_info: MemoryInfo, members: Container[int], below: float,
+                             policy: str = "exact") -> Optional[MemoryInfo]:
+        """Entangled memory to purify `memory_info` with.
+
+        Candidates are the other memories entangled with the same remote node,
+        with an index in `members` and a fidelity under `below`.
+
+        Args:
+            memory_info (MemoryInfo): the entangled memory to purify.
+            members (Container[int]): memory indices of the rule.
+            below (float): fidelity threshold of the reservation.
+            policy (str): ``"exact"``: the first candidate, in memory order, of
+                equal fidelity; ``"nearest"``: the candidate of closest
+                fidelity (ties: memory order); ``"oldest"``: the candidate
+                entangled first (ties: memory order).
+
+        Returns:
+            MemoryInfo: the partner, None if there is no candidate.
+        """
+        remote_node, fidelity = memory_info.remote_node, memory_info.fidelity
+        if policy == "exact":
+            for info in self._by_fidelity.get((remote_node, _bucket(fidelity)), ()):
+                if info is not memory_info and info.fidelity == fidelity and info.index in members:
+                    return info
+            return None
+        if policy == "nearest":
+            return self._nearest(memory_info, members, below)
+        if policy == "oldest":
+            best = None
+            for info in self._entangled_order.get(remote_node, ()):
+                if best is not None and info.entangle_time != best.entangle_time:
+                    break
+                if (info is not memory_info and info.fidelity < below and info.index in members
+                        and (best is None or info.index < best.index)):
+                    best = info
+            return best
+        raise ValueError("unknown pairing policy %r" % policy)
+
+    def _nearest(self, memory_info: MemoryInfo, members: Container[int], below: float) -> Optional[MemoryInfo]:
+        # visit the buckets of the remote node outwards from the memory's own,
+        # until the next one cannot hold anything closer than the best so far
+        remote_node, fidelity = memory_info.remote_node, memory_info.fidelity
+        buckets = self._fidelity_buckets.get(remote_node, [])
+        own = _bucket(fidelity)
+        high = bisect_left(buckets, own)
+        low = high - 1
+        best, best_key = None, None
+        while low >= 0 or high < len(buckets):
+            # lower bounds of the distance to a bucket's memories, one bucket width of slack
+            low_bound = (own - buckets[low] - 1) * FIDELITY_BUCKET if low >= 0 else float("inf")
+            high_bound = (buckets[high] - own - 1) * FIDELITY_BUCKET if high < len(buckets) else float("inf")
+            if best_key is not None and min(low_bound, high_bound) > best_key[0]:
+                break
+            if high_bound <= low_bound:
+                bucket, high = buckets[high], high + 1
+            else:
+                bucket, low = buckets[low], low - 1
+            for info in self._by_fidelity[(remote_node, bucket)]:
+                if info is memory_info or info.fidelity >= below or info.index not in members:
+                    continue
+                key = (abs(info.fidelity - fidelity), info.index)
+                if best_key is None or key < best_key:
+                    best, best_key = info, key
+        return best
+
+    def get_info_by_memory(self, memory: "Memory") -> MemoryInfo:
+        return self._by_memory[memory.name]
@@ -0,0 +1,14 @@
+"""Default values of the swept simulation parameters.
+
+Kept apart from `sweep.simulation` so that specs can be checked without
+loading SeQUeNCe.
+"""
+
+# values applied by `Simulation.set_parameters`, also part of the result cache key
+DEFAULT_PARAMETERS = {"memo_freq": -1,
+                      "memo_expire": 10e-3,  # (10 ms)
+                      "memo_efficiency": 1,
+                      "memo_fidelity": 0.99,
+                      "wave_length": 500,
+                      "detector_efficiency": 1,
+                      "swapping_success_rate": 1}
@@ -0,0 +1,97 @@
+import math
+from typing import TYPE_CHECKING, Callable, List, Optional, Sequence, Tuple
+
+from .executor import run_sweep
+
+if TYPE_CHECKING:
+    from .checkpoint import SweepCheckpoint
+    from .cost_model import CostModel
+    from .distributed import Coordinator
+
+# seed distance between replicas, larger than the number of nodes in any network
+SEED_STRIDE = 1000
+
+
+class ReplicaStats:
+    """Mean and confidence interval over the replicas of one grid point.
+
+    Attributes:
+        samples (List[float]): one result per replica, in replica order.
+        confidence (float): confidence level of the interval.
+        mean (float): sample mean.
+        std (float): sample standard deviation (0 with a single replica).
+        half_width (float): half width of the Student-t confidence interval
+            (inf with a single replica).
+    """
+
+    def __init__(self, samples: Sequence[float], confidence: float = 0.95):
+        from scipy.stats import t
+
+        self.samples = list(samples)
+        self.confidence = confidence
+        n = len(self.samples)
+        self.mean = sum(self.samples) / n
+        if n > 1:
+            self.std = math.sqrt(sum((x - self.mean) ** 2 for x in self.samples) / (n - 1))
+            self.half_width = t.ppf(0.5 + confidence / 2, n - 1) * self.std / math.sqrt(n)
+        else:
+            self.std = 0.0
+            self.half_width = math.inf
+
+    def is_significant(self) -> bool:
+        """True if the interval excludes zero (useful for paired differences)."""
+        return abs(self.mean) > self.half_width
+
+    def __str__(self):
+        return "%g +/- %g (%d%% CI, n=%d)" % (self.mean, self.half_width, round(self.confidence * 100), len(self.samples))
+
+
+def replicate(points: Sequence[Tuple], replicas: int) -> List[Tuple]:
+    """Expand grid points into replica points.
+
+    Replica ``r`` of a point gets ``r * SEED_STRIDE`` appended as its
+    ``seed_offset`` argument. The offset only depends on ``r``, so replica ``r``
+    of two points that differ only by swapping order shares its random numbers
+    (common random numbers) and their difference is a paired sample.
+
+    Returns:
+        List[Tuple]: point-major list, ``replicas`` entries per point.
+    """
+    return [tuple(point) + (r * SEED_STRIDE,) for point in points for r in range(replicas)]
+
+
+def run_replicas(func: Callable, points: Sequence[Tuple], replicas: int, workers: Optional[int] = None,
+                 checkpoint: "SweepCheckpoint" = None, confidence: float = 0.95,
+                 cost_model: "CostModel" = None, warm_start: bool = False,
+                 coordinator: "Coordinator" = None) -> List[ReplicaStats]:
+    """Run `replicas` independently seeded copies of every grid point in parallel.
+
+    Args:
+        func (Callable): run function taking the point arguments followed by a
+            ``seed_offset`` argument (e.g. ``simulate(network_config, distance, swapping_order, seed_offset)``).
+        points (Sequence[Tuple]): argument tuples, one per grid point.
+        replicas (int): number of replicas per point.
+        workers (int): maximum number of worker processes (see `run_sweep`).
+        checkpoint (SweepCheckpoint): optional checkpoint of the replica runs.
+        cost_model (CostModel): optional cost model to schedule the runs (see `run_sweep`).
+        warm_start (bool): fork the runs from this process (see `run_sweep`).
+        coordinator (Coordinator): serve the runs to remote workers (see `run_sweep`).
+        confidence (float): confidence level of the reported intervals.
+
+    Returns:
+        List[ReplicaStats]: one summary per point, in grid order.
+    """
+    results = run_sweep(func, replicate(points, replicas), workers=workers, checkpoint=checkpoint,
+                        cost_model=cost_model, warm_start=warm_start, coordinator=coordinator)
+    return [ReplicaStats(results[i * replicas:(i + 1) * replicas], confidence)
+            for i in range(len(points))]
+
+
+def paired_difference(a: ReplicaStats, b: ReplicaStats) -> ReplicaStats:
+    """Confidence interval of ``a - b`` from replicas run with common random numbers.
+
+    The two points must have been run with the same replicas, so sample ``i``
+    of `a` and of `b` used the same seeds.
+    """
+    assert len(a.samples) == len(b.samples), "paired replicas need the same replica count"
+    return ReplicaStats([x - y for x, y in zip(a.samples, b.samples)], a.confidence)
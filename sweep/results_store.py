@@ -0,0 +1,294 @@
+"""Columnar store of sweep results.
+
+Every row holds the full parameter set of one run (network, swapping order,
+distance, ...) next to its metrics (rate, ...). Rows are appended as binary
+``.npz`` segments, one array per column, and read back as a single table that
+can be filtered with indexed equality queries, e.g.::
+
+    store = ResultsStore("data/results")
+    rows = store.query(network="2RoutersMultiChannelsDec.json", swapping_order="right_to_left")
+    ax.plot(rows["distance"] / 1000, rows["rate"])
+
+Rows written by `run_experiment` have a `complete` column, 0 where the run
+was stopped by its budget and the rate is partial.
+
+The legacy ``np.savetxt`` files under ``data/rates/`` can be imported with
+``python -m sweep.results_store data/rates``; `open_store` does it on its own
+when the store is empty (``data/results/`` is not tracked). The ``data/ratesReserv/`` files
+hold 10 rates each on an unrecorded grid: import them with `import_savetxt`
+and their actual distances.
+"""
+
+import glob
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# distance grid of the legacy sweeps, the text files only hold the rates
+LEGACY_DISTANCES = list(range(1000, 200000 + 1, 10000))
+
+_FILENAME_FIELD = re.compile(r"\(([^=()]+)=([^()]*)\)")
+_FILENAME_KEYS = {"N": "network", "Swapping_order": "swapping_order",
+                  "memo_eff": "memo_eff", "cohTime": "coherence_time"}
+
+
+def _column_array(values: Sequence[Any]) -> np.ndarray:
+    if any(isinstance(v, str) for v in values):
+        return np.array(["" if v is None else str(v) for v in values])
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def _missing(array: np.ndarray, length: int) -> np.ndarray:
+    if array.dtype.kind == "U":
+        return np.full(length, "", dtype=array.dtype)
+    return np.full(length, np.nan)
+
+
+class ResultsStore:
+    """Append-only columnar results table on disk.
+
+    Attributes:
+        directory (str): directory holding the ``segment-*.npz`` files.
+        max_segments (int): number of segments after which `append` compacts them into one.
+    """
+
+    def __init__(self, directory: str = "data/results", max_segments: int = 64):
+        self.directory = directory
+        self.max_segments = max_segments
+        self._segments: List[str] = []
+        self._columns: Dict[str, np.ndarray] = {}
+        self._indices: Dict[str, Dict[Any, np.ndarray]] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _segment_paths(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, "segment-*.npz")))
+
+    def _write_segment(self, columns: Dict[str, np.ndarray]) -> str:
+        name = "segment-%019d-%d.npz" % (time.time_ns(), os.getpid())
+        path = os.path.join(self.directory, name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            np.savez(file, **columns)
+        os.replace(tmp_path, path)
+        return path
+
+    def append(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Append rows as a new segment.
+
+        Args:
+            rows (Iterable[Dict[str, Any]]): one dict of parameters and metrics per run.
+                String values become text columns, everything else float columns.
+
+        Returns:
+            int: number of appended rows.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        names = []
+        for row in rows:
+            names.extend(name for name in row if name not in names)
+        created = time.time()
+        columns = {name: _column_array([row.get(name) for row in rows]) for name in names}
+        columns["created"] = np.full(len(rows), created)
+        self._write_segment(columns)
+        if len(self._segment_paths()) > self.max_segments:
+            self.compact()
+        return len(rows)
+
+    def load(self) -> Dict[str, np.ndarray]:
+        """Return the whole table as a dict of column arrays.
+
+        Segments are only re-read when the set of segment files changed.
+        """
+        while True:
+            paths = self._segment_paths()
+            if paths == self._segments:
+                return self._columns
+            try:
+                columns = self._read(paths)
+                break
+            except FileNotFoundError:
+                # another process compacted the segments meanwhile: list them again
+                continue
+
+        self._segments = paths
+        self._columns = columns
+        self._indices = {}
+        return columns
+
+    def _read(self, paths: Sequence[str]) -> Dict[str, np.ndarray]:
+        parts = []
+        for path in paths:
+            with np.load(path) as segment:
+                parts.append({name: segment[name] for name in segment.files})
+        names = []
+        for part in parts:
+            names.extend(name for name in part if name not in names)
+
+        columns = {}
+        for name in names:
+            template = next(part[name] for part in parts if name in part)
+            arrays = []
+            for part in parts:
+                length = len(next(iter(part.values())))
+                arrays.append(part[name] if name in part else _missing(template, length))
+            columns[name] = np.concatenate(arrays)
+        return columns
+
+    def _index(self, name: str) -> Dict[Any, np.ndarray]:
+        if name not in self._indices:
+            values, inverse = np.unique(self._columns[name], return_inverse=True)
+            order = np.argsort(inverse, kind="stable")
+            bounds = np.searchsorted(inverse[order], np.arange(len(values) + 1))
+            self._indices[name] = {values[i].item(): order[bounds[i]:bounds[i + 1]]
+                                   for i in range(len(values))}
+        return self._indices[name]
+
+    def query(self, unique: Sequence[str] = None, sort_by: str = "distance", **filters) -> Dict[str, np.ndarray]:
+        """Select rows by equality on any columns.
+
+        Args:
+            unique (Sequence[str]): if given, keep only the most recently appended
+                row for each distinct combination of these columns (e.g. ``("distance",)``
+                after a sweep was rerun).
+            sort_by (str): column to sort the result by (ignored if absent).
+            **filters: ``column=value`` equality conditions, answered from a
+                per-column value -> row ids index.
+
+        Returns:
+            Dict[str, np.ndarray]: the selected rows, column by column.
+        """
+        columns = self.load()
+        if not columns:
+            return {}
+        rows = None
+        for name, value in filters.items():
+            if name not in columns:
+                matched = np.array([], dtype=int)
+            else:
+                matched = self._index(name).get(value, np.array([], dtype=int))
+            rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+        if rows is None:
+            rows = np.arange(len(columns["created"]))
+
+        if unique:
+            latest = {}
+            for row in rows[np.argsort(columns["created"][rows], kind="stable")]:
+                latest[tuple(columns[name][row].item() for name in unique)] = row
+            rows = np.array(sorted(latest.values()), dtype=int)
+        if sort_by in columns and len(rows):
+            rows = rows[np.argsort(columns[sort_by][rows], kind="stable")]
+        return {name: column[rows] for name, column in columns.items()}
+
+    def compact(self) -> None:
+        """Merge all segments into a single one.
+
+        Only the segments listed when the compaction starts are merged and
+        removed, so rows appended meanwhile stay in their own segment; two
+        processes compacting at once take turns on a lock file. POSIX only.
+        """
+        import fcntl
+
+        with open(os.path.join(self.directory, ".compact.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            old_paths = self._segment_paths()
+            if len(old_paths) <= 1:
+                return
+            self._write_segment(self._read(old_paths))
+            for path in old_paths:
+                os.remove(path)
+
+
+def parse_result_filename(filename: str) -> Dict[str, str]:
+    """Parse the parameters out of a legacy result file name.
+
+    ``network(N=2Routers.json)(Swapping_order=left_to_right)(memo_eff=decreasing).txt``
+    gives ``{"network": "2Routers.json", "swapping_order": "left_to_right",
+    "memo_eff": "decreasing"}``.
+    """
+    params = {}
+    for key, value in _FILENAME_FIELD.findall(os.path.basename(filename)):
+        params[_FILENAME_KEYS.get(key, key)] = value
+    return params
+
+
+def import_savetxt(store: ResultsStore, filename: str, distances: Optional[Sequence[float]] = None,
+                   dataset: str = None) -> int:
+    """Import one legacy ``np.savetxt`` rate file into the store.
+
+    Args:
+        store (ResultsStore): store to append to.
+        filename (str): path of the text file, one rate per line.
+        distances (Sequence[float]): distance (m) of each line; only the
+            ``rates`` files have a known grid (`LEGACY_DISTANCES`), any other
+            file needs its own.
+        dataset (str): value of the `dataset` column (default: parent directory name).
+
+    Returns:
+        int: number of imported rows.
+
+    Raises:
+        ValueError: no distances are known for the file, or its number of
+            lines differs from them.
+    """
+    rates = np.atleast_1d(np.loadtxt(filename))
+    params = parse_result_filename(filename)
+    params["dataset"] = dataset or os.path.basename(os.path.dirname(os.path.abspath(filename)))
+    if distances is None:
+        if params["dataset"] != "rates":
+            raise ValueError("%s: distance grid unknown for dataset %r, pass its distances"
+                             % (filename, params["dataset"]))
+        distances = LEGACY_DISTANCES
+    if len(rates) != len(distances):
+        raise ValueError("%s: %d rates for %d distances" % (filename, len(rates), len(distances)))
+    rows = [dict(params, distance=float(distance), rate=float(rate))
+            for distance, rate in zip(distances, rates)]
+    return store.append(rows)
+
+
+def import_directory(store: ResultsStore, directory: str, verbose: bool = False) -> int:
+    """Import every legacy ``*.txt`` rate file of `directory` that has a known distance grid.
+
+    Files `import_savetxt` can't place (see there) are skipped.
+
+    Returns:
+        int: number of imported rows.
+    """
+    count = 0
+    for filename in sorted(glob.glob(os.path.join(directory, "*.txt"))):
+        try:
+            rows = import_savetxt(store, filename)
+        except ValueError as error:
+            if verbose:
+                print("skipped:", error, file=sys.stderr)
+            continue
+        if verbose:
+            print(filename, rows)
+        count += rows
+    return count
+
+
+def open_store(directory: str = "data/results", legacy: Sequence[str] = ("data/rates",)) -> ResultsStore:
+    """The store in `directory`, filled from the committed legacy rate files if it is empty.
+
+    The store itself is not tracked by git, so on a fresh clone this gives
+    the plot scripts the rates they used to read from ``data/rates/``.
+    """
+    store = ResultsStore(directory)
+    if not store.load():
+        for legacy_directory in legacy:
+            import_directory(store, legacy_directory)
+        store.compact()
+    return store
+
+
+if __name__ == "__main__":
+    store = ResultsStore()
+    for directory in sys.argv[1:] or ["data/rates"]:
+        import_directory(store, directory, verbose=True)
+    store.compact()
@@ -0,0 +1,181 @@
+"""Rule manager that only evaluates the rules watching the updated memory.
+
+SeQUeNCe's `ResourceManager.update` tries every rule of the router, in
+priority order, on every memory update: the EG, EP and ES rules of every
+reservation, on memories they can never match. A rule can declare the memory
+indices it watches as its ``memory_indices`` attribute (its condition must
+then be false on every other memory); `IndexedRuleManager` keeps, per memory
+index, the rules watching it, so an update only evaluates those, plus the
+rules that declared nothing. The order of evaluation, and so which rule
+fires, is the one of `RuleManager`.
+
+`install_indexes` gives every router of a topology an `IndexedResourceManager`,
+with this rule manager and the memory manager of `sweep.memory_index`.
+"""
+
+from bisect import bisect_left
+from heapq import merge
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from sequence.resource_management.resource_manager import ResourceManager
+from sequence.resource_management.rule_manager import Rule, RuleManager
+from sequence.topology.router_net_topo import RouterNetTopo
+from sequence.utils import log
+
+from .memory_index import IndexedMemoryManager
+
+if TYPE_CHECKING:
+    from sequence.components.memory import Memory
+    from sequence.entanglement_management.entanglement_protocol import EntanglementProtocol
+    from sequence.resource_management.memory_manager import MemoryInfo
+    from sequence.topology.node import QuantumRouter
+
+# (priority, -load serial): the order of `RuleManager.rules`, where a rule
+# goes before the loaded rules of the same priority
+Key = Tuple[int, int]
+
+
+class _RuleList:
+    # rules ordered by key, for one memory index (or for the unscoped rules)
+    __slots__ = ("keys", "rules")
+
+    def __init__(self):
+        self.keys: List[Key] = []
+        self.rules: List[Rule] = []
+
+    def insert(self, key: Key, rule: Rule) -> None:
+        position = bisect_left(self.keys, key)
+        self.keys.insert(position, key)
+        self.rules.insert(position, rule)
+
+    def remove(self, key: Key) -> None:
+        position = bisect_left(self.keys, key)
+        del self.keys[position]
+        del self.rules[position]
+
+
+class IndexedRuleManager(RuleManager):
+    """`RuleManager` with an index of its rules by the memory indices they watch.
+
+    Attributes:
+        rules (List[Rule]): every installed rule, in evaluation order.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._serial = 0
+        self._keys: Dict[Rule, Key] = {}
+        self._by_index: Dict[int, _RuleList] = {}
+        self._unscoped = _RuleList()
+
+    @staticmethod
+    def watched(rule: Rule) -> Optional[Iterable[int]]:
+        """Memory indices `rule` declared it watches (None: every memory)."""
+        return getattr(rule, "memory_indices", None)
+
+    def load(self, rule: Rule) -> bool:
+        super().load(rule)
+        key = self._keys[rule] = (rule.priority, -self._serial)
+        self._serial += 1
+        indices = self.watched(rule)
+        if indices is None:
+            self._unscoped.insert(key, rule)
+        else:
+            for index in indices:
+                self._by_index.setdefault(index, _RuleList()).insert(key, rule)
+        return True
+
+    def expire(self, rule: Rule) -> List["EntanglementProtocol"]:
+        protocols = super().expire(rule)
+        key = self._keys.pop(rule)
+        indices = self.watched(rule)
+        if indices is None:
+            self._unscoped.remove(key)
+        else:
+            for index in indices:
+                self._by_index[index].remove(key)
+        return protocols
+
+    def rules_for(self, index: int) -> Iterable[Rule]:
+        """Rules to evaluate on an update of memory `index`, in evaluation order."""
+        scoped = self._by_index.get(index)
+        if not self._unscoped.rules:
+            return scoped.rules if scoped is not None else ()
+        if scoped is None:
+            return self._unscoped.rules
+        return [rule for _, rule in merge(zip(scoped.keys, scoped.rules),
+                                          zip(self._unscoped.keys, self._unscoped.rules))]
+
+
+class IndexedResourceManager(ResourceManager):
+    """`ResourceManager` that evaluates only the rules watching a memory.
+
+    Uses an `IndexedMemoryManager` and an `IndexedRuleManager`; `load` and
+    `update` behave as upstream, minus the condition calls that cannot match.
+    """
+
+    def __init__(self, owner: "QuantumRouter", memory_array_name: str):
+        super().__init__(owner, memory_array_name)
+        memory_array = self.memory_manager.memory_array
+        memory_array.detach(self.memory_manager)
+        self.memory_manager = IndexedMemoryManager(memory_array)
+        self.memory_manager.set_resource_manager(self)
+        self.rule_manager = IndexedRuleManager()
+        self.rule_manager.set_resource_manager(self)
+
+    def load(self, rule: Rule) -> bool:
+        log.logger.info('load rule {}'.format(rule))
+        self.rule_manager.load(rule)
+
+        indices = self.rule_manager.watched(rule)
+        infos = self.memory_manager if indices is None else [self.memory_manager[i] for i in sorted(indices)]
+        for memory_info in infos:
+            memories_info = rule.is_valid(memory_info)
+            if len(memories_info) > 0:
+                rule.do(memories_info)
+                for info in memories_info:
+                    info.to_occupied()
+
+        return True
+
+    def update(self, protocol: "EntanglementProtocol", memory: "Memory", state: str) -> None:
+        self.memory_manager.update(memory, state)
+        if protocol:
+            memory.detach(protocol)
+            memory.attach(memory.memory_array)
+            if protocol in protocol.rule.protocols:
+                protocol.rule.protocols.remove(protocol)
+
+        if protocol in self.owner.protocols:
+            self.owner.protocols.remove(protocol)
+
+        if protocol in self.waiting_protocols:
+            self.waiting_protocols.remove(protocol)
+
+        if protocol in self.pending_protocols:
+            self.pending_protocols.remove(protocol)
+
+        # check if any rules watching this memory have been met
+        memo_info: "MemoryInfo" = self.memory_manager.get_info_by_memory(memory)
+        for rule in self.rule_manager.rules_for(memo_info.index):
+            memories_info = rule.is_valid(memo_info)
+            if len(memories_info) > 0:
+                rule.do(memories_info)
+                for info in memories_info:
+                    info.to_occupied()
+                return
+
+        self.owner.get_idle_memory(memo_info)
+
+
+def install_indexes(topology: RouterNetTopo) -> None:
+    """Give every router of `topology` an `IndexedResourceManager`.
+
+    Must be called before the timeline runs: the previous resource manager,
+    with its rules and memory states, is dropped.
+    """
+    for router in topology.get_nodes_by_type(RouterNetTopo.QUANTUM_ROUTER):
+        old = router.resource_manager
+        memory_array = old.memory_manager.memory_array
+        memory_array.detach(old.memory_manager)
+        router.resource_manager = IndexedResourceManager(router, memory_array.name)
@@ -0,0 +1,331 @@
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sequence.topology.router_net_topo import RouterNetTopo
+
+from .apps import RequestApp, ResetApp
+from .batch import build_batch, init_batch
+from .branching import run_branches, swap_rules
+from .cache import ResultCache
+from .context import RunContext
+from .convergence import ConvergenceMonitor
+from .cost_model import config_features
+from .parameters import DEFAULT_PARAMETERS
+from .snapshots import TopologySnapshots
+from .topology import apply_overrides, load_config
+from .warm import TemplateTopologies
+from .watchdog import Rate, Watchdog
+
+log = logging.getLogger(__name__)
+
+
+def _per_node(value: Any, index: int) -> Any:
+    # a list gives one value per node, in topology order
+    return value[index] if isinstance(value, (list, tuple)) else value
+
+
+class Simulation:
+    """Settings of a family of runs and the functions that run them.
+
+    Gathers what every sweep script used to copy: `set_parameters`, the
+    request/reset apps between `start_node` and `end_node`, and the
+    ``simulate`` variants (single run, several swapping orders branched from
+    one setup, several scenarios batched under one timeline). The ``simulate``
+    methods take the same arguments as the old module-level functions, so
+    they can be passed to `run_sweep` and friends as they are; one instance
+    can drive any number of sweeps, and prebuilt topologies live in its
+    `templates`.
+
+    Attributes:
+        parameters (Dict[str, Any]): memory, detector and swapping parameters
+            (see `DEFAULT_PARAMETERS`); a list gives one value per router
+            (memories) or per BSM node (detectors), in topology order.
+        stop_time (float): timeline stop time (ps).
+        cache (ResultCache): cache of complete run results (None: always rerun).
+        run_budget (Dict[str, Any]): `Watchdog` limits of one run (None: no limit).
+        convergence_target (float): relative CI half width at which a run may
+            stop early (None: run the full window).
+        link_capacity (List[int]): memories reserved per link, for strategies reading it.
+        node_order (List[str]): order in which routers swap, for strategies reading it.
+        start_node (str): name of the node requesting entanglement.
+        end_node (str): name of the node at the other end.
+        target_fidelity (float): fidelity requested by the apps; memories under
+            it are purified.
+        purification_pairing (str): how purification pairs memories, ``"exact"``
+            (equal fidelities, as SeQUeNCe), ``"nearest"`` or ``"oldest"``.
+        verbose (bool): print every result as the old scripts did.
+        snapshots (TopologySnapshots): load topologies from these on-disk
+            snapshots instead of building them (None: always build).
+        templates (TemplateTopologies): topologies built with `set_parameters` applied.
+    """
+
+    def __init__(self, parameters: Optional[Dict[str, Any]] = None, stop_time: float = 2e12,
+                 cache: Optional[ResultCache] = None, run_budget: Optional[Dict[str, Any]] = None,
+                 convergence_target: Optional[float] = None, link_capacity: Optional[List[int]] = None,
+                 node_order: Optional[List[str]] = None, start_node: str = "Nodei", end_node: str = "Nodej",
+                 target_fidelity: float = 0, purification_pairing: str = "exact", verbose: bool = True,
+                 snapshots: Optional[TopologySnapshots] = None):
+        self.parameters = dict(DEFAULT_PARAMETERS, **(parameters or {}))
+        self.stop_time = stop_time
+        self.cache = cache
+        self.run_budget = run_budget or {}
+        self.convergence_target = convergence_target
+        self.link_capacity = link_capacity
+        self.node_order = node_order
+        self.start_node = start_node
+        self.end_node = end_node
+        self.target_fidelity = target_fidelity
+        self.purification_pairing = purification_pairing
+        self.verbose = verbose
+        self.snapshots = snapshots
+        self.templates = TemplateTopologies(self.set_parameters, snapshots)
+
+    def __getstate__(self):
+        # the templates stay in the process that built them (workers build their own)
+        state = self.__dict__.copy()
+        del state["templates"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.templates = TemplateTopologies(self.set_parameters, self.snapshots)
+
+    def _report(self, result: Any) -> None:
+        if self.verbose:
+            print(result)
+
+    def _parameters(self, overrides: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return dict(self.parameters, **overrides) if overrides else self.parameters
+
+    def _context(self, create_rules: Optional[Callable], link_capacity: Optional[List[int]] = None,
+                 node_order: Optional[List[str]] = None) -> RunContext:
+        # per-run values take precedence over the settings of the instance
+        return RunContext(create_rules=create_rules,
+                          link_capacity=self.link_capacity if link_capacity is None else link_capacity,
+                          swapping_order=self.node_order if node_order is None else node_order,
+                          purification_pairing=self.purification_pairing)
+
+    def _cache_key(self, config: dict, parameters: Dict[str, Any], context: RunContext) -> str:
+        extra = {"stop_time": self.stop_time, "convergence_target": self.convergence_target,
+                 "start_node": self.start_node, "end_node": self.end_node,
+                 "target_fidelity": self.target_fidelity, "purification_pairing": context.purification_pairing}
+        if context.link_capacity is not None:
+            extra["link_capacity"] = context.link_capacity
+        if context.swapping_order is not None:
+            extra["node_order"] = context.swapping_order
+        return self.cache.key(config, parameters, context.rules_function(), **extra)
+
+    def run_settings(self) -> Dict[str, Any]:
+        """Settings shared by every run of this instance, e.g. for a `SweepCheckpoint`."""
+        return {"parameters": self.parameters, "stop_time": self.stop_time, "run_budget": self.run_budget,
+                "convergence_target": self.convergence_target, "link_capacity": self.link_capacity,
+                "node_order": self.node_order, "start_node": self.start_node, "end_node": self.end_node,
+                "target_fidelity": self.target_fidelity, "purification_pairing": self.purification_pairing}
+
+    def set_parameters(self, topology: RouterNetTopo, parameters: Optional[Dict[str, Any]] = None) -> None:
+        """Apply memory, detector and swapping parameters to every node of `topology`."""
+        parameters = parameters or self.parameters
+        # set memory parameters
+        for i, node in enumerate(topology.get_nodes_by_type(RouterNetTopo.QUANTUM_ROUTER)):
+            memory_array = node.get_components_by_type("MemoryArray")[0]
+            memory_array.update_memory_params("frequency", _per_node(parameters["memo_freq"], i))
+            memory_array.update_memory_params("coherence_time", _per_node(parameters["memo_expire"], i))
+            memory_array.update_memory_params("efficiency", _per_node(parameters["memo_efficiency"], i))
+            memory_array.update_memory_params("raw_fidelity", _per_node(parameters["memo_fidelity"], i))
+            memory_array.update_memory_params("wavelength", _per_node(parameters["wave_length"], i))
+
+        # set detector parameters
+        for i, node in enumerate(topology.get_nodes_by_type(RouterNetTopo.BSM_NODE)):
+            bsm = node.get_components_by_type("SingleAtomBSM")[0]
+            bsm.update_detectors_params("efficiency", _per_node(parameters["detector_efficiency"], i))
+
+        # set entanglement swapping parameters
+        for i, node in enumerate(topology.get_nodes_by_type(RouterNetTopo.QUANTUM_ROUTER)):
+            rate = _per_node(parameters["swapping_success_rate"], i)
+            node.network_manager.protocol_stack[1].set_swapping_success_rate(rate)
+
+    def point_features(self, point: Tuple) -> Dict[str, float]:
+        """`CostModel` features of a grid point of `simulate`, `simulate_orders` or `simulate_batch`."""
+        network_config, distance = point[:2]
+        scenarios = 1
+        if isinstance(distance, (list, tuple)):
+            scenarios = len(distance)
+            distance = max(scenario[0] for scenario in distance)
+        # a `simulate` point may carry its own link capacity (6th argument)
+        link_capacity = point[5] if len(point) > 5 and point[5] is not None else self.link_capacity
+        features = config_features(load_config(network_config), distance=distance, stop_time=self.stop_time,
+                                   link_capacity=link_capacity)
+        features["scenarios"] = scenarios
+        return features
+
+    def add_apps(self, network_topo, context: RunContext, prefix: str = "") -> RequestApp:
+        """Install the run context and the apps on one network (or one scenario of a batch).
+
+        Returns:
+            RequestApp: the app of the start node, which measures the rate.
+        """
+        context.install(network_topo)
+        node1 = node2 = None
+        for router in network_topo.get_nodes_by_type(RouterNetTopo.QUANTUM_ROUTER):
+            if router.name == prefix + self.start_node:
+                node1 = router
+            elif router.name == prefix + self.end_node:
+                node2 = router
+        app_node1 = RequestApp(node1, node2.name, memory_size=1, target_fidelity=self.target_fidelity)
+        ResetApp(node2, node1.name, target_fidelity=self.target_fidelity)
+        return app_node1
+
+    def start_run(self, config: dict, context: RunContext,
+                  parameters: Optional[Dict[str, Any]] = None) -> Tuple[RouterNetTopo, RequestApp]:
+        """Build the topology of one run, set up the apps and start the request."""
+        network_topo = self.templates.checkout(config)
+        if parameters is not None:
+            self.set_parameters(network_topo, parameters)
+        tl = network_topo.get_timeline()
+        tl.stop_time = self.stop_time
+        tl.show_progress = False
+        app_node1 = self.add_apps(network_topo, context)
+
+        tl.init()
+        app_node1.start()
+        if self.convergence_target is not None:
+            ConvergenceMonitor(app_node1, target=self.convergence_target).start()
+        return network_topo, app_node1
+
+    def finish_run(self, app_node1: RequestApp, distance: float) -> Tuple[float, bool]:
+        """Run the timeline on under the budget.
+
+        Returns:
+            Tuple[float, bool]: the rate and whether the run completed.
+        """
+        watchdog = Watchdog(app_node1.node.timeline, **self.run_budget)
+        watchdog.run()
+        return self.measure(app_node1, watchdog, distance)
+
+    def measure(self, app_node1: RequestApp, watchdog: Watchdog, distance: float) -> Tuple[float, bool]:
+        """Rate measured by the app once the watchdog stopped, partial if the budget was exceeded."""
+        tl = app_node1.node.timeline
+        if watchdog.exceeded:
+            # partial result: the rate over the part of the window that was simulated
+            app_node1.end_time = min(app_node1.end_time, tl.now())
+        if app_node1.end_time > app_node1.start_time:
+            rate = app_node1.get_throughput()
+        else:
+            rate = 0.0
+        if watchdog.exceeded:
+            log.warning("budget exceeded (%s) at distance %s: %s", watchdog.reason, distance, rate)
+        return rate, not watchdog.exceeded
+
+    def simulate(self, network_config: str, distance: float, swapping_order: Optional[Callable] = None,
+                 seed_offset: int = 0, parameters: Optional[Dict[str, Any]] = None,
+                 link_capacity: Optional[List[int]] = None, node_order: Optional[List[str]] = None) -> float:
+        """Rate of one run.
+
+        Args:
+            network_config (str): path of the network JSON.
+            distance (float): end-to-end distance (m).
+            swapping_order (Callable): ``create_rules`` strategy (None: the protocol's default).
+            seed_offset (int): added to every node seed (see `apply_overrides`).
+            parameters (Dict[str, Any]): overrides of `parameters` for this run.
+            link_capacity (List[int]): overrides `link_capacity` for this run.
+            node_order (List[str]): overrides `node_order` for this run.
+
+        Returns:
+            Rate: entanglement rate (pairs/s), with ``complete`` False if the
+            run was stopped by `run_budget`.
+        """
+        context = self._context(swapping_order, link_capacity, node_order)
+        config = apply_overrides(load_config(network_config), distance=distance, seed_offset=seed_offset)
+        run_parameters = self._parameters(parameters)
+        if self.cache is not None:
+            key = self._cache_key(config, run_parameters, context)
+            rate = self.cache.get(key)
+            if rate is not None:
+                rate = Rate(rate, cached=True)
+                self._report(rate)
+                return rate
+        _, app_node1 = self.start_run(config, context, run_parameters if parameters else None)
+        rate = Rate(*self.finish_run(app_node1, distance))
+        # a run over budget is not cached, a rerun with a larger budget gives the full result
+        if self.cache is not None and rate.complete:
+            self.cache.put(key, rate, rules=context.rules_function())
+        self._report(rate)
+        return rate
+
+    def simulate_batch(self, network_config: str, scenarios: Sequence[Tuple]) -> List[Rate]:
+        """Rates of several small runs at once, as disjoint copies of the network under one timeline.
+
+        Every scenario keeps its own event list (see `build_batch`), so it gives
+        exactly the rate of the same `simulate` call.
+
+        Args:
+            network_config (str): path of the network JSON.
+            scenarios (Sequence[Tuple]): ``(distance, swapping_order, seed_offset)`` per run,
+                optionally followed by that run's overrides of `parameters`.
+
+        Returns:
+            List[Rate]: one rate per scenario.
+        """
+        configs = [apply_overrides(load_config(network_config), distance=scenario[0], seed_offset=scenario[2])
+                   for scenario in scenarios]
+        network_topo, views = build_batch(configs)
+        tl = network_topo.get_timeline()
+        tl.stop_time = self.stop_time
+        tl.show_progress = False
+        apps = []
+        for view, scenario in zip(views, scenarios):
+            self.set_parameters(view, self._parameters(scenario[3] if len(scenario) > 3 else None))
+            apps.append(self.add_apps(view, self._context(scenario[1]), view.prefix))
+
+        init_batch(network_topo)
+        for view, app in zip(views, apps):
+            view.select()
+            app.start()
+        # the scenarios share the timeline, so there is no per-scenario convergence stop
+        watchdog = Watchdog(tl, **self.run_budget)
+        watchdog.run()
+        for view, app, scenario in zip(views, apps, scenarios):
+            view.results["rate"], view.results["complete"] = self.measure(app, watchdog, scenario[0])
+        rates = [Rate(view.results["rate"], view.results["complete"]) for view in views]
+        self._report(rates)
+        return rates
+
+    def simulate_orders(self, network_config: str, distance: float, swapping_orders: Sequence[Callable],
+                        seed_offset: int = 0) -> List[float]:
+        """Rates of several swapping orders from a single setup.
+
+        The run is paused just before the reservation starts and branched once
+        per order, with the rules regenerated (see `run_branches`). POSIX only.
+
+        Returns:
+            List[Rate]: one rate per swapping order.
+        """
+        config = apply_overrides(load_config(network_config), distance=distance, seed_offset=seed_offset)
+        if self.cache is not None:
+            keys = [self._cache_key(config, self.parameters, self._context(swapping_order))
+                    for swapping_order in swapping_orders]
+            rates = [self.cache.get(key) for key in keys]
+            if None not in rates:
+                rates = [Rate(rate, cached=True) for rate in rates]
+                self._report(rates)
+                return rates
+        network_topo, app_node1 = self.start_run(config, self._context(swapping_orders[0]))
+        tl = app_node1.node.timeline
+        # the reservation is approved (and its rules created) long before it starts
+        tl.stop_time = app_node1.start_time
+        tl.run()
+        tl.stop_time = self.stop_time
+
+        def branch(swapping_order):
+            self._context(swapping_order).install(network_topo)
+            swap_rules(tl)
+            return self.finish_run(app_node1, distance)
+
+        results = run_branches(branch, swapping_orders)
+        if self.cache is not None:
+            for key, swapping_order, (rate, complete) in zip(keys, swapping_orders, results):
+                if complete:
+                    self.cache.put(key, rate, rules=self._context(swapping_order).rules_function())
+        rates = [Rate(rate, complete) for rate, complete in results]
+        self._report(rates)
+        return rates
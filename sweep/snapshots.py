@@ -0,0 +1,101 @@
+import copy
+import hashlib
+import os
+import pickle
+from typing import Dict
+
+import sequence
+
+from .topology import ConfigRouterNetTopo, retarget
+from .warm import structure_key
+
+# bump when the pickled layout of `ConfigRouterNetTopo` changes
+SNAPSHOT_FORMAT = 4
+
+
+class TopologySnapshots:
+    """On-disk snapshots of built topologies, keyed by network structure.
+
+    Building a `ConfigRouterNetTopo` creates every node, memory, BSM node and
+    channel of the config; between the points of a sweep only per-run values
+    (distances, seeds, memory parameters) change. The first build of a
+    structure is pickled under the SHA-256 of its `structure_key` (plus the
+    SeQUeNCe version), later builds, in this or any other process, load the
+    pickle and `retarget` it to their own config. The loaded bytes are kept as
+    the topology's `snapshot`, so it can also be `reset` and reused in place.
+
+    The files are trusted pickles: keep the directory private to the user
+    running the sweeps.
+
+    Attributes:
+        directory (str): directory holding the snapshots.
+    """
+
+    def __init__(self, directory: str = "data/topologies"):
+        self.directory = directory
+        self._loaded: Dict[str, bytes] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def __getstate__(self):
+        # workers read the files themselves
+        state = self.__dict__.copy()
+        state["_loaded"] = {}
+        return state
+
+    def key(self, config: dict) -> str:
+        """Snapshot key of the structure of `config`."""
+        blob = "%s\n%s\n%d" % (structure_key(config), sequence.__version__, SNAPSHOT_FORMAT)
+        return hashlib.sha256(blob.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".pickle")
+
+    def get(self, config: dict) -> ConfigRouterNetTopo:
+        """Topology of `config`, loaded from its snapshot (or built and stored).
+
+        Args:
+            config (dict): network config of the run, e.g. from
+                `apply_overrides`; not modified.
+
+        Returns:
+            ConfigRouterNetTopo: topology ready for ``timeline.init()``, with
+            the per-run values of `config` applied.
+        """
+        key = self.key(config)
+        path = self._path(key)
+        try:
+            data = self._loaded.get(key)
+            if data is None:
+                with open(path, "rb") as file:
+                    data = file.read()
+            topology = pickle.loads(data)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # missing or unreadable: build it and (re)write the snapshot
+            topology = ConfigRouterNetTopo(copy.deepcopy(config))
+            data = self._loaded[key] = topology.snapshot()
+            tmp_path = "%s.%d.tmp" % (path, os.getpid())
+            with open(tmp_path, "wb") as file:
+                file.write(data)
+            # atomic, so concurrent workers never load a half-written snapshot
+            os.replace(tmp_path, path)
+            return topology
+        self._loaded[key] = topology.snapshot(data)
+        return retarget(topology, config)
+
+    def clear(self) -> int:
+        """Remove every snapshot, e.g. after editing the topology code.
+
+        Returns:
+            int: number of removed snapshots.
+        """
+        self._loaded.clear()
+        removed = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".pickle"):
+                continue
+            try:
+                os.remove(os.path.join(self.directory, name))
+                removed += 1
+            except OSError:
+                pass
+        return removed
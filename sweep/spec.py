@@ -0,0 +1,320 @@
+"""Declarative experiment specs with grid, Latin hypercube and Sobol sampling.
+
+An experiment is a JSON file listing the axes of the study, the values held
+fixed and how to sample the axes::
+
+    {
+      "name": "coherence_time",
+      "network": "networks/2Routers.json",
+      "sampling": {"method": "sobol", "samples": 64, "seed": 0},
+      "axes": {
+        "distance": {"range": [1000, 200000], "step": 1000},
+        "memo_expire": {"range": [1e-3, 1], "scale": "log"},
+        "memo_efficiency": {"values": {"decreasing": [1, 0.8, 0.6, 0.4], "increasing": [0.4, 0.6, 0.8, 1]}},
+        "swapping_order": {"values": ["left_to_right", "right_to_left"]}
+      },
+      "fixed": {"detector_efficiency": 1},
+      "settings": {"stop_time": 2e12}
+    }
+
+Axis (and fixed) names are either run values (`RUN_AXES`: network, distance,
+swapping strategy, seed offset, link capacity, node order) or
+`Simulation.parameters` entries. An axis lists its ``values`` (a dict gives
+each value a label, stored in the results instead of the value) or spans a
+``range`` with an optional ``step``, number of grid ``points``, ``"log"``
+scale and ``integer`` rounding. ``settings`` are `Simulation` arguments.
+
+The ``"grid"`` method runs the full Cartesian product. ``"lhs"`` and
+``"sobol"`` draw `samples` points that spread over every axis at once (one
+value per sample and axis; a discrete axis is cut into equal slices), so a
+study of many axes needs a fraction of the grid's runs. Sampled values are
+snapped to the axis step and duplicate points are dropped, which also keeps
+checkpoint and cache keys reusable across specs.
+
+Expanding a spec needs neither SeQUeNCe nor (for grids) scipy; `run_spec`
+imports them when the runs start.
+"""
+
+import itertools
+import json
+import math
+import os
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from . import strategies as _strategies
+from .executor import is_complete, run_sweep
+from .experiment import _number
+from .parameters import DEFAULT_PARAMETERS
+
+if TYPE_CHECKING:
+    from .checkpoint import SweepCheckpoint
+    from .cost_model import CostModel
+    from .distributed import Coordinator
+    from .results_store import ResultsStore
+    from .simulation import Simulation
+
+SAMPLING_METHODS = ("grid", "lhs", "sobol")
+# axes with a meaning of their own; any other name is a `Simulation.parameters` entry
+RUN_AXES = ("network", "distance", "swapping_order", "seed_offset", "link_capacity", "node_order")
+# `Simulation` arguments a spec may set
+SETTINGS = ("stop_time", "run_budget", "convergence_target", "start_node", "end_node", "target_fidelity",
+            "purification_pairing")
+
+Value = Tuple[Any, Any]  # (label stored in the results, value passed to the run)
+
+
+def _label(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return json.dumps(value)
+
+
+class Axis:
+    """One dimension of an experiment.
+
+    Attributes:
+        name (str): run value or parameter the axis sets.
+        values (List[Value]): ``(label, value)`` pairs of a discrete axis (None for a range).
+        low (float): lower end of a range axis.
+        high (float): upper end of a range axis.
+        step (float): grid spacing of a range; sampled values are snapped to it.
+        points (int): number of grid points of a range without `step`.
+        scale (str): ``"linear"`` or ``"log"``.
+        integer (bool): round the values of a range to integers.
+    """
+
+    def __init__(self, name: str, spec: Dict[str, Any]):
+        self.name = name
+        self.values: Optional[List[Value]] = None
+        self.low = self.high = self.step = None
+        self.points: Optional[int] = None
+        self.scale = spec.get("scale", "linear")
+        self.integer = bool(spec.get("integer", False))
+        if "values" in spec:
+            values = spec["values"]
+            if isinstance(values, dict):
+                self.values = list(values.items())
+            else:
+                self.values = [(_label(value), value) for value in values]
+            if not self.values:
+                raise ValueError("axis %r has no values" % name)
+        elif "range" in spec:
+            self.low, self.high = (float(x) for x in spec["range"])
+            self.step = spec.get("step")
+            self.points = spec.get("points")
+            if self.high < self.low:
+                raise ValueError("axis %r: empty range %r" % (name, spec["range"]))
+            if self.scale not in ("linear", "log"):
+                raise ValueError("axis %r: unknown scale %r" % (name, self.scale))
+            if self.scale == "log" and (self.low <= 0 or self.step is not None):
+                raise ValueError("axis %r: a log range needs low > 0 and no step" % name)
+            if self.step is not None and self.step <= 0:
+                raise ValueError("axis %r: step must be > 0" % name)
+        else:
+            raise ValueError("axis %r needs 'values' or 'range'" % name)
+
+    @property
+    def discrete(self) -> bool:
+        return self.values is not None
+
+    def _number(self, x: float) -> Any:
+        if self.step is not None:
+            x = min(self.low + round((x - self.low) / self.step) * self.step, self.high)
+        if self.integer:
+            return int(round(x))
+        return _number(round(x, 12))
+
+    def grid(self) -> List[Value]:
+        """The values of the axis in a full grid."""
+        if self.discrete:
+            return self.values
+        if self.step is not None:
+            count = int(math.floor((self.high - self.low) / self.step + 1e-9)) + 1
+            xs = [self.low + i * self.step for i in range(count)]
+        elif self.points is not None:
+            n = int(self.points)
+            if self.scale == "log":
+                ratio = self.high / self.low
+                xs = [self.low * ratio ** (i / max(n - 1, 1)) for i in range(n)]
+            else:
+                xs = [self.low + (self.high - self.low) * i / max(n - 1, 1) for i in range(n)]
+        else:
+            raise ValueError("axis %r: a grid over a range needs 'step' or 'points'" % self.name)
+        values = []
+        for x in xs:
+            value = self._number(x)
+            if value not in values:
+                values.append(value)
+        return [(value, value) for value in values]
+
+    def at(self, u: float) -> Value:
+        """Value of the axis at position ``u`` in [0, 1) of the unit interval."""
+        if self.discrete:
+            return self.values[min(int(u * len(self.values)), len(self.values) - 1)]
+        if self.scale == "log":
+            x = self.low * (self.high / self.low) ** u
+        else:
+            x = self.low + u * (self.high - self.low)
+        value = self._number(x)
+        return value, value
+
+
+def _unit_samples(method: str, samples: int, dimensions: int, seed: Optional[int]) -> List[List[float]]:
+    from scipy.stats import qmc
+
+    if method == "lhs":
+        return qmc.LatinHypercube(d=dimensions, seed=seed).random(samples).tolist()
+    sampler = qmc.Sobol(d=dimensions, scramble=True, seed=seed)
+    if samples & (samples - 1) == 0:
+        # powers of two keep the balance properties of the sequence
+        return sampler.random_base2(int(math.log2(samples))).tolist()
+    return sampler.random(samples).tolist()
+
+
+class ExperimentSpec:
+    """A parsed experiment file.
+
+    Attributes:
+        name (str): experiment name, stored in the `experiment` column.
+        axes (List[Axis]): sampled dimensions.
+        fixed (Dict[str, Any]): values shared by every run (run values or parameters).
+        method (str): one of `SAMPLING_METHODS`.
+        samples (int): number of points drawn by ``"lhs"`` and ``"sobol"``.
+        seed (int): seed of the sampler (None: a fresh design each time).
+        settings (Dict[str, Any]): `Simulation` arguments (see `SETTINGS`).
+        dataset (str): value of the `dataset` column.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.name = data.get("name", "experiment")
+        self.fixed = dict(data.get("fixed", {}))
+        if "network" in data:
+            self.fixed["network"] = data["network"]
+        self.axes = [Axis(name, spec) for name, spec in data.get("axes", {}).items()]
+        sampling = data.get("sampling", {"method": "grid"})
+        self.method = sampling.get("method", "grid")
+        self.samples = sampling.get("samples")
+        self.seed = sampling.get("seed")
+        self.settings = dict(data.get("settings", {}))
+        self.dataset = data.get("dataset", "rates")
+
+        if self.method not in SAMPLING_METHODS:
+            raise ValueError("unknown sampling method %r (known: %s)" % (self.method, ", ".join(SAMPLING_METHODS)))
+        if self.method != "grid" and not self.samples:
+            raise ValueError("sampling method %r needs 'samples'" % self.method)
+        names = [axis.name for axis in self.axes]
+        for name in ("network", "distance"):
+            if name not in names and name not in self.fixed:
+                raise ValueError("the spec needs a %r axis or fixed value" % name)
+        overlap = set(names) & set(self.fixed)
+        if overlap:
+            raise ValueError("%s both fixed and an axis" % ", ".join(sorted(overlap)))
+        for name in names + list(self.fixed):
+            if name not in RUN_AXES and name not in DEFAULT_PARAMETERS:
+                raise ValueError("%r is neither a run value (%s) nor a parameter (%s)"
+                                 % (name, ", ".join(RUN_AXES), ", ".join(DEFAULT_PARAMETERS)))
+        unknown = set(self.settings) - set(SETTINGS)
+        if unknown:
+            raise ValueError("unknown settings %s (known: %s)" % (", ".join(sorted(unknown)), ", ".join(SETTINGS)))
+        for axis in self.axes:
+            if axis.name == "swapping_order":
+                for _, strategy in axis.values or []:
+                    if strategy is not None and strategy not in _strategies.STRATEGIES and ":" not in strategy:
+                        raise ValueError("unknown swapping strategy %r" % strategy)
+
+    @classmethod
+    def load(cls, path: str) -> "ExperimentSpec":
+        """Read a spec from a JSON file."""
+        with open(path) as file:
+            data = json.load(file)
+        data.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+        return cls(data)
+
+    def grid_size(self) -> Optional[int]:
+        """Number of points of the full grid (None if a range has no step or points)."""
+        try:
+            return math.prod(len(axis.grid()) for axis in self.axes)
+        except ValueError:
+            return None
+
+    def points(self) -> List[Dict[str, Value]]:
+        """Expand the spec into its distinct points, ``axis name -> (label, value)``."""
+        if self.method == "grid":
+            combos = itertools.product(*(axis.grid() for axis in self.axes))
+        else:
+            units = _unit_samples(self.method, int(self.samples), len(self.axes), self.seed)
+            combos = ([axis.at(u) for axis, u in zip(self.axes, row)] for row in units)
+        points, seen = [], set()
+        for combo in combos:
+            point = {axis.name: value for axis, value in zip(self.axes, combo)}
+            key = json.dumps({name: label for name, (label, _) in point.items()}, sort_keys=True, default=str)
+            if key not in seen:
+                seen.add(key)
+                points.append(point)
+        return points
+
+    def run_values(self, point: Dict[str, Value]) -> Dict[str, Any]:
+        """Fixed values and the values of `point`, by name."""
+        values = dict(self.fixed)
+        values.update({name: value for name, (_, value) in point.items()})
+        return values
+
+    def arguments(self, point: Dict[str, Value]) -> Tuple:
+        """`Simulation.simulate` arguments of `point`, with the strategy resolved."""
+        values = self.run_values(point)
+        parameters = {name: value for name, value in values.items() if name not in RUN_AXES}
+        return (values["network"], values["distance"], _strategies.resolve(values.get("swapping_order")),
+                values.get("seed_offset", 0), parameters or None, values.get("link_capacity"),
+                values.get("node_order"))
+
+    def row(self, point: Dict[str, Value]) -> Dict[str, Any]:
+        """Result row of `point`, without the metrics."""
+        values = self.run_values(point)
+        row = {"dataset": self.dataset, "experiment": self.name, "network": os.path.basename(values["network"])}
+        if "swapping_order" in values:
+            row["swapping_order"] = _label(values["swapping_order"])
+        row.update({name: label for name, (label, _) in point.items() if name != "network"})
+        return row
+
+
+def run_spec(spec: ExperimentSpec, simulation: Optional["Simulation"] = None, workers: Optional[int] = None,
+             checkpoint: "SweepCheckpoint" = None, cost_model: "CostModel" = None, warm_start: bool = False,
+             store: "ResultsStore" = None, cache=None, coordinator: "Coordinator" = None) -> List[Dict[str, Any]]:
+    """Expand an experiment spec, run its points and return one row per point.
+
+    Args:
+        spec (ExperimentSpec): the experiment.
+        simulation (Simulation): run settings (None: built from the spec's
+            fixed parameters and settings, with `cache`).
+        workers (int): worker processes (see `run_sweep`).
+        checkpoint (SweepCheckpoint): optional checkpoint of the runs.
+        cost_model (CostModel): optional cost model to schedule the runs.
+        warm_start (bool): build each network once here and fork a child per run.
+        store (ResultsStore): if given, the rows are appended to it.
+        cache (ResultCache): result cache of the simulation built from the spec.
+        coordinator (Coordinator): serve the runs to remote workers instead
+            (see `sweep.distributed`).
+
+    Returns:
+        List[Dict[str, Any]]: the `dataset`, `experiment`, `network` and axis
+        columns (labels) of every point, its `rate` and `complete` (False if
+        the run was stopped by its budget and the rate is partial).
+    """
+    from .simulation import Simulation
+    from .topology import load_config
+
+    if simulation is None:
+        fixed_parameters = {name: value for name, value in spec.fixed.items() if name not in RUN_AXES}
+        simulation = Simulation(fixed_parameters, cache=cache, **spec.settings)
+
+    points = spec.points()
+    arguments = [spec.arguments(point) for point in points]
+    if warm_start:
+        for network_config in sorted({args[0] for args in arguments}):
+            simulation.templates.prepare(load_config(network_config))
+    results = run_sweep(simulation.simulate, arguments, workers=workers, checkpoint=checkpoint,
+                        cost_model=cost_model, warm_start=warm_start, coordinator=coordinator)
+    rows = [dict(spec.row(point), rate=rate, complete=is_complete(rate)) for point, rate in zip(points, results)]
+    if store is not None:
+        store.append(rows)
+    return rows
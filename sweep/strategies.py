@@ -0,0 +1,60 @@
+"""Swapping strategies (``create_rules`` implementations) by name.
+
+Strategies are registered as ``"module:function"`` strings and only imported
+when resolved, so listing them or planning a sweep does not load the rule
+modules (and SeQUeNCe behind them).
+"""
+
+import importlib
+from typing import Callable, Dict, List, Optional, Union
+
+STRATEGIES: Dict[str, Optional[str]] = {
+    "default": None,  # ResourceReservationProtocol.create_rules of SeQUeNCe
+    "left_to_right": "swaping_rules.ResourceReservationProtocol:create_rules_es_left_to_right",
+    "right_to_left": "swaping_rules.ResourceReservationProtocol:create_rules_es_right_to_left",
+    "right_to_left1": "swaping_rules.ResourceReservationProtocol:create_rules_es_right_to_left1",
+    # swaps in the order given by the run context (`RunContext.swapping_order`, `link_capacity`)
+    "custom": "swaping_rules.ResourceReservationProtocol:create_rules",
+}
+
+
+def register(name: str, target: str) -> None:
+    """Register `target` (``"module:function"``) as strategy `name`."""
+    if ":" not in target:
+        raise ValueError("strategy target must look like 'module:function', got %r" % target)
+    STRATEGIES[name] = target
+
+
+def resolve(strategy: Union[str, Callable, None]) -> Optional[Callable]:
+    """Return the ``create_rules`` function of a strategy.
+
+    Args:
+        strategy (str | Callable): registered name, ``"module:function"`` string,
+            or the function itself (returned as is).
+
+    Returns:
+        Callable: the unbound ``create_rules`` implementation (None: the protocol's default).
+    """
+    if strategy is None or callable(strategy):
+        return strategy
+    target = STRATEGIES.get(strategy, strategy)
+    if target is None:
+        return None
+    if ":" not in target:
+        raise KeyError("unknown swapping strategy %r (known: %s)" % (strategy, ", ".join(STRATEGIES)))
+    module_name, function_name = target.split(":", 1)
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def names(strategies: List[Union[str, Callable, None]]) -> List[str]:
+    """Labels of `strategies` as stored in the results (registered name if any)."""
+    labels = []
+    for strategy in strategies:
+        if strategy is None:
+            labels.append("default")
+        elif callable(strategy):
+            target = "%s:%s" % (strategy.__module__, strategy.__qualname__)
+            labels.append(next((name for name, registered in STRATEGIES.items() if registered == target), target))
+        else:
+            labels.append(strategy)
+    return labels
@@ -0,0 +1,367 @@
+import copy
+import json
+import pickle
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+from networkx import Graph, NetworkXNoPath, NodeNotFound, dijkstra_path, single_source_dijkstra
+from sequence.components.optical_channel import ClassicalChannel
+from sequence.kernel.event import Event
+from sequence.kernel.process import Process
+from sequence.topology.node import Node
+from sequence.topology.router_net_topo import RouterNetTopo
+from sequence.topology.topology import Topology as Topo
+
+from .rule_index import install_indexes
+
+if TYPE_CHECKING:
+    from sequence.message import Message
+
+LinkValues = Union[float, Dict[Tuple[str, str], float]]
+
+_config_cache: Dict[str, dict] = {}
+
+
+def _link_value(values: LinkValues, node1: str, node2: str) -> Optional[float]:
+    if not isinstance(values, dict):
+        return values
+    if (node1, node2) in values:
+        return values[(node1, node2)]
+    return values.get((node2, node1))
+
+
+def load_config(network_config: str) -> dict:
+    """Read a network JSON once per process and return a private copy of it.
+
+    Args:
+        network_config (str): path of the network config under ``networks/``.
+
+    Returns:
+        dict: deep copy of the parsed config, safe to modify.
+    """
+    if network_config not in _config_cache:
+        with open(network_config) as file:
+            _config_cache[network_config] = json.load(file)
+    return copy.deepcopy(_config_cache[network_config])
+
+
+def apply_overrides(config: dict, distance: float = None, distances: Dict[Tuple[str, str], float] = None,
+                    attenuation: LinkValues = None, memo_size: Union[int, Dict[str, int]] = None,
+                    seed_offset: int = 0) -> dict:
+    """Apply per-run overrides to an in-memory network config.
+
+    Args:
+        config (dict): network config, modified in place.
+        distance (float): total end-to-end distance, split uniformly over every
+            `qconnections`/`cconnections` entry (same as the old `set_distances`).
+        distances (Dict[Tuple[str, str], float]): per-link distances keyed by
+            ``(node1, node2)`` in either order; applied after `distance`.
+        attenuation (float | Dict[Tuple[str, str], float]): attenuation for every
+            quantum connection, or per link.
+        memo_size (int | Dict[str, int]): memory array size for every router,
+            or per router name.
+        seed_offset (int): added to the seed of every node and of the BSM node
+            generated for every quantum connection, to draw an independent replica.
+
+    Returns:
+        dict: the same config, for chaining.
+    """
+    qconnections = config.get(Topo.ALL_QC_CONNECT, [])
+    cconnections = config.get(Topo.ALL_CC_CONNECT, [])
+
+    if distance is not None:
+        hubs_number = len(config[Topo.ALL_NODE])
+        hop_distance = distance / (hubs_number - 1)
+        for connection in qconnections + cconnections:
+            connection[Topo.DISTANCE] = hop_distance
+
+    if distances is not None:
+        for connection in qconnections + cconnections:
+            value = _link_value(distances, connection[Topo.CONNECT_NODE_1], connection[Topo.CONNECT_NODE_2])
+            if value is not None:
+                connection[Topo.DISTANCE] = value
+
+    if attenuation is not None:
+        for connection in qconnections:
+            value = _link_value(attenuation, connection[Topo.CONNECT_NODE_1], connection[Topo.CONNECT_NODE_2])
+            if value is not None:
+                connection[Topo.ATTENUATION] = value
+
+    if memo_size is not None:
+        for node in config[Topo.ALL_NODE]:
+            if node[Topo.TYPE] != RouterNetTopo.QUANTUM_ROUTER:
+                continue
+            size = memo_size.get(node[Topo.NAME]) if isinstance(memo_size, dict) else memo_size
+            if size is not None:
+                node[RouterNetTopo.MEMO_ARRAY_SIZE] = size
+
+    if seed_offset:
+        for node in config[Topo.ALL_NODE]:
+            node[Topo.SEED] = node[Topo.SEED] + seed_offset
+        for connection in qconnections:
+            connection[Topo.SEED] = connection.get(Topo.SEED, 0) + seed_offset
+
+    return config
+
+
+class ForwardedChannel:
+    """Classical path between two routers without a direct channel.
+
+    Behaves like a `ClassicalChannel` for `Node.send_message`: the message is
+    delivered after the sum of the (integer) delays of the hops, as if every
+    router on the way relayed it at once. The delay is read from the hop
+    channels at send time, so it follows `retarget`.
+
+    Attributes:
+        name (str): ``"fw.<sender>.<receiver>"``.
+        sender (Node): node sending the messages.
+        receiver (str): name of the destination node.
+        hops (List[ClassicalChannel]): direct channels along the path.
+    """
+
+    def __init__(self, sender: Node, receiver: str, hops: List[ClassicalChannel]):
+        self.name = "fw.{}.{}".format(sender.name, receiver)
+        self.sender = sender
+        self.receiver = receiver
+        self.hops = hops
+
+    @property
+    def delay(self) -> int:
+        return sum(int(hop.delay) for hop in self.hops)
+
+    def transmit(self, message: "Message", source: Node, priority: int) -> None:
+        assert source == self.sender
+        future_time = round(source.timeline.now() + self.delay)
+        process = Process(self.receiver, "receive_message", [source.name, message])
+        source.timeline.schedule(Event(future_time, process, priority))
+
+
+class _ClassicalNetwork:
+    # router-to-router classical channels of a topology, for `ClassicalRoutes`
+    def __init__(self, channels: Dict[Tuple[str, str], ClassicalChannel]):
+        self.channels = channels
+
+    def path(self, src: str, dst: str) -> List[ClassicalChannel]:
+        graph = Graph()
+        graph.add_weighted_edges_from((a, b, channel.delay) for (a, b), channel in self.channels.items())
+        try:
+            names = dijkstra_path(graph, src, dst)
+        except (NodeNotFound, NetworkXNoPath):
+            raise KeyError("no classical path from %s to %s" % (src, dst)) from None
+        return [self.channels[(a, b)] for a, b in zip(names, names[1:])]
+
+
+class ClassicalRoutes(dict):
+    """`Node.cchannels` that forwards over other routers when there is no direct channel.
+
+    Direct channels are looked up as before; a message to a router without
+    one goes through a `ForwardedChannel` along the shortest path (by
+    delay) over the router-to-router channels, created on the first message
+    and kept. Networks can then declare classical connections between
+    neighbours only, instead of all-to-all.
+    """
+
+    def __init__(self, owner: Node, network: _ClassicalNetwork, channels: Dict[str, Any]):
+        super().__init__(channels)
+        self.owner = owner
+        self.network = network
+
+    def __missing__(self, dst: str) -> ForwardedChannel:
+        channel = self[dst] = ForwardedChannel(self.owner, dst, self.network.path(self.owner.name, dst))
+        return channel
+
+
+def install_forwarding(topology: RouterNetTopo) -> None:
+    """Let the routers of `topology` message routers they have no classical channel to.
+
+    See `ClassicalRoutes`; direct channels are unaffected.
+    """
+    routers = topology.get_nodes_by_type(RouterNetTopo.QUANTUM_ROUTER)
+    names = {router.name for router in routers}
+    network = _ClassicalNetwork({(cc.sender.name, cc.receiver): cc for cc in topology.cchannels
+                                 if cc.sender.name in names and cc.receiver in names})
+    for router in routers:
+        router.cchannels = ClassicalRoutes(router, network, router.cchannels)
+
+
+class ConfigRouterNetTopo(RouterNetTopo):
+    """RouterNetTopo built from an in-memory config dict instead of a JSON file.
+
+    `RouterNetTopo._load` appends the generated BSM nodes and channels to the
+    config it reads, so the dict is consumed: pass a private copy (as
+    `build_topology` does).
+
+    Unlike the base class the topology can be pickled (nodes, memories,
+    channels and timeline included), which `snapshot` and `reset` use to run
+    one built topology several times.
+    """
+
+    def __getstate__(self):
+        # `Topology.nodes` is a defaultdict of a lambda, which pickle refuses
+        state = self.__dict__.copy()
+        state["nodes"] = dict(self.nodes)
+        state.pop("_snapshot", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.nodes = defaultdict(list, state["nodes"])
+
+    def snapshot(self, data: Optional[bytes] = None) -> bytes:
+        """Record the current state of the topology as the one `reset` returns to.
+
+        Take it before ``timeline.init()``, i.e. before apps are added.
+
+        Args:
+            data (bytes): a pickle of this very state, if one is at hand
+                (e.g. the file it was loaded from), to skip pickling again.
+
+        Returns:
+            bytes: the pickled state.
+        """
+        if data is None:
+            data = pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
+        self._snapshot = data
+        return data
+
+    def reset(self) -> "ConfigRouterNetTopo":
+        """Return the topology, in place, to the state of the last `snapshot`.
+
+        Everything a run changes (timeline, memories, protocols, rules,
+        apps) is replaced by its state at snapshot time, so the topology can
+        be retargeted and run again without rebuilding it from the config.
+        The topology object stays the same, but its nodes and timeline are new
+        objects: look them up again after a reset.
+
+        Returns:
+            ConfigRouterNetTopo: self, for chaining.
+        """
+        data = getattr(self, "_snapshot", None)
+        if data is None:
+            raise RuntimeError("reset() needs a snapshot() of the topology first")
+        restored = pickle.loads(data)
+        self.__dict__.clear()
+        self.__dict__.update(restored.__dict__)
+        self._snapshot = data
+        return self
+
+    def _load(self, config):
+        if not isinstance(config, dict):
+            return super()._load(config)
+
+        self._get_templates(config)
+        # quantum connections are only supported by sequential simulation so far
+        if not config[self.IS_PARALLEL]:
+            self._add_qconnections(config)
+        self._add_timeline(config)
+        self._map_bsm_routers(config)
+        self._add_nodes(config)
+        install_indexes(self)
+        self._add_bsm_node_to_router()
+        self._add_qchannels(config)
+        self._add_cchannels(config)
+        self._add_cconnections(config)
+        install_forwarding(self)
+        self._generate_forwarding_table(config)
+
+    def _generate_forwarding_table(self, config):
+        # same next hops as `RouterNetTopo._generate_forwarding_table`, which
+        # runs a Dijkstra per pair of routers (cubic in the chain length): one
+        # single-source run per router gives every path `dijkstra_path` would
+        # (paths to a smaller name are still taken reversed from the other end)
+        graph = Graph()
+        for node in config[Topo.ALL_NODE]:
+            if node[Topo.TYPE] == self.QUANTUM_ROUTER:
+                graph.add_node(node[Topo.NAME])
+        costs = {}
+        for qc in self.qchannels:
+            router, bsm = qc.sender.name, qc.receiver
+            if bsm not in costs:
+                costs[bsm] = [router, qc.distance]
+            else:
+                costs[bsm] = [router] + costs[bsm]
+                costs[bsm][-1] += qc.distance
+        graph.add_weighted_edges_from(costs.values())
+
+        paths = {name: single_source_dijkstra(graph, name)[1] for name in graph.nodes}
+        for src in self.nodes[self.QUANTUM_ROUTER]:
+            routing_protocol = src.network_manager.protocol_stack[0]
+            for dst_name in graph.nodes:
+                if src.name == dst_name:
+                    continue
+                if dst_name > src.name:
+                    path = paths[src.name].get(dst_name)
+                    next_hop = path[1] if path else None
+                else:
+                    path = paths[dst_name].get(src.name)
+                    next_hop = path[-2] if path else None
+                if next_hop is not None:
+                    routing_protocol.add_forwarding_rule(dst_name, next_hop)
+
+
+def retarget(topology: RouterNetTopo, config: dict) -> RouterNetTopo:
+    """Push the per-run values of a config into an already built topology.
+
+    Used to reuse a topology built for another run of the same network (see
+    `sweep.warm`): link distances, attenuations, classical delays and node
+    seeds are overwritten, and the forwarding tables are recomputed. The
+    structure (nodes, memory sizes, connections) must match the one the
+    topology was built from. Must be called before ``timeline.init()``.
+
+    Args:
+        topology (RouterNetTopo): unused topology, modified in place.
+        config (dict): network config of the run, e.g. from `apply_overrides`;
+            not modified.
+
+    Returns:
+        RouterNetTopo: the same topology, for chaining.
+    """
+    config = copy.deepcopy(config)
+    # expand quantum connections into BSM nodes and channels, on the dict only
+    topology._add_qconnections(config)
+    tl = topology.get_timeline()
+
+    for node in config[Topo.ALL_NODE]:
+        tl.get_entity_by_name(node[Topo.NAME]).set_seed(node[Topo.SEED])
+
+    for qc in config.get(Topo.ALL_Q_CHANNEL, []):
+        qc_obj = tl.get_entity_by_name(qc.get(Topo.NAME, "qc.{}.{}".format(qc[Topo.SRC], qc[Topo.DST])))
+        qc_obj.distance = qc[Topo.DISTANCE]
+        qc_obj.attenuation = qc[Topo.ATTENUATION]
+
+    cchannels = [(cc.get(Topo.NAME, "cc.{}.{}".format(cc[Topo.SRC], cc[Topo.DST])), cc)
+                 for cc in config.get(Topo.ALL_C_CHANNEL, [])]
+    for cc in config.get(Topo.ALL_CC_CONNECT, []):
+        node1, node2 = cc[Topo.CONNECT_NODE_1], cc[Topo.CONNECT_NODE_2]
+        cchannels += [("cc.{}.{}".format(node1, node2), cc), ("cc.{}.{}".format(node2, node1), cc)]
+    for name, cc in cchannels:
+        cc_obj = tl.get_entity_by_name(name)
+        if cc_obj is None:
+            continue
+        cc_obj.distance = cc.get(Topo.DISTANCE, 1000)
+        delay = cc.get(Topo.DELAY, -1)
+        cc_obj.delay = delay if delay != -1 else cc_obj.distance / cc_obj.light_speed
+
+    for router in topology.get_nodes_by_type(RouterNetTopo.QUANTUM_ROUTER):
+        router.network_manager.protocol_stack[0].forwarding_table.clear()
+    topology._generate_forwarding_table(config)
+    return topology
+
+
+def build_topology(network_config: Union[str, dict], **overrides) -> RouterNetTopo:
+    """Build a topology for one run without writing anything to disk.
+
+    Args:
+        network_config (str | dict): path of a network JSON or an already loaded config.
+        **overrides: keyword arguments of `apply_overrides` (distance, distances,
+            attenuation, memo_size, seed_offset).
+
+    Returns:
+        RouterNetTopo: the built topology.
+    """
+    if isinstance(network_config, dict):
+        config = copy.deepcopy(network_config)
+    else:
+        config = load_config(network_config)
+    apply_overrides(config, **overrides)
+    return ConfigRouterNetTopo(config)
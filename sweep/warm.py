@@ -0,0 +1,161 @@
+import copy
+import gc
+import json
+import os
+import pickle
+import selectors
+import signal
+import sys
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from sequence.topology.router_net_topo import RouterNetTopo
+from sequence.topology.topology import Topology as Topo
+
+from .topology import ConfigRouterNetTopo, retarget
+
+if TYPE_CHECKING:
+    from .snapshots import TopologySnapshots
+
+# per-run values, overwritten by `retarget`; everything else is structure
+_RUN_FIELDS = (Topo.DISTANCE, Topo.ATTENUATION, Topo.SEED, Topo.DELAY)
+
+
+def structure_key(config: dict) -> str:
+    """Key of the network structure of a config, ignoring the per-run values.
+
+    Two configs with the same key can share a template topology.
+    """
+    config = copy.deepcopy(config)
+    for section in (Topo.ALL_NODE, Topo.ALL_QC_CONNECT, Topo.ALL_CC_CONNECT, Topo.ALL_Q_CHANNEL, Topo.ALL_C_CHANNEL):
+        for entry in config.get(section, []):
+            for field in _RUN_FIELDS:
+                entry.pop(field, None)
+    config.pop(Topo.STOP_TIME, None)
+    return json.dumps(config, sort_keys=True)
+
+
+class TemplateTopologies:
+    """Prebuilt topologies, handed out once and retargeted to each run.
+
+    In warm-start mode the sweep parent calls `prepare` once per network,
+    which builds the topology and applies `setup` (e.g. `set_parameters`),
+    and then forks a child per grid point. Each child `checkout`s the template
+    from its copy-on-write memory, pushes the distances and seeds of its own
+    run into it with `retarget`, and runs it; the parent's template is never
+    touched. Outside a forked child `checkout` simply builds a fresh topology,
+    so the same `simulate` works in every mode.
+
+    Attributes:
+        setup (Callable[[RouterNetTopo], None]): applied to every built topology.
+        snapshots (TopologySnapshots): if given, topologies are loaded from its
+            snapshots instead of built from the config.
+        templates (Dict[str, RouterNetTopo]): unused topologies by `structure_key`.
+    """
+
+    def __init__(self, setup: Optional[Callable[[RouterNetTopo], Any]] = None,
+                 snapshots: Optional["TopologySnapshots"] = None):
+        self.setup = setup
+        self.snapshots = snapshots
+        self.templates: Dict[str, RouterNetTopo] = {}
+
+    def _build(self, config: dict) -> RouterNetTopo:
+        if self.snapshots is not None:
+            topology = self.snapshots.get(config)
+        else:
+            topology = ConfigRouterNetTopo(copy.deepcopy(config))
+        if self.setup is not None:
+            self.setup(topology)
+        return topology
+
+    def prepare(self, config: dict) -> None:
+        """Build and keep a template for the structure of `config`."""
+        self.templates[structure_key(config)] = self._build(config)
+
+    def checkout(self, config: dict) -> RouterNetTopo:
+        """Topology for one run of `config`, set up and ready for ``timeline.init()``.
+
+        A prepared template is removed from the store when it is checked out,
+        a topology is only ever run once.
+        """
+        template = self.templates.pop(structure_key(config), None)
+        if template is None:
+            return self._build(config)
+        return retarget(template, config)
+
+
+def _child(func: Callable, task: Tuple, write_fd: int) -> None:
+    try:
+        try:
+            payload = pickle.dumps((True, func(task)))
+        except BaseException as error:
+            payload = pickle.dumps((False, error))
+        with os.fdopen(write_fd, "wb") as pipe:
+            pipe.write(payload)
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(0)
+
+
+def fork_map(func: Callable[[Tuple], Any], tasks: Iterable[Tuple], workers: int) -> Iterator[Any]:
+    """Run ``func(task)`` in a freshly forked child per task, `workers` at a time.
+
+    Children are forked from the current process, so everything it imported
+    and built (e.g. `TemplateTopologies.prepare`) is inherited without any
+    startup cost. The heap is moved to the permanent GC generation first, so
+    the collector in the children does not touch (and copy) the parent's pages.
+
+    Results are yielded in completion order; an exception raised by ``func``
+    is re-raised here, after killing the children still running. POSIX only.
+    """
+    gc.collect()
+    gc.freeze()
+    tasks = iter(tasks)
+    selector = selectors.DefaultSelector()
+    running = 0
+    try:
+        while True:
+            while running < workers:
+                task = next(tasks, None)
+                if task is None:
+                    break
+                sys.stdout.flush()
+                read_fd, write_fd = os.pipe()
+                pid = os.fork()
+                if pid == 0:
+                    os.close(read_fd)
+                    _child(func, task, write_fd)
+                os.close(write_fd)
+                selector.register(read_fd, selectors.EVENT_READ, (pid, bytearray()))
+                running += 1
+            if running == 0:
+                return
+
+            for key, _ in selector.select():
+                pid, data = key.data
+                chunk = os.read(key.fd, 1 << 16)
+                if chunk:
+                    data.extend(chunk)
+                    continue
+                selector.unregister(key.fd)
+                os.close(key.fd)
+                os.waitpid(pid, 0)
+                running -= 1
+                if not data:
+                    raise RuntimeError("warm-start child %d died without a result" % pid)
+                ok, result = pickle.loads(bytes(data))
+                if not ok:
+                    raise result
+                yield result
+    finally:
+        # on an error (or an abandoned generator) the children still running are killed and reaped
+        for key in list(selector.get_map().values()):
+            pid = key.data[0]
+            os.close(key.fd)
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            os.waitpid(pid, 0)
+        selector.close()
+        gc.unfreeze()
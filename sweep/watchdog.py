@@ -0,0 +1,149 @@
+import logging
+import os
+import resource
+from time import perf_counter
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+COMPLETED = "completed"
+BUDGET_EXCEEDED = "budget_exceeded"
+
+
+def _memory_usage() -> int:
+    """Current resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # no procfs: fall back to the peak RSS (kB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+class Rate(float):
+    """A rate together with the status of the run that measured it.
+
+    It is a float everywhere (arithmetic, numpy, JSON), so callers that only
+    want the number are unaffected; `run_sweep` and `run_experiment` read
+    `complete` to keep partial results out of checkpoints and to mark them
+    in the stored rows, and `cached` to keep cache hits out of the
+    `CostModel` records. It pickles with its status, so it survives worker
+    processes and remote workers.
+
+    Attributes:
+        complete (bool): False if the run was stopped by its budget and the
+            rate only covers the window simulated so far.
+        cached (bool): True if the rate was read from the result cache
+            instead of simulated.
+    """
+
+    def __new__(cls, value: float, complete: bool = True, cached: bool = False):
+        rate = super().__new__(cls, value)
+        rate.complete = complete
+        rate.cached = cached
+        return rate
+
+
+class Watchdog:
+    """Runs a timeline under a budget of executed events, wall time and memory.
+
+    `run` replaces ``timeline.run()``: it executes the same event loop, but
+    every `check_every` events it compares the run against the budget. When a
+    limit is exceeded the loop stops cleanly at the current simulation time,
+    the unexecuted events are left in the queue and `status` is set to
+    ``"budget_exceeded"``, so the caller can still read a partial result off
+    its apps (e.g. a throughput over the window simulated so far).
+
+    A budget of None disables that limit.
+
+    Attributes:
+        timeline (Timeline): timeline to run.
+        max_events (int): maximum number of executed events.
+        max_seconds (float): maximum wall time of the run (s).
+        max_memory (int): maximum resident memory of the process (bytes).
+        check_every (int): number of events between two budget checks.
+        status (str): ``"completed"`` or ``"budget_exceeded"`` after `run`.
+        reason (str): which budget was exceeded (None if completed).
+        events (int): events executed by `run`.
+        seconds (float): wall time of `run` (s).
+        peak_memory (int): largest resident memory seen at a check (bytes).
+    """
+
+    def __init__(self, timeline, max_events: Optional[int] = None, max_seconds: Optional[float] = None,
+                 max_memory: Optional[int] = None, check_every: int = 1000):
+        self.timeline = timeline
+        self.max_events = max_events
+        self.max_seconds = max_seconds
+        self.max_memory = max_memory
+        self.check_every = check_every
+        self.status = None
+        self.reason = None
+        self.events = 0
+        self.seconds = 0.0
+        self.peak_memory = 0
+
+    @property
+    def exceeded(self) -> bool:
+        return self.status == BUDGET_EXCEEDED
+
+    def _next_check(self, events: int) -> int:
+        # the event budget is enforced exactly, the other budgets every check_every events
+        next_check = events + self.check_every
+        if self.max_events is not None:
+            next_check = min(next_check, max(self.max_events, events + 1))
+        return next_check
+
+    def _over_budget(self, tick: float) -> Optional[str]:
+        if self.max_events is not None and self.events >= self.max_events:
+            return "%d events" % self.events
+        self.seconds = perf_counter() - tick
+        if self.max_seconds is not None and self.seconds >= self.max_seconds:
+            return "%.1f s wall time" % self.seconds
+        if self.max_memory is not None:
+            self.peak_memory = max(self.peak_memory, _memory_usage())
+            if self.peak_memory >= self.max_memory:
+                return "%d MB memory" % (self.peak_memory >> 20)
+        return None
+
+    def run(self) -> str:
+        """Run the timeline until its stop time, its last event or the budget.
+
+        Returns:
+            str: the run status, ``"completed"`` or ``"budget_exceeded"``.
+        """
+        tl = self.timeline
+        tick = perf_counter()
+        tl.is_running = True
+        self.status = COMPLETED
+        self.reason = None
+        self.events = 0
+        next_check = self._next_check(0)
+
+        # same loop as Timeline.run, with the budget checks interleaved
+        while len(tl.events) > 0:
+            event = tl.events.pop()
+
+            if event.time >= tl.stop_time:
+                tl.schedule(event)  # return to event list
+                break
+            assert tl.time <= event.time, f"invalid event time for process scheduled on {event.process.owner}"
+            if event.is_invalid():
+                continue
+
+            tl.time = event.time
+            event.process.run()
+            tl.run_counter += 1
+            self.events += 1
+
+            if self.events >= next_check:
+                next_check = self._next_check(self.events)
+                self.reason = self._over_budget(tick)
+                if self.reason is not None:
+                    self.status = BUDGET_EXCEEDED
+                    log.warning("run aborted at t=%g ps: budget of %s exceeded", tl.now(), self.reason)
+                    break
+
+        tl.is_running = False
+        self.seconds = perf_counter() - tick
+        return self.status
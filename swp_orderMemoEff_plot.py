@@ -1,15 +1,17 @@
 import matplotlib.pyplot as plt
-import numpy as np
+from sweep.results_store import open_store
 
 final_distance = 200
 distances = list(range(1, final_distance + 1, 10))
 
-# Load rates from the file
+# Load rates from the results store (filled from data/rates if it is empty);
+# every curve is plotted at its own distances, a missing curve is left empty
+store = open_store("data/results")
 
-rates_left_to_right_eff_dec = np.loadtxt('data/rates/network(N=2Routers.json)(Swapping_order=left_to_right)(memo_eff=decreasing).txt')
-rates_left_to_right_eff_inc = np.loadtxt('data/rates/network(N=2Routers.json)(Swapping_order=left_to_right)(memo_eff=increasing).txt')
-rates_right_to_left_eff_dec = np.loadtxt('data/rates/network(N=2Routers.json)(Swapping_order=right_to_left)(memo_eff=decreasing).txt')
-rates_right_to_left_eff_inc = np.loadtxt('data/rates/network(N=2Routers.json)(Swapping_order=right_to_left)(memo_eff=increasing).txt')
+rates_left_to_right_eff_dec = store.query(unique=("distance",), dataset="rates", network="2Routers.json", swapping_order="left_to_right", memo_eff="decreasing")
+rates_left_to_right_eff_inc = store.query(unique=("distance",), dataset="rates", network="2Routers.json", swapping_order="left_to_right", memo_eff="increasing")
+rates_right_to_left_eff_dec = store.query(unique=("distance",), dataset="rates", network="2Routers.json", swapping_order="right_to_left", memo_eff="decreasing")
+rates_right_to_left_eff_inc = store.query(unique=("distance",), dataset="rates", network="2Routers.json", swapping_order="right_to_left", memo_eff="increasing")
 
 
 # Plotting the moving average curve
@@ -29,11 +31,11 @@ ax.set_yticks([10**0, 10**2, 10**4])
 #ax.plot(distances, rates10s, label='rates10s')
 # Plot each line with different colors, line styles, and markers
 
-ax.plot(distances, rates_left_to_right_eff_dec, linestyle='--', marker='o', label='rates order = left_to_right eff = decreasing')
-ax.plot(distances, rates_right_to_left_eff_dec, linestyle='--', marker='o', label='rates order = right_to_left eff = decreasing')
+ax.plot(rates_left_to_right_eff_dec["distance"] / 1000, rates_left_to_right_eff_dec["rate"], linestyle='--', marker='o', label='rates order = left_to_right eff = decreasing')
+ax.plot(rates_right_to_left_eff_dec["distance"] / 1000, rates_right_to_left_eff_dec["rate"], linestyle='--', marker='o', label='rates order = right_to_left eff = decreasing')
 
-ax.plot(distances, rates_left_to_right_eff_inc, linestyle='--', marker='o', label='rates order = left_to_right eff = increasing')
-ax.plot(distances, rates_right_to_left_eff_inc, linestyle='--', marker='o', label='rates order = right_to_left eff = increasing')
+ax.plot(rates_left_to_right_eff_inc["distance"] / 1000, rates_left_to_right_eff_inc["rate"], linestyle='--', marker='o', label='rates order = left_to_right eff = increasing')
+ax.plot(rates_right_to_left_eff_inc["distance"] / 1000, rates_right_to_left_eff_inc["rate"], linestyle='--', marker='o', label='rates order = right_to_left eff = increasing')
 
 
 
@@ -1,264 +1,32 @@
-from sequence.network_management.network_manager import ResourceReservationProtocol
-from sequence.network_management.reservation import Reservation
 from swaping_rules.ResourceReservationProtocol import create_rules_es_left_to_right, create_rules_es_right_to_left
-from sequence.topology.node import QuantumRouter
-from sequence.topology.router_net_topo import RouterNetTopo
-import json
-from sequence.kernel.event import Event
-from sequence.kernel.process import Process
-from typing import TYPE_CHECKING, List, Dict
-import logging
-import numpy as np
-
-
-"""# Configure the logging
-log_filename = 'entanglement_log.log'
-logging.basicConfig(filename=log_filename, level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-
-# Create a logger
-logger = logging.getLogger(__name__)
-
-# Define a custom filter
-class EntanglementFilter(logging.Filter):
-    def filter(self, record):
-        return "successful entanglement" in record.getMessage()"""
-
-# Add the filter to the logger
-#logger.addFilter(EntanglementFilter())
-
-def print_node_info(node):
-    print(node.name," Memories")
-    print("Index:\tEntangled Node:\tFidelity:\tEntanglement Time:")
-    for i, info in enumerate(node.resource_manager.memory_manager):
-        print("{:6}\t{:15}\t{:9}\t{}".format(str(i), str(info.remote_node),
-                                             str(info.fidelity),
-                                             str(info.entangle_time * 1e-12)))
-class RequestApp:
-    def __init__(self, node: "QuantumRouter", other: str, memory_size=1, target_fidelity=0.9):
-        self.node = node
-        self.node.set_app(self)
-        self.other = other
-        self.memory_size = memory_size
-        self.target_fidelity = target_fidelity
-        self.eg_counter = 0
-        self.reserve_res: bool = None
-        self.memory_counter: int = 0
-        self.path: List[str] = []
-        self.memo_to_reserve: Dict[int, Reservation] = {}
-
-    def start(self):
-        now = self.node.timeline.now()
-        self.start_time = now + 1e12
-        self.end_time = now + 1.5e12
-        nm = self.node.network_manager
-        nm.request(self.other, start_time=self.start_time, end_time= self.end_time,
-                   memory_size=self.memory_size,
-                   target_fidelity=self.target_fidelity)
-        
-        
-    def get_reserve_res(self, reservation: "Reservation", result: bool) -> None:
-        """Method to receive reservation result from network manager.
-
-        Args:
-            reservation (Reservation): reservation that has been completed.
-            result (bool): result of the request (approved/rejected).
-
-        Side Effects:
-            May schedule a start/retry event based on reservation result.
-        """
-        self.reserve_res = result
-        if result:
-            self.schedule_reservation(reservation)
-
-    def add_memo_reserve_map(self, index: int, reservation: "Reservation") -> None:
-        self.memo_to_reserve[index] = reservation
-
-    def remove_memo_reserve_map(self, index: int) -> None:
-        self.memo_to_reserve.pop(index)
-
-    def get_memory(self, info: "MemoryInfo") -> None:
-        """Method to receive entangled memories.
-
-        Will check if the received memory is qualified.
-        If it's a qualified memory, the application sets memory to RAW state
-        and release back to resource manager.
-        The counter of entanglement memories, 'memory_counter', is added.
-        Otherwise, the application does not modify the state of memory and
-        release back to the resource manager.
-
-        Args:
-            info (MemoryInfo): info on the qualified entangled memory.
-        """
-
-        if info.state == "ENTANGLED" and info.remote_node == self.other:
-            #print("\t{} app received memory {} ENTANGLED at time {}".format(self.node.name, info.index, self.node.timeline.now() * 1e-12))
-            self.node.resource_manager.update(None, info.memory, "RAW")
-            self.eg_counter +=1
-
-        if info.state != "ENTANGLED":
-            return
-
-        if info.index in self.memo_to_reserve:
-            reservation = self.memo_to_reserve[info.index]
-            if info.remote_node == reservation.initiator and info.fidelity >= reservation.fidelity:
-                self.node.resource_manager.update(None, info.memory, "RAW")
-            elif info.remote_node == reservation.responder and info.fidelity >= reservation.fidelity:
-                self.memory_counter += 1
-                self.node.resource_manager.update(None, info.memory, "RAW")
-
-    def get_throughput(self) -> float:
-        return self.memory_counter / (self.end_t - self.start_t) * 1e12
-
-    def get_other_reservation(self, reservation: "Reservation") -> None:
-        """Method to add the approved reservation that is requested by other
-        nodes
-
-        Args:
-            reservation (Reservation): reservation that uses the node of application as the responder
-
-        Side Effects:
-            Will add calls to `add_memo_reserve_map` and `remove_memo_reserve_map` methods.
-        """
-        self.schedule_reservation(reservation)
-
-    def schedule_reservation(self, reservation: "Reservation") -> None:
-        if reservation.initiator == self.node.name:
-            self.path = reservation.path
-        for card in self.node.network_manager.protocol_stack[1].timecards:
-            if reservation in card.reservations:
-                process = Process(self, "add_memo_reserve_map", [card.memory_index, reservation])
-                event = Event(reservation.start_time, process)
-                self.node.timeline.schedule(event)
-                process = Process(self, "remove_memo_reserve_map", [card.memory_index])
-                event = Event(reservation.end_time, process)
-                self.node.timeline.schedule(event)
-
-    
-    def get_throughput(self) -> float:
-        return self.eg_counter / (self.end_time - self.start_time) * 1e12
-
-class ResetApp:
-    def __init__(self, node, other_node_name, target_fidelity=0.9):
-        self.node = node
-        self.node.set_app(self)
-        self.other_node_name = other_node_name
-        self.target_fidelity = target_fidelity
-
-    def get_other_reservation(self, reservation):
-        """called when receiving the request from the initiating node.
-
-        For this application, we do not need to do anything.
-        """
-
-        pass
-
-    def get_memory(self, info):
-        """Similar to the get_memory method of the main application.
-
-        We check if the memory info meets the request first,
-        by noting the remote entangled memory and entanglement fidelity.
-        We then free the memory for future use.
-        """
-        if (info.state == "ENTANGLED" and info.remote_node == self.other_node_name
-                and info.fidelity > self.target_fidelity):
-            self.node.resource_manager.update(None, info.memory, "RAW")
-
-def set_distances(network_config, total_distance):
-    # Load the JSON file
-    
-    with open(network_config) as file:
-        data = json.load(file)
-    qconnections = data['qconnections']
-    cconnections = data['cconnections']
-    hubs_number = len(data['nodes'])
-    DISTANCE = total_distance/(hubs_number-1)
-    
-    # Update qconnections distances
-    for qconnection in qconnections:
-        qconnection['distance'] = DISTANCE
-    
-    # Update cconnections distances
-    for cconnection in cconnections:
-        cconnection['distance'] = DISTANCE
-
-    # Save the updated JSON file
-    with open(network_config, 'w') as file:
-        json.dump(data, file, indent=2)
-
-def set_parameters(topology: RouterNetTopo):
-    # set memory parameters
-    MEMO_FREQ = -1
-    MEMO_EXPIRE = 10e-3 #(10 ms)
-    MEMO_EFFICIENCY =   1
-    MEMO_FIDELITY =0.99
-    WAVE_LENGTH = 500
-    for node in topology.get_nodes_by_type(RouterNetTopo.QUANTUM_ROUTER):
-        memory_array = node.get_components_by_type("MemoryArray")[0]
-        memory_array.update_memory_params("frequency", MEMO_FREQ)
-        memory_array.update_memory_params("coherence_time", MEMO_EXPIRE)
-        memory_array.update_memory_params("efficiency", MEMO_EFFICIENCY)
-        memory_array.update_memory_params("raw_fidelity", MEMO_FIDELITY)
-        memory_array.update_memory_params("wavelength", WAVE_LENGTH)
-
-    # set detector parameters
-    DETECTOR_EFFICIENCY = 1
-    
-    for node in topology.get_nodes_by_type(RouterNetTopo.BSM_NODE):
-        bsm = node.get_components_by_type("SingleAtomBSM")[0]
-        bsm.update_detectors_params("efficiency", DETECTOR_EFFICIENCY)
-    # set entanglement swapping parameters
-    SWAPPIN_SUCCESS_RATE = 1
-    for node in topology.get_nodes_by_type(RouterNetTopo.QUANTUM_ROUTER):
-        node.network_manager.protocol_stack[1].set_swapping_success_rate(SWAPPIN_SUCCESS_RATE)
-        
-def simulate(network_config,distance,swapping_order = None):
-    set_distances(network_config, distance)
-    if swapping_order is not None:
-        ResourceReservationProtocol.create_rules = swapping_order
-    network_topo = RouterNetTopo(network_config)
-    #set the simulation parametters
-    set_parameters(network_topo)
-    tl = network_topo.get_timeline()
-    tl.stop_time = 2e12
-    tl.show_progress = False
-
-    start_node_name = "Nodei"
-    end_node_name = "Nodej"
-    router1_name = "r1"
-    router2_name = "r2"
-    node1 = node2 = r1 = r2 =None
-
-    for router in network_topo.get_nodes_by_type(RouterNetTopo.QUANTUM_ROUTER):
-        if router.name == start_node_name:
-            node1 = router
-        elif router.name == end_node_name:
-            node2 = router
-        elif router.name == router1_name:
-            r1 = router
-        elif router.name == router2_name:
-            r2 = router
-    target_fidelity = 0
-    """app_node1_r1 = RequestApp(node1, r1.name,memory_size=1, target_fidelity=target_fidelity)
-    app_r1_r2 = RequestApp(r1, r2.name,memory_size=2, target_fidelity=target_fidelity)
-    app_r2_node2 = RequestApp(r2, node2.name,memory_size=4, target_fidelity=target_fidelity)"""
-    app_node1 = RequestApp(node1, node2.name,memory_size=1, target_fidelity=target_fidelity)
-    app_node2 = ResetApp(node2, node1.name,target_fidelity=target_fidelity)
-
-    tl.init()
-    #app_node1_r1.start()
-    #app_r1_r2.start()
-    #app_r2_node2.start()
-    app_node1.start()
-    tl.run()
-    """print_node_info(node1)
-    print_node_info(r1)
-    print_node_info(r2)
-    print_node_info(node2)"""
-    
-    #print (app_node2.eg_counter)
-    rate = app_node1.get_throughput()
-    print(rate)
-    return (rate)
+from sweep.experiment import run_experiment
+from sweep.simulation import DEFAULT_PARAMETERS, Simulation
+from sweep import SweepCheckpoint
+from sweep.replicas import paired_difference, run_replicas
+from sweep.results_store import ResultsStore
+from sweep.topology import load_config
+
+# values applied by set_parameters, also part of the result cache key
+PARAMETERS = dict(DEFAULT_PARAMETERS)
+STOP_TIME = 2e12
+CONVERGENCE_TARGET = None  # e.g. 0.05: stop once the rate CI half width is within 5% of the rate
+CACHE = None  # e.g. sweep.cache.ResultCache("data/cache"): reuse the results of runs already simulated
+# e.g. sweep.snapshots.TopologySnapshots("data/topologies"): load built topologies from pickled snapshots
+SNAPSHOTS = None
+# per-run limits, a run over budget is aborted and reports the rate measured so far,
+# e.g. {"max_events": None, "max_seconds": 3600, "max_memory": 8 << 30}
+RUN_BUDGET = None
+
+# apps, set_parameters and the simulate variants live in sweep.simulation;
+# the same sweep can be run with `python -m sweep run <network> --mode branch`
+SIMULATION = Simulation(PARAMETERS, stop_time=STOP_TIME, cache=CACHE, run_budget=RUN_BUDGET,
+                        convergence_target=CONVERGENCE_TARGET, snapshots=SNAPSHOTS)
+simulate = SIMULATION.simulate
+simulate_orders = SIMULATION.simulate_orders
+simulate_batch = SIMULATION.simulate_batch
+
+# e.g. sweep.cost_model.CostModel(SIMULATION.point_features, "data/cost_model.jsonl"): run the longest points first
+COST_MODEL = None
 
 final_distance = 200000
 distances = list(range(1000, final_distance+1, 10000))
@@ -270,16 +38,52 @@ network_config = "networks/2RoutersMultiChannelsDec.json"
 swapping_orders = {"left_to_right":create_rules_es_left_to_right,"right_to_left":create_rules_es_right_to_left}
 #swapping_orders = {"left_to_right":create_rules_es_left_to_right}
 
-for swp_order in swapping_orders:
-    print("simulation fr swapping order:", swp_order)
-    rates = []
-    for L in distances:
-        rates.append(simulate(network_config, L,swapping_orders[swp_order]))
-        #simulate(network_config, L)
-        print("Simulation done for ", L)
-        filename =  'data/rates/' +  ('network(N=%s)(Swapping_order=%s).txt' 
-                                        % ( network_config.split('/')[-1],
-                                            swp_order
-                                            ))
-    # Save rates to a file
-    np.savetxt(filename, rates)
\ No newline at end of file
+WORKERS = None  # worker processes for the sweep, None = one per core
+RESUME = True  # skip the points already recorded in the checkpoint file
+REPLICAS = 1  # independently seeded runs per point, > 1 reports mean and CI
+ADAPTIVE = False  # refine the distance grid where the rate changes fast, stop once it hits 0
+WARM_START = False  # True: build the topology once and fork a child per point (POSIX only)
+BRANCH_ORDERS = False  # True: run the setup once per distance and branch it into the swapping orders (POSIX only)
+BATCH_SIZE = 1  # > 1: run this many grid points as copies of the network under one timeline (small networks)
+
+if __name__ == "__main__":
+    checkpoint = SweepCheckpoint('data/checkpoints/' + ('network(N=%s)(Swapping_order_sweep).jsonl'
+                                                        % network_config.split('/')[-1]),
+                                 resume=RESUME, settings=SIMULATION.run_settings())
+    store = ResultsStore("data/results")
+    if REPLICAS > 1 and not ADAPTIVE:
+        labels = [(swp_order, L) for swp_order in swapping_orders for L in distances]
+        grid = [(network_config, L, swapping_orders[swp_order]) for swp_order, L in labels]
+        if WARM_START:
+            SIMULATION.templates.prepare(load_config(network_config))
+        stats = run_replicas(simulate, grid, REPLICAS, workers=WORKERS, checkpoint=checkpoint,
+                             cost_model=COST_MODEL, warm_start=WARM_START)
+        store.append({"dataset": "rates",
+                      "network": network_config.split('/')[-1],
+                      "swapping_order": swp_order,
+                      "distance": L,
+                      "rate": point.mean,
+                      "rate_ci": point.half_width,
+                      "replicas": REPLICAS}
+                     for (swp_order, L), point in zip(labels, stats))
+        # replicas share seeds across swapping orders, so compare them pairwise
+        by_label = dict(zip(labels, stats))
+        orders = list(swapping_orders)
+        for first, second in zip(orders, orders[1:]):
+            for L in distances:
+                diff = paired_difference(by_label[(first, L)], by_label[(second, L)])
+                print("L =", L, first, "-", second, ":", diff,
+                      "significant" if diff.is_significant() else "not significant")
+    else:
+        if ADAPTIVE:
+            mode = "adaptive"
+        elif BATCH_SIZE > 1:
+            mode = "batch"
+        elif BRANCH_ORDERS:
+            mode = "branch"
+        else:
+            mode = "grid"
+        run_experiment(network_config, distances, swapping_orders, mode=mode,
+                       simulation=SIMULATION, workers=WORKERS, batch_size=BATCH_SIZE,
+                       checkpoint=checkpoint, cost_model=COST_MODEL, warm_start=WARM_START, store=store,
+                       adaptive={"stop": final_distance, "coarse_step": 20000, "min_step": 5000})
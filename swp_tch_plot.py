@@ -1,16 +1,18 @@
 import matplotlib.pyplot as plt
-import numpy as np
+from sweep.results_store import open_store
 
 final_distance = 200
 distances = list(range(1, final_distance + 1, 10))
 
-# Load rates from the file
+# Load rates from the results store (filled from data/rates if it is empty);
+# every curve is plotted at its own distances, a missing curve is left empty
+store = open_store("data/results")
 
-rates1ms = np.loadtxt('data/rates/network(N=2Routers.json)(cohTime=1.000ms).txt')
-rates10ms = np.loadtxt('data/rates/network(N=2Routers.json)(cohTime=10.000ms).txt')
-rates100ms = np.loadtxt('data/rates/network(N=2Routers.json)(cohTime=100.000ms).txt')
-rates1s= np.loadtxt('data/rates/network(N=2Routers.json)(cohTime=1000.000ms).txt')
-ratesinf = np.loadtxt('data/rates/network(N=2Routers.json)(cohTime=inf).txt')
+rates1ms = store.query(unique=("distance",), dataset="rates", network="2Routers.json", coherence_time="1.000ms")
+rates10ms = store.query(unique=("distance",), dataset="rates", network="2Routers.json", coherence_time="10.000ms")
+rates100ms = store.query(unique=("distance",), dataset="rates", network="2Routers.json", coherence_time="100.000ms")
+rates1s = store.query(unique=("distance",), dataset="rates", network="2Routers.json", coherence_time="1000.000ms")
+ratesinf = store.query(unique=("distance",), dataset="rates", network="2Routers.json", coherence_time="inf")
 
 
 
@@ -31,11 +33,11 @@ ax.set_yticks([10**-4,10**-2,10**0, 10**2, 10**4])
 #ax.plot(distances, rates1s, label='rates1s')
 #ax.plot(distances, rates10s, label='rates10s')
 # Plot each line with different colors, line styles, and markers
-ax.plot(distances, rates1ms, linestyle='--', marker='o', label='rates cohTime = 1ms')
-ax.plot(distances, rates10ms, linestyle='-.', marker='D', label='rates cohTime = 10ms')
-ax.plot(distances, rates100ms, linestyle=':', marker='s', label='rates cohTime = 100ms')
-ax.plot(distances, rates1s, linestyle=':', marker='^', label='rates cohTime = 1s')
-ax.plot(distances, ratesinf, linestyle='--', marker='x', label='rates cohTime = inf')
+ax.plot(rates1ms["distance"] / 1000, rates1ms["rate"], linestyle='--', marker='o', label='rates cohTime = 1ms')
+ax.plot(rates10ms["distance"] / 1000, rates10ms["rate"], linestyle='-.', marker='D', label='rates cohTime = 10ms')
+ax.plot(rates100ms["distance"] / 1000, rates100ms["rate"], linestyle=':', marker='s', label='rates cohTime = 100ms')
+ax.plot(rates1s["distance"] / 1000, rates1s["rate"], linestyle=':', marker='^', label='rates cohTime = 1s')
+ax.plot(ratesinf["distance"] / 1000, ratesinf["rate"], linestyle='--', marker='x', label='rates cohTime = inf')
 
 
 #ax.plot(distances, rates2e6, label='rates 2e6')
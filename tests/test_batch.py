@@ -0,0 +1,18 @@
+"""Scenarios batched under one timeline must give the rates of their own runs."""
+
+from sweep import strategies
+from sweep.simulation import Simulation
+
+NETWORK = "networks/2RoutersMultiChannelsDec copy.json"
+
+
+def test_mixed_batch_equals_single_runs():
+    simulation = Simulation(stop_time=1.05e12, verbose=False)
+    left, right = strategies.resolve("left_to_right"), strategies.resolve("right_to_left")
+    # alone, the 120 km run gives 22 here; sharing one event heap with the 60 km run gave 24
+    scenarios = [(60000, left, 0), (120000, left, 0), (90000, right, 0, {"memo_efficiency": 0.8})]
+    single = [simulation.simulate(NETWORK, distance, order, seed_offset, *parameters)
+              for distance, order, seed_offset, *parameters in scenarios]
+    batched = simulation.simulate_batch(NETWORK, scenarios)
+    assert all(rate > 0 for rate in single)
+    assert batched == single
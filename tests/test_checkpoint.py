@@ -0,0 +1,71 @@
+"""A checkpointed sweep resumes where it stopped and only keeps final results."""
+
+import json
+
+import pytest
+
+from sweep import SweepCheckpoint, run_sweep
+from sweep.watchdog import Rate
+
+SETTINGS = {"stop_time": 2e12, "parameters": {"memo_efficiency": [1, 0.8]}}
+POINTS = [("networks/2Routers.json", distance) for distance in (1000, 11000, 21000, 31000)]
+
+calls = []
+
+
+def rate(network, distance):
+    calls.append(distance)
+    return distance / 1000
+
+
+def partial_rate(network, distance):
+    # the 21 km run stops on its budget
+    calls.append(distance)
+    return Rate(distance / 1000, complete=distance != 21000)
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+def test_resume_runs_only_missing_points(tmp_path):
+    path = str(tmp_path / "sweep.jsonl")
+    # a sweep killed after two points, the second one torn mid-line
+    run_sweep(rate, POINTS[:2], workers=1, checkpoint=SweepCheckpoint(path, settings=SETTINGS))
+    with open(path) as file:
+        lines = file.readlines()
+    with open(path, "w") as file:
+        file.writelines(lines[:-1] + [lines[-1][:10]])
+    calls.clear()
+
+    results = run_sweep(rate, POINTS, workers=1, checkpoint=SweepCheckpoint(path, settings=SETTINGS))
+    assert results == [1, 11, 21, 31]
+    assert calls == [11000, 21000, 31000]
+
+    calls.clear()
+    assert run_sweep(rate, POINTS, workers=1, checkpoint=SweepCheckpoint(path, settings=SETTINGS)) == results
+    assert calls == []
+
+
+def test_resume_with_other_settings_raises(tmp_path):
+    path = str(tmp_path / "sweep.jsonl")
+    run_sweep(rate, POINTS[:1], workers=1, checkpoint=SweepCheckpoint(path, settings=SETTINGS))
+    with pytest.raises(ValueError, match="other settings"):
+        SweepCheckpoint(path, settings=dict(SETTINGS, stop_time=1e12))
+    # not resuming starts the file over with the new settings
+    checkpoint = SweepCheckpoint(path, resume=False, settings=dict(SETTINGS, stop_time=1e12))
+    assert checkpoint.load() == {}
+
+
+def test_incomplete_points_are_not_checkpointed(tmp_path):
+    path = str(tmp_path / "sweep.jsonl")
+    results = run_sweep(partial_rate, POINTS, workers=1, checkpoint=SweepCheckpoint(path, settings=SETTINGS))
+    assert [result.complete for result in results] == [True, True, False, True]
+    with open(path) as file:
+        recorded = [json.loads(line)["result"] for line in file if '"key"' in line]
+    assert recorded == [1, 11, 31]
+
+    calls.clear()
+    run_sweep(partial_rate, POINTS, workers=1, checkpoint=SweepCheckpoint(path, settings=SETTINGS))
+    assert calls == [21000]
@@ -0,0 +1,69 @@
+"""A sweep served by a `Coordinator` survives a worker killed mid-point."""
+
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from sweep import run_sweep
+from sweep.distributed import AUTHKEY_VARIABLE, Coordinator, work
+from sweep.generate import chain_config, write_config
+from sweep.simulation import Simulation
+
+AUTHKEY = b"test"
+
+
+def rate(network, distance, hang_marker=None):
+    """Rate of a short run; the first call given `hang_marker` creates it and never returns."""
+    if hang_marker is not None and not os.path.exists(hang_marker):
+        open(hang_marker, "w").close()
+        time.sleep(600)
+    return Simulation(stop_time=1.01e12, verbose=False).simulate(network, distance)
+
+
+@pytest.fixture(scope="module")
+def chain(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("networks") / "chain3.json")
+    write_config(chain_config(3, "constant", capacity=2), path)
+    return path
+
+
+def test_killed_worker_point_is_requeued(chain, tmp_path, caplog):
+    distances = [1000, 5000, 20000]
+    expected = run_sweep(rate, [(chain, distance) for distance in distances], workers=1)
+    marker = str(tmp_path / "hung")
+    points = [(chain, distance, marker) for distance in distances]
+
+    caplog.set_level(logging.WARNING, logger="sweep.distributed")
+    with Coordinator(("127.0.0.1", 0), AUTHKEY, lease_timeout=30) as coordinator:
+        results = []
+        sweep = threading.Thread(target=lambda: results.append(run_sweep(rate, points, coordinator=coordinator)),
+                                 daemon=True)
+        sweep.start()
+        # a worker process, as on a remote host, that hangs on the first point it gets
+        tests = os.path.dirname(os.path.abspath(__file__))
+        # keep the caller's PYTHONPATH, it may be how SeQUeNCe is found
+        paths = [tests, os.path.dirname(tests), os.environ.get("PYTHONPATH", "")]
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in paths if path))
+        env[AUTHKEY_VARIABLE] = AUTHKEY.decode()
+        worker = subprocess.Popen([sys.executable, "-m", "sweep", "worker", "%s:%d" % coordinator.address], env=env)
+        try:
+            deadline = time.monotonic() + 60
+            while not os.path.exists(marker):
+                assert time.monotonic() < deadline, "the worker never started a point"
+                time.sleep(0.1)
+        finally:
+            worker.send_signal(signal.SIGKILL)
+            worker.wait()
+
+        threading.Thread(target=work, args=(coordinator.address, AUTHKEY), daemon=True).start()
+        sweep.join(timeout=60)
+        assert not sweep.is_alive()
+
+    assert "re-queueing point" in caplog.text
+    assert results == [expected]
@@ -0,0 +1,91 @@
+"""The memory and rule indexes must not change what a run does."""
+
+import random
+
+import pytest
+from sequence.components.memory import MemoryArray
+from sequence.kernel.timeline import Timeline
+from sequence.resource_management.memory_manager import MemoryManager
+
+import sweep.topology
+import swaping_rules.ResourceReservationProtocol as protocol
+from sweep import strategies
+from sweep.generate import chain_config, write_config
+from sweep.memory_index import FIDELITY_BUCKET, IndexedMemoryManager
+from sweep.simulation import Simulation
+
+
+@pytest.fixture(scope="module")
+def chain(tmp_path_factory):
+    # three routers, four memories per link: the middle one swaps, both links purify
+    path = str(tmp_path_factory.mktemp("networks") / "chain3x4.json")
+    write_config(chain_config(3, "constant", capacity=4), path)
+    return path
+
+
+def _run(chain, policy, indexes, monkeypatch):
+    """Rate of a short run and every purification partner lookup, with or without the indexes."""
+    if not indexes:
+        monkeypatch.setattr(sweep.topology, "install_indexes", lambda topology: None)
+    lookups = []
+    find = protocol._purification_partner
+
+    def record(manager, memory_info, memory_indices, below, policy):
+        assert isinstance(manager, IndexedMemoryManager) == indexes
+        partner = find(manager, memory_info, memory_indices, below, policy)
+        lookups.append((manager.resource_manager.owner.name, memory_info.index,
+                        partner.index if partner is not None else None))
+        return partner
+
+    monkeypatch.setattr(protocol, "_purification_partner", record)
+    try:
+        simulation = Simulation({"memo_fidelity": 0.93}, stop_time=1.01e12, target_fidelity=0.9,
+                                purification_pairing=policy, verbose=False)
+        rate = simulation.simulate(chain, 1000, strategies.resolve("custom"), link_capacity=[4, 4],
+                                   node_order=["r1"])
+    finally:
+        monkeypatch.undo()
+    return rate, lookups
+
+
+@pytest.mark.parametrize("policy", protocol.PAIRING_POLICIES)
+def test_indexes_keep_rates_and_partners(chain, policy, monkeypatch):
+    rate, lookups = _run(chain, policy, True, monkeypatch)
+    plain_rate, plain_lookups = _run(chain, policy, False, monkeypatch)
+    assert any(partner is not None for _, _, partner in lookups)
+    assert rate == plain_rate
+    assert lookups == plain_lookups
+
+
+def test_purification_partner_matches_scan():
+    # the same random states on an indexed and a plain manager, queried after every change
+    timeline = Timeline()
+    indexed = IndexedMemoryManager(MemoryArray("indexed", timeline, num_memories=24))
+    plain = MemoryManager(MemoryArray("plain", timeline, num_memories=24))
+    rng = random.Random(0)
+    # few distinct fidelities and times, so that every policy has ties to break
+    fidelities = [0.8, 0.85, 0.85 + FIDELITY_BUCKET / 2, 0.86, 0.9, 0.95]
+    for step in range(200):
+        timeline.time = step // 4
+        index = rng.randrange(24)
+        remote_node = rng.choice(["a", "b"])
+        fidelity = rng.choice(fidelities)
+        expire = rng.random() < 0.2
+        for manager in (indexed, plain):
+            info = manager[index]
+            if expire:
+                info.to_raw()
+                continue
+            info.memory.entangled_memory = {"node_id": remote_node, "memo_id": "m%d" % index}
+            info.memory.fidelity = fidelity
+            info.to_entangled()
+        members = set(rng.sample(range(24), 16))
+        below = rng.choice(fidelities[1:])
+        for info in plain:
+            # what the EP rule condition asks before looking for a partner
+            if info.state != "ENTANGLED" or info.fidelity >= below or info.index not in members:
+                continue
+            for policy in protocol.PAIRING_POLICIES:
+                expected = protocol._purification_partner(plain, info, members, below, policy)
+                partner = indexed.purification_partner(indexed[info.index], members, below, policy)
+                assert (partner and partner.index) == (expected and expected.index), (step, policy)
@@ -0,0 +1,59 @@
+"""The specialized rule conditions must accept exactly the memories the original ones accept."""
+
+import random
+from types import SimpleNamespace
+
+import pytest
+from sequence.components.memory import MemoryArray
+from sequence.kernel.timeline import Timeline
+from sequence.resource_management.memory_manager import MemoryManager
+
+import swaping_rules.ResourceReservationProtocol as protocol
+from sweep.memory_index import IndexedMemoryManager
+
+MEMORIES = 12
+FIDELITIES = [0.8, 0.85, 0.9, 0.95]
+REMOTE_NODES = ["left", "right", "other"]
+
+# (original condition, its arguments), every argument set once on contiguous and once on scattered indices
+CASES = [(protocol.eg_rule_condition, {}),
+         (protocol.ep_rule_condition2, {"fidelity": 0.9}),
+         (protocol.es_rule_conditionB1, {"target_remote": "right", "fidelity": 0.85}),
+         (protocol.es_rule_conditionA, {"left": "left", "right": "right", "fidelity": 0.85}),
+         (protocol.es_rule_conditionB2, {"left": "left", "right": "right", "fidelity": 0.85})]
+CASES += [(protocol.ep_rule_condition1,
+           {"reservation": SimpleNamespace(fidelity=0.9, purification_pairing=policy)})
+          for policy in protocol.PAIRING_POLICIES]
+INDICES = [range(2, 10), [0, 1, 3, 4, 6, 7, 9, 11]]
+
+
+def _randomize(manager, rng):
+    info = manager[rng.randrange(MEMORIES)]
+    state = rng.choice(["RAW", "OCCUPIED", "ENTANGLED"])
+    if state == "RAW":
+        info.to_raw()
+    elif state == "OCCUPIED":
+        if info.state != "OCCUPIED":
+            info.to_occupied()
+    else:
+        info.memory.entangled_memory = {"node_id": rng.choice(REMOTE_NODES), "memo_id": "m%d" % info.index}
+        info.memory.fidelity = rng.choice(FIDELITIES)
+        info.to_entangled()
+
+
+@pytest.mark.parametrize("manager_type", [MemoryManager, IndexedMemoryManager])
+@pytest.mark.parametrize("indices", INDICES)
+@pytest.mark.parametrize("condition, args", CASES, ids=lambda case: getattr(case, "__name__", ""))
+def test_specialized_condition_matches_original(condition, args, indices, manager_type):
+    manager = manager_type(MemoryArray("memories", Timeline(), num_memories=MEMORIES))
+    args = protocol.RuleArgs(memory_indices=protocol.MemoryIndices(indices), **args)
+    specialized = protocol._SPECIALIZED[condition](args)
+    rng = random.Random(0)
+    accepted = 0
+    for step in range(150):
+        _randomize(manager, rng)
+        for info in manager:
+            expected = [memory.index for memory in condition(info, manager, args)]
+            assert [memory.index for memory in specialized(info, manager, args)] == expected, (step, info.index)
+            accepted += bool(expected)
+    assert accepted > 0
@@ -0,0 +1,104 @@
+"""Experiment specs expand into distinct, snapped points and reject what they cannot run."""
+
+import pytest
+
+from sweep.spec import ExperimentSpec, run_spec
+from sweep.watchdog import Rate
+
+NETWORK = "networks/2Routers.json"
+
+
+def spec(axes, method="grid", samples=None, **data):
+    sampling = {"method": method, "samples": samples, "seed": 0}
+    return ExperimentSpec(dict({"network": NETWORK, "sampling": sampling, "axes": axes}, **data))
+
+
+def test_grid_is_the_cartesian_product():
+    experiment = spec({"distance": {"range": [1000, 21000], "step": 10000},
+                       "memo_efficiency": {"values": [1, 0.8]},
+                       "memo_expire": {"range": [1e-3, 1], "points": 4, "scale": "log"}})
+    points = experiment.points()
+    assert experiment.grid_size() == len(points) == 3 * 2 * 4
+    assert sorted({point["distance"][1] for point in points}) == [1000, 11000, 21000]
+    assert sorted({point["memo_expire"][1] for point in points}) == pytest.approx([1e-3, 1e-2, 1e-1, 1])
+
+
+def test_labelled_values_are_stored_as_labels():
+    experiment = spec({"distance": {"values": [1000]},
+                       "memo_efficiency": {"values": {"decreasing": [1, 0.8], "increasing": [0.8, 1]}}})
+    rows = [experiment.row(point) for point in experiment.points()]
+    assert [row["memo_efficiency"] for row in rows] == ["decreasing", "increasing"]
+    assert experiment.arguments(experiment.points()[0])[4] == {"memo_efficiency": [1, 0.8]}
+
+
+@pytest.mark.parametrize("method", ["lhs", "sobol"])
+def test_sampled_points_are_in_range_and_on_the_step(method):
+    experiment = spec({"distance": {"range": [1000, 200000], "step": 5000},
+                       "memo_efficiency": {"range": [0.3, 1], "step": 0.05},
+                       "memo_expire": {"range": [1e-3, 1], "scale": "log"},
+                       "swapping_order": {"values": ["left_to_right", "right_to_left"]}},
+                      method=method, samples=32)
+    points = experiment.points()
+    assert len(points) == 32
+    for point in points:
+        distance, efficiency, expire = (point[name][1] for name in ("distance", "memo_efficiency", "memo_expire"))
+        assert 1000 <= distance <= 200000 and (distance - 1000) % 5000 == 0
+        assert 0.3 <= efficiency <= 1 and round((efficiency - 0.3) / 0.05, 9).is_integer()
+        assert 1e-3 <= expire <= 1
+    assert {point["swapping_order"][1] for point in points} == {"left_to_right", "right_to_left"}
+
+
+def test_step_snapping():
+    axis = spec({"distance": {"range": [1000, 10000], "step": 2000}}).axes[0]
+    assert [axis.at(u)[1] for u in (0, 0.1, 0.2, 0.99)] == [1000, 1000, 3000, 9000]
+    # a value snapped past the end of the range is clamped to it
+    assert spec({"distance": {"range": [0, 10], "step": 6}}).axes[0].at(0.95)[1] == 10
+    assert spec({"distance": {"range": [1000, 2000], "integer": True}}).axes[0].at(0.3333)[1] == 1333
+
+
+def test_duplicate_points_are_dropped():
+    # 64 samples over 2 x 3 distinct values
+    experiment = spec({"distance": {"range": [1000, 3000], "step": 1000},
+                       "swapping_order": {"values": ["left_to_right", "right_to_left"]}},
+                      method="lhs", samples=64)
+    points = experiment.points()
+    assert len(points) == 6
+    assert experiment.grid_size() == 6
+
+
+@pytest.mark.parametrize("data", [
+    {"axes": {"distance": {"values": [1000]}, "memory_size": {"values": [1]}}},
+    {"axes": {"distance": {"values": [1000]}}, "fixed": {"memory_size": 1}},
+    {"axes": {"distance": {"values": [1000]}}, "settings": {"stop": 1e12}},
+    {"axes": {"distance": {"values": [1000]}}, "fixed": {"distance": 1000}},
+    {"axes": {"memo_efficiency": {"values": [1]}}},
+    {"axes": {"distance": {"values": [1000]}}, "sampling": {"method": "random", "samples": 4}},
+    {"axes": {"distance": {"values": [1000]}}, "sampling": {"method": "lhs"}},
+    {"axes": {"distance": {"values": [1000]}, "swapping_order": {"values": ["middle_out"]}}},
+    {"axes": {"distance": {"values": []}}},
+    {"axes": {"distance": {"range": [2000, 1000], "step": 100}}},
+    {"axes": {"distance": {"range": [1000, 2000], "step": 100, "scale": "log"}}},
+], ids=["axis", "fixed", "setting", "overlap", "no distance", "method", "no samples", "strategy",
+        "no values", "empty range", "log step"])
+def test_bad_specs_are_rejected(data):
+    with pytest.raises(ValueError):
+        ExperimentSpec(dict({"network": NETWORK}, **data))
+
+
+def test_missing_network_is_rejected():
+    with pytest.raises(ValueError, match="network"):
+        ExperimentSpec({"axes": {"distance": {"values": [1000]}}})
+
+
+class BudgetedSimulation:
+    """Stands in for `Simulation`: the 21 km run stops on its budget."""
+
+    def simulate(self, network, distance, *args):
+        return Rate(distance / 1000, complete=distance != 21000)
+
+
+def test_run_spec_rows_carry_completeness():
+    experiment = spec({"distance": {"range": [1000, 21000], "step": 10000}})
+    rows = run_spec(experiment, simulation=BudgetedSimulation(), workers=1)
+    assert [(row["distance"], row["rate"], row["complete"]) for row in rows] == [
+        (1000, 1, True), (11000, 11, True), (21000, 21, False)]